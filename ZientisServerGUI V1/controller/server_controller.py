@@ -1,106 +1,359 @@
 import os
-import platform
 import subprocess
 import psutil
 
 from model.config import ConfigManager
 from model.plugin_manager import PluginManager
-from model.backup_manager import BackupManager
 from model.player_role_manager import PlayerRoleManager
-from model.player import Player
-from model.rcon_manager import RconManager
-from utils.logger import log_info, log_error
+from model.player import PlayerTable
+from model.luckperms_sync import LuckPermsRoleSource
+from model.player_stats import PlayerStatsLoader, offline_uuid
+from model.server_lists import ServerListIndex
+from model.session_store import SessionStore
+from model.history_index import HistoryIndex
+from model.metrics_store import MetricsStore
+from model.server_core import ServerCore, build_launch_command, CONSOLE_FPS
+from model.instance_manager import InstanceManager
+from model.boot_profiler import BootHistory, format_report
+from model.benchmark import BenchmarkRunner, benchmark_profiles, format_report as format_benchmark_report
+from model.server_lifecycle import STOPPING, STOPPED, CRASHED
+from utils.logger import log_info, log_error, setup_logger
 from utils.notification import notify
+from utils.jvm_flags import (host_info, java_version, cached_java_version, validate, suggest_heap_mb,
+                             gc_fallback_warning)
+from utils.log_buffer import LogBuffer
+from utils.process_sampler import ProcessSampler
+from utils.log_parser import LogRecord
+from utils.log_archive import ArchiveWriter
 
-from PySide6.QtCore import QTimer, QThread, Signal, QDateTime
+from PySide6.QtCore import QObject, QTimer, QThread, Signal, QDateTime
 from PySide6.QtWidgets import QFileDialog, QTableWidgetItem
 
-ROLE_PRIORITY = {"服主": 0, "管理員": 1, "VIP": 2, "玩家": 3}
+class CoreEvents(QObject):
+    """把 ServerCore 在背景執行緒送出的事件轉到主執行緒（跨執行緒的 signal 會排入事件佇列）"""
+    event = Signal(str, object)
 
-class PlayerSyncWorker(QThread):
-    player_data_ready = Signal(list)
-    def __init__(self, rcon_mgr, role_mgr):
+class RoleSyncWorker(QThread):
+    """背景依線上名單批次同步職位（LuckPerms 可能需要 RCON 往返），避免卡住 GUI"""
+    done = Signal(list)
+    def __init__(self, players, role_mgr, role_source=None):
         super().__init__()
-        self.rcon_mgr = rcon_mgr
+        self.players = players
         self.role_mgr = role_mgr
+        self.role_source = role_source
 
     def run(self):
         try:
-            players = []
-            try:
-                players = self.rcon_mgr.get_online_players()
-            except Exception as e:
-                print(f"[DEBUG] RCON get_online_players exception: {e}")
-            self.role_mgr.sync_roles_from_server(players)
-            player_objs = []
-            for name in players:
-                role = self.role_mgr.get_role(name)
-                player_objs.append(Player(name, role))
-            player_objs.sort(key=lambda p: (ROLE_PRIORITY.get(p.role, 99), p.name.lower()))
-            self.player_data_ready.emit(player_objs)
+            self.role_mgr.sync_roles_from_server(self.players, self.role_source)
         except Exception as e:
             print(f"[DEBUG] 玩家名單同步失敗: {e}")
             log_error(f"玩家名單同步失敗: {e}")
-            self.player_data_ready.emit([])
+        self.done.emit(self.players)
+
+class BulkActionWorker(QThread):
+    """背景執行玩家批次管理動作（同一條 RCON 連線依序送出），回報進度與逐一結果"""
+    progress = Signal(int, int)
+    finished_report = Signal(str, list)
+    def __init__(self, rcon_mgr, role_mgr, role_source, action, names, reason="", role=None, rcon_ready=True):
+        super().__init__()
+        self.rcon_mgr = rcon_mgr
+        self.rcon_ready = rcon_ready
+        self.role_mgr = role_mgr
+        self.role_source = role_source
+        self.action = action
+        self.names = names
+        self.reason = reason
+        self.role = role
+
+    def run(self):
+        try:
+            if self.action == "role":
+                results = self._change_roles()
+            else:
+                results = self.rcon_mgr.bulk_action(
+                    self.action, self.names, self.reason, progress=self.progress.emit)
+        except Exception as e:
+            log_error(f"批次操作失敗: {e}")
+            results = [(name, False, str(e)) for name in self.names]
+        self.finished_report.emit(self.action, results)
+
+    def _change_roles(self):
+        self.role_mgr.update_roles(self.names, self.role)
+        group = None
+        if self.role_source and self.role_source.plugin_installed():
+            group = self.role_source.group_for_role(self.role)
+        if not group:
+            self.progress.emit(len(self.names), len(self.names))
+            return [(name, True, f"職位已設為 {self.role}") for name in self.names]
+        if not self.rcon_ready:
+            # 本地職位已更新，但 RCON 未連線時不送 LuckPerms 指令
+            self.progress.emit(len(self.names), len(self.names))
+            return [(name, False, f"職位已設為 {self.role}，RCON 未連線，LuckPerms 未同步") for name in self.names]
+        # 同步寫回 LuckPerms 主要群組
+        cmds = [f"lp user {name} parent set {group}" for name in self.names]
+        responses = self.rcon_mgr.run_commands(cmds, progress=self.progress.emit)
+        self.role_source.invalidate()
+        return [self.rcon_mgr.classify_response(name, resp) for name, resp in zip(self.names, responses)]
+
+class PlayerStatsWorker(QThread):
+    """背景讀取/解析玩家的 stats、advancements、playerdata"""
+    stats_ready = Signal(str, dict)
+    def __init__(self, loader, name, uuid):
+        super().__init__()
+        self.loader = loader
+        self.name = name
+        self.uuid = uuid
+
+    def run(self):
+        try:
+            self.stats_ready.emit(self.name, self.loader.load(self.uuid))
+        except Exception as e:
+            print(f"[DEBUG] 玩家資料讀取失敗: {e}")
+            self.stats_ready.emit(self.name, {})
+
+class LogSearchWorker(QThread):
+    """在背景查詢日誌索引，避免大量資料的正規式掃描卡住 GUI"""
+    results_ready = Signal(list, float)
+    search_failed = Signal(str)
+    def __init__(self, index, text, min_level, regex):
+        super().__init__()
+        self.index = index
+        self.text = text
+        self.min_level = min_level
+        self.regex = regex
+
+    def run(self):
+        start = QDateTime.currentMSecsSinceEpoch()
+        try:
+            results = self.index.search(self.text, self.min_level, self.regex)
+        except Exception as e:
+            self.search_failed.emit(str(e))
+            return
+        self.results_ready.emit(results, QDateTime.currentMSecsSinceEpoch() - start)
+
+class HistoryIndexWorker(QThread):
+    """背景索引 logs/*.log.gz（多程序解壓解析），只處理新增或變動的檔案"""
+    progress = Signal(int, int)
+    index_done = Signal(int)
+    def __init__(self, index, logs_dir):
+        super().__init__()
+        self.index = index
+        self.logs_dir = logs_dir
+
+    def run(self):
+        try:
+            n = self.index.update(
+                self.logs_dir,
+                progress=self.progress.emit,
+                cancelled=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            print(f"[DEBUG] HistoryIndexWorker exception: {e}")
+            n = 0
+        self.index_done.emit(n)
+
+class JavaProbeWorker(QThread):
+    """在背景執行 java -version（結果會快取），完成後更新啟動指令預覽"""
+    done = Signal(str, int)        # Java 路徑, 主版本（0 = 無法取得）
+    def __init__(self, java_path):
+        super().__init__()
+        self.java_path = java_path
+
+    def run(self):
+        self.done.emit(self.java_path, java_version(self.java_path) or 0)
 
-class ServerLogReader(QThread):
-    log_line = Signal(str)
-    def __init__(self, process):
+class BenchmarkWorker(QThread):
+    """在背景執行 A/B 效能測試（每個方案開機、預熱、量測後停止），回報進度"""
+    progress = Signal(str)
+    finished_report = Signal(list)
+    def __init__(self, runner):
         super().__init__()
-        self.process = process
+        self.runner = runner
+        runner.progress = self.progress.emit
 
     def run(self):
         try:
-            while True:
-                line = self.process.stdout.readline()
-                if not line:
-                    break
-                self.log_line.emit(line.rstrip('\n'))
+            results = self.runner.run()
         except Exception as e:
-            print(f"[DEBUG] ServerLogReader exception: {e}")
+            log_error(f"效能測試失敗: {e}")
+            results = self.runner.results
+        self.finished_report.emit(results)
 
 class ServerController:
+    """
+    主伺服器的 Qt 介面層：啟停、附加、日誌管線、RCON、觸發規則、TPS 與備份全部交給 ServerCore，
+    這裡只負責把核心事件轉成畫面更新，以及設定頁、插件、玩家管理等 GUI 專屬功能。
+    """
     def __init__(self, ui):
         print("[DEBUG] ServerController init")
         self.ui = ui
         self.config_mgr = ConfigManager()
-        self.server_process = None
-        self.server_running = False
-        self.log_reader = None
-        self.rcon_ready = False
         self.config = self.config_mgr.load()
+        self._start_archives()
+        # 主伺服器與設定檔 "instances" 中的其他伺服器都由 InstanceManager 管理（共用執行緒池）
+        self.instances = InstanceManager(self.config, include_default=False)
+        self.core = ServerCore(self.config, pools=self.instances.pools)
+        self.core.archive = self.console_archive    # 在讀取執行緒封存，早於會丟行的緩衝區
+        self.instances.add(self.config.get("instance_name", "default"), self.core)
+        self.display_buffer = LogBuffer()     # 只供畫面顯示，來不及畫時可以丟行
+        self.core_events = CoreEvents()
+        self.core_events.event.connect(self._on_core_event)
+        self.core.listeners.append(self._on_core_background_event)
+        self.search_worker = None
+        self._pending_search = None
+        self.history_index = HistoryIndex()
+        self.history_worker = None
+        self.host_info = host_info()
+        self.java_probe = None
+        self.benchmark_worker = None
+        self.process_sampler = ProcessSampler(
+            interval=float(self.config.get("process_sample_interval", 1)),
+            history=int(self.config.get("process_sample_history", 21600)),
+        )
+        self.process_sampler.start()
+        self.metrics_store = MetricsStore(raw_size=int(self.config.get("metrics_raw_points", 3600)))
+        self.metrics_store.start()
+        self._manual_backup = False    # 手動備份完成時跳出對話框
         self.plugin_mgr = None
-        self.backup_mgr = None
         self.role_mgr = None
-        self.rcon_mgr = None
+        self.role_source = None
+        self.session_store = SessionStore()
+        self.player_table = PlayerTable()
+        self.player_table.load_known(self.session_store.known_players())
 
-        self.player_timer = QTimer()
-        self.player_timer.timeout.connect(self.update_player_list)
-        print("[DEBUG] 綁定 player_timer -> update_player_list")
-        self.player_worker = None
+        self.role_worker = None
+        self.bulk_worker = None
+        self.stats_workers = {}
+        self.stats_loader = None
+        self.server_lists = None
 
+        # 每秒只取樣一次：指標寫入與狀態列都由這個計時器驅動（其他地方呼叫 on_update_status 不會重複取樣）
+        self._host_usage = (None, None)
         self.status_timer = QTimer(self.ui)
-        self.status_timer.timeout.connect(self.on_update_status)
+        self.status_timer.timeout.connect(self._on_status_tick)
         print("[DEBUG] 綁定 status_timer -> on_update_status")
         self.status_timer.start(1000)
 
+        # 主控台以固定頻率整批更新，避免每行一個 signal
+        self.log_flush_timer = QTimer()
+        self.log_flush_timer.timeout.connect(self._flush_console)
+        self.log_flush_timer.start(int(1000 / max(1, int(self.config.get("console_fps", CONSOLE_FPS)))))
+
+        # 遊玩紀錄每日壓縮一次
+        self.compact_timer = QTimer()
+        self.compact_timer.timeout.connect(self.on_compact_sessions)
+        self.compact_timer.start(24 * 3600 * 1000)
+
         self._update_managers()
 
+        # 等 UI 初始化完成後再啟動各實例的排程（會自動接回監管中的伺服器）
+        QTimer.singleShot(0, self._run_background)
+
+    # ========== 核心狀態 ==========
+    @property
+    def lifecycle(self):
+        return self.core.lifecycle
+
+    @property
+    def server_running(self):
+        return self.core.running
+
+    @property
+    def attached(self):
+        return self.core.attached
+
+    @property
+    def supervised(self):
+        return self.core.supervised
+
+    @property
+    def rcon_ready(self):
+        return self.core.rcon_ready
+
+    @property
+    def rcon_mgr(self):
+        return self.core.rcon_mgr
+
+    @property
+    def lag_tracker(self):
+        return self.core.lag_tracker
+
+    @property
+    def log_index(self):
+        return self.core.log_index
+
+    @property
+    def tps_monitor(self):
+        return self.core.tps_monitor
+
+    @property
+    def boot_history(self):
+        return self.core.boot_profiler.history
+
+    def _on_core_background_event(self, event, data):
+        """在核心的背景執行緒被呼叫：日誌直接寫入顯示緩衝，其餘事件轉回主執行緒"""
+        if event in ("records", "backlog"):
+            self.display_buffer.push_many(data)
+        else:
+            self.core_events.event.emit(event, data)
+
+    def _on_core_event(self, event, data):
+        handler = {
+            "state": self._on_state_changed,
+            "rcon": self._on_rcon_changed,
+            "players": self._on_players,
+            "tps": self._on_tps_polled,
+            "boot": self._on_boot_profiled,
+            "backup": self._on_backup_done,
+            "message": self._on_core_message,
+            "start_failed": self._on_start_failed,
+        }.get(event)
+        if handler is None:
+            return
+        try:
+            handler(*data) if isinstance(data, tuple) else handler(data)
+        except Exception as e:
+            print(f"[DEBUG] core event {event} exception: {e}")
+            log_error(f"處理伺服器事件 {event} 失敗: {e}")
+
+    def _on_core_message(self, text, is_error):
+        self.ui.append_log(text, is_error=is_error)
+
+    def _start_archives(self):
+        """主控台與啟動器事件的背景封存（依大小/時間輪替壓縮）"""
+        archive_dir = self.config.get("archive_dir", os.path.join(os.getcwd(), "logs_archive"))
+        options = dict(
+            max_bytes=int(self.config.get("archive_max_mb", 20)) * 1024 * 1024,
+            rotate_seconds=int(self.config.get("archive_rotate_hours", 24)) * 3600,
+            keep=int(self.config.get("archive_keep", 50)),
+        )
+        self.console_archive = ArchiveWriter(archive_dir, "console", **options)
+        self.launcher_archive = ArchiveWriter(archive_dir, "launcher", **options)
+        self.console_archive.start()
+        self.launcher_archive.start()
+        setup_logger(archive=self.launcher_archive)
+
     def _update_managers(self):
         print("[DEBUG] _update_managers called")
         folder = self.config.get("folder", "")
-        backup_dir = self.config.get("backup_dir", os.getcwd() + "/backups")
         world_path = self.config.get("world", "")
 
+        # 觸發規則、RCON、備份與停止參數由核心重建；其他實例依 "instances" 更新、新增或移除
+        self.core.apply_config(self.config)
+        self.instances.apply_config(self.config)
         self.plugin_mgr = PluginManager(os.path.join(folder, "plugins")) if folder else None
-        self.backup_mgr = BackupManager(world_path, backup_dir) if world_path else None
+        self.stats_loader = PlayerStatsLoader(world_path) if world_path else None
+        self.server_lists = ServerListIndex(folder) if folder else None
 
-        rcon_host = self.config.get("rcon_host", "127.0.0.1")
-        rcon_port = int(self.config.get("rcon_port", 25575))
-        rcon_pass = self.config.get("rcon_pass", "")
-        print("[DEBUG] RCON 設定:", rcon_host, rcon_port, rcon_pass)
+        print("[DEBUG] RCON 設定:", self.rcon_mgr.host, self.rcon_mgr.port, self.rcon_mgr.password)
         self.role_mgr = PlayerRoleManager()
-        self.rcon_mgr = RconManager(rcon_host, rcon_port, rcon_pass)
+        self.role_source = LuckPermsRoleSource(
+            folder, self.rcon_mgr,
+            group_roles=self.config.get("role_groups"),
+            ttl=int(self.config.get("role_sync_ttl", 60)),
+            mode=self.config.get("luckperms_mode", "auto"),
+        ) if folder else None
+        self.update_history_index()
 
     def on_load_last_config(self):
         print("[DEBUG] on_load_last_config called")
@@ -108,10 +361,13 @@ class ServerController:
         self._update_managers()
         if self.config:
             self.ui.restore_config_to_ui(self.config)
+        self.on_preview_launch_cmd()
 
     def on_save_settings(self):
         try:
-            cfg = {
+            # 保留設定頁沒有的進階欄位（例如職位同步設定）
+            cfg = dict(self.config)
+            cfg.update({
                 "core": self.ui.ui.combo_core.currentText(),
                 "core_path": self.ui.ui.edit_core_path.text(),
                 "folder": self.ui.ui.edit_folder_path.text(),
@@ -119,6 +375,8 @@ class ServerController:
                 "xms": self.ui.ui.spin_xms.value(),
                 "xmx": self.ui.ui.spin_xmx.value(),
                 "args": self.ui.ui.edit_args.text(),
+                "jvm_profile": self.ui.ui.combo_jvm_profile.currentData() or "manual",
+                "large_pages": self.ui.ui.combo_large_pages.currentData() or "auto",
                 "port": self.ui.ui.spin_port.value(),
                 "max_players": self.ui.ui.spin_max_players.value(),
                 "world": self.ui.ui.edit_world_path.text(),
@@ -131,7 +389,7 @@ class ServerController:
                 "rcon_host": self.ui.ui.edit_rcon_host.text() if hasattr(self.ui.ui, "edit_rcon_host") else "127.0.0.1",
                 "rcon_port": self.ui.ui.spin_rcon_port.value() if hasattr(self.ui.ui, "spin_rcon_port") else 25575,
                 "rcon_pass": self.ui.ui.edit_rcon_pass.text() if hasattr(self.ui.ui, "edit_rcon_pass") else "",
-            }
+            })
             self.config_mgr.save(cfg)
             self.config = cfg
             self._update_managers()
@@ -161,53 +419,7 @@ class ServerController:
         except Exception:
             return True
 
-    def _start_server_process(self):
-        print("[DEBUG] _start_server_process called")
-        java_path = self.ui.ui.edit_java_path.text()
-        jar_path = self.ui.ui.edit_core_path.text()
-        xms = self.ui.ui.spin_xms.value()
-        xmx = self.ui.ui.spin_xmx.value()
-        args = self.ui.ui.edit_args.text()
-        folder = self.ui.ui.edit_folder_path.text()
-
-        cmd = [
-            java_path,
-            f"-Xms{xms}M",
-            f"-Xmx{xmx}M",
-            "-jar",
-            jar_path
-        ] + args.split() + ["nogui"]
-
-        try:
-            self.server_process = subprocess.Popen(
-                cmd,
-                cwd=folder,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                shell=(platform.system() == "Windows")
-            )
-            self.server_running = True
-            self.rcon_ready = False
-            self._rcon_detected = False
-            self.ui.append_log("伺服器已啟動")
-            log_info(f"伺服器啟動成功: {cmd}")
-
-            # QThread讀log（Signal觸發主線程處理）
-            self.log_reader = ServerLogReader(self.server_process)
-            self.log_reader.log_line.connect(self._on_server_log)
-            self.log_reader.start()
-        except Exception as e:
-            print(f"[DEBUG] _start_server_process exception: {e}")
-            self._handle_start_error(e)
-
-    def _handle_start_error(self, e):
-        log_error(f"伺服器啟動失敗: {e}")
-        notify("伺服器啟動失敗", str(e))
-        self.ui.show_message("錯誤", f"伺服器啟動失敗：{e}", "error")
-
+    # ========== 啟停 ==========
     def on_start_server(self):
         print("[DEBUG] on_start_server called")
         if self.server_running:
@@ -218,119 +430,307 @@ class ServerController:
         if self.server_locked():
             self.ui.show_message("錯誤", "檔案被鎖定，請確定沒有其他伺服器執行中，或重開機。", "error")
             return
-        try:
-            self._start_server_process()
-        except Exception as e:
-            self._handle_start_error(e)
-
-    def _on_server_log(self, line):
-        self.ui.append_log(line, is_error=("WARN" in line.upper() or "SEVERE" in line.upper()))
-        # RCON關鍵字自動偵測
-        rcon_keywords = [
-            "Thread RCON Listener started",
-            "RCON running",
-            "RCON is running",
-            "RCON listener started",
-            "RCON 啟動"
-        ]
-        if not hasattr(self, "_rcon_detected"):
-            self._rcon_detected = False
-        if not self._rcon_detected and any(key in line for key in rcon_keywords):
-            print("[DEBUG] Detected RCON keyword in output")
-            self._rcon_detected = True
-            QTimer.singleShot(1500, self._wait_rcon_ready_and_init)
-
-    def _wait_rcon_ready_and_init(self, max_wait=10):
-        print("[DEBUG] _wait_rcon_ready_and_init called")
-        self.rcon_ready = False
-        self.rcon_retry_count = 0
-
-        def try_connect_rcon():
-            try:
-                print(f"[DEBUG] try_connect_rcon attempt={self.rcon_retry_count}")
-                if self.rcon_mgr:
-                    try:
-                        self.rcon_mgr.connect()  # 嘗試連線一次
-                        test = self.rcon_mgr.run_command("list")  # 發一個測試指令
-                        if test and "There are" in test:
-                            self.rcon_ready = True
-                            print("[DEBUG] RCON 連線成功！")
-                            self._rcon_ready_after_check()
-                            return
-                        else:
-                            print("[DEBUG] RCON 測試指令回傳異常", test)
-                    except Exception as e:
-                        print(f"[DEBUG] RCON connect/run_command error: {e}")
-            except Exception as e:
-                print(f"[DEBUG] try_connect_rcon fail: {e}")
-
-            self.rcon_retry_count += 1
-            if self.rcon_retry_count == 1:
-                self.ui.append_log("RCON 連線失敗，將自動重試...", is_error=True)
-            if self.rcon_retry_count > max_wait:
-                self.ui.append_log("RCON 初始化超時，無法啟用 RCON 相關功能", is_error=True)
-                return
-            QTimer.singleShot(2000, try_connect_rcon)
-        try_connect_rcon()
-
-    def _rcon_ready_after_check(self):
-        self.ui.append_log("RCON 已啟動，可執行 RCON 功能。")
-        self.update_plugman_status()
-        self.player_timer.start(3000)
-        self.on_update_status()
+        # 以設定頁上目前的值啟動（不必先儲存），java -version 與程序建立都在核心的背景執行緒
+        overrides = dict(self._launch_settings(), folder=self.ui.ui.edit_folder_path.text())
+        ok, message = self.core.start(overrides)
+        if not ok:
+            self.ui.append_log(message)
+
+    def _on_start_failed(self, error):
+        self.ui.show_message("錯誤", f"伺服器啟動失敗：{error}", "error")
+
+    def on_attach_server(self):
+        """附加到已在執行的伺服器（systemd、screen 或上一次的啟動器）"""
+        print("[DEBUG] on_attach_server called")
+        if self.server_running:
+            self.ui.append_log("伺服器已在運行中。")
+            return
+        self.core.folder = self.ui.ui.edit_folder_path.text()
+        ok, message = self.core.attach(backlog_bytes=int(self.config.get("attach_backlog_kb", 64)) * 1024)
+        if not ok:
+            self.ui.show_message("錯誤", message, "error")
+            return
+        self.ui.append_log(message)
+        self.update_server_button_status()
 
     def on_stop_server(self):
+        """送出 stop 後立即返回；等待存檔、逾時強制結束都由核心推進"""
         print("[DEBUG] on_stop_server called")
-        if self.server_process and self.server_process.poll() is None:
-            try:
-                self.server_process.stdin.write("stop\n")
-                self.server_process.stdin.flush()
-                self.server_process.wait(timeout=10)
-                self.ui.append_log("伺服器已停止")
-            except subprocess.TimeoutExpired:
-                self.ui.append_log("伺服器強制終止...", is_error=True)
-                self.server_process.terminate()
-                try:
-                    self.server_process.wait(timeout=3)
-                except subprocess.TimeoutExpired:
-                    self.server_process.kill()
-            except Exception as e:
-                print(f"[DEBUG] on_stop_server exception: {e}")
-                log_error(f"伺服器停止失敗: {e}")
-                self.ui.append_log(f"停止失敗：{e}", is_error=True)
-            finally:
-                self.server_running = False
-                self.rcon_ready = False
-                self.server_process = None
-                self.log_reader = None
-                self.player_timer.stop()
-                self._rcon_detected = False
-        else:
-            self.ui.append_log("伺服器未啟動。")
-            self.rcon_ready = False
-            self._rcon_detected = False
+        ok, message = self.core.stop()
+        self.ui.append_log(message, is_error=not ok or "強制" in message)
+        self.update_server_button_status()
 
     def on_restart_server(self):
+        """舊程序一結束就立即啟動，不再固定等待"""
         print("[DEBUG] on_restart_server called")
-        self.on_stop_server()
-        QTimer.singleShot(2000, self.on_start_server)
+        if self.attached:
+            return
+        if not self.server_running:
+            self.on_start_server()
+            return
+        ok, message = self.core.restart()
+        self.ui.append_log(message, is_error=not ok)
+        self.update_server_button_status()
 
-    # 玩家名單同步 & UI 動態啟用
-    def update_player_list(self):
-        if not self.rcon_ready:
+    def _on_state_changed(self, old, new):
+        print(f"[DEBUG] lifecycle {old} -> {new}")
+        self.ui.append_log(f"伺服器狀態：{self.lifecycle.describe()}", is_error=(new == CRASHED))
+        if new in (STOPPED, CRASHED):
+            self.session_store.close_all()
+            self.ui.show_player_list([])
+        self.update_server_button_status()
+
+    def _on_rcon_changed(self, ready):
+        if ready:
+            self.ui.append_log("RCON 已啟動，可執行 RCON 功能。")
+            # 伺服器啟動時會把上一份 latest.log 壓縮成 .log.gz，此時補上索引
+            self.update_history_index()
+            self.update_plugman_status()
+            self.ui.enable_player_features()
+            self.ui.enable_plugin_features()
+        else:
             self.ui.show_player_list([])
+            if hasattr(self.ui, "label_tps"):
+                self.ui.label_tps.setText("TPS：-")     # 核心已重設監測，重新連線後重新偵測查詢方式
             self.ui.disable_player_features()
+            self.ui.disable_plugin_features()
+        self.on_update_status()
+
+    def _flush_console(self):
+        lines, dropped = self.display_buffer.drain()
+        if not lines:
+            return
+        if dropped:
+            msg = f"…（顯示過慢，略過 {dropped} 行）"
+            lines.insert(0, LogRecord(None, None, "WARN", None, msg, msg))
+        self.ui.append_log_batch([(r.raw, r.level) for r in lines])
+
+    # ========== 備份 ==========
+    def on_manual_backup(self):
+        if not self.core.backup_mgr:
+            self.ui.show_message("錯誤", "請先設定世界資料夾與備份路徑", "error")
+            return
+        ok, message = self.core.backup()
+        if not ok:
+            self.ui.show_message("備份", message, "warn")
+            return
+        self._manual_backup = True
+        self.ui.append_log("開始備份…")
+
+    def _on_backup_done(self, path, err):
+        manual, self._manual_backup = self._manual_backup, False
+        if err:
+            self.ui.append_log(f"備份失敗：{err}", is_error=True)
+            if manual:
+                self.ui.show_message("備份失敗", err, "error")
+            return
+        self.ui.append_log(f"備份完成: {os.path.basename(path)}")
+        if manual:
+            self.ui.show_message("備份完成", f"已備份 {os.path.basename(path)}")
+
+    # 日誌搜尋
+    def on_log_search(self, text, min_level=None, regex=False, history=False):
+        """查詢本次工作階段（或歷史封存）的日誌；查詢進行中時只保留最新一次的條件"""
+        self._pending_search = (text, min_level, regex, history)
+        if self.search_worker and self.search_worker.isRunning():
             return
+        self._run_pending_search()
+
+    def _run_pending_search(self):
+        if self._pending_search is None:
+            return
+        text, min_level, regex, history = self._pending_search
+        self._pending_search = None
+        if not text and not min_level:
+            self.ui.show_log_search_results(None, 0)
+            return
+        index = self.history_index if history else self.log_index
+        self.search_worker = LogSearchWorker(index, text, min_level, regex)
+        self.search_worker.results_ready.connect(self._on_log_search_done)
+        self.search_worker.search_failed.connect(self._on_log_search_failed)
+        self.search_worker.finished.connect(self._run_pending_search)
+        self.search_worker.start()
+
+    def _on_log_search_done(self, results, elapsed_ms):
+        if self._pending_search is None:
+            self.ui.show_log_search_results(results, elapsed_ms)
+
+    def _on_log_search_failed(self, err):
+        self.ui.show_log_search_error(err)
+
+    # 歷史封存日誌索引
+    def update_history_index(self):
+        """索引伺服器 logs 資料夾中新的 .log.gz（啟動器開啟時與伺服器啟動完成後）"""
+        folder = self.config.get("folder", "")
+        if not folder or (self.history_worker and self.history_worker.isRunning()):
+            return
+        logs_dir = os.path.join(folder, "logs")
+        if not os.path.isdir(logs_dir):
+            return
+        self.history_worker = HistoryIndexWorker(self.history_index, logs_dir)
+        self.history_worker.index_done.connect(self._on_history_index_done)
+        self.history_worker.start()
+
+    def _on_history_index_done(self, count):
+        if count:
+            stats = self.history_index.stats()
+            log_info(f"歷史日誌索引完成：新增 {count} 個檔案，共 {stats['files']} 個檔案 / {stats['lines']} 行")
+
+    def history_last_join(self, name):
         try:
-            player_list = self.rcon_mgr.get_online_players()
-            self.ui.show_player_list(player_list)
-            self.ui.enable_player_features()
+            return self.history_index.last_seen(name)
         except Exception as e:
-            self.rcon_ready = False
-            self.ui.show_player_list([])
-            self.ui.disable_player_features()
-            self.ui.append_log(f"玩家名單更新失敗：{e}", is_error=True)
-            QTimer.singleShot(1000, lambda: self._wait_rcon_ready_and_init())
+            print(f"[DEBUG] 歷史索引查詢失敗: {e}")
+            return None
+
+    # ========== 開機分析 ==========
+    def _on_boot_profiled(self, profile):
+        previous = self.boot_history.load(instance="")[:-1]
+        report = format_report(profile, previous)
+        self.ui.append_log(report)
+        log_info(report.replace("\n", "；"))
+        regressions = BootHistory.compare(profile, previous[-5:])
+        if regressions:
+            label, before, after = regressions[0]
+            notify("開機變慢", f"{label}：{before}s → {after}s")
+
+    def on_show_boot_report(self):
+        profiles = self.boot_history.load(instance="")
+        if not profiles:
+            self.ui.show_message("開機分析", "還沒有開機紀錄，下次由啟動器啟動伺服器後就會記錄。")
+            return
+        self.ui.show_message("開機分析", format_report(profiles[-1], profiles[:-1]))
+
+    # ========== A/B 效能測試 ==========
+    def on_run_benchmark(self):
+        if self.benchmark_worker and self.benchmark_worker.isRunning():
+            self.benchmark_worker.runner.cancel()
+            self.ui.append_log("[效能測試] 取消中，等待目前的伺服器停止…")
+            return
+        profiles = benchmark_profiles(self.config)
+        if not profiles:
+            self.ui.show_message("效能測試", (
+                "請在 launcher_config.json 的 benchmark_profiles 設定要比較的方案，例如：\n"
+                '[{"name": "G1 8G", "xmx": 8192, "jvm_profile": "g1"},\n'
+                ' {"name": "ZGC 8G", "xmx": 8192, "jvm_profile": "zgc"}]\n'
+                "未填的欄位沿用目前設定（java_path、xms、xmx、args…）。"))
+            return
+        copy_world = self.config.get("benchmark_copy_world", True)
+        if self.lifecycle.active and not copy_world:
+            self.ui.show_message("效能測試", "不複製測試世界時，請先停止伺服器。", "error")
+            return
+        if self.lifecycle.active:
+            self.ui.append_log("[效能測試] 伺服器執行中，會與測試伺服器競爭 CPU，結果僅供參考")
+        self.benchmark_worker = BenchmarkWorker(BenchmarkRunner(self.config, profiles))
+        self.benchmark_worker.progress.connect(lambda text: self.ui.append_log(f"[效能測試] {text}"))
+        self.benchmark_worker.finished_report.connect(self._on_benchmark_done)
+        self.benchmark_worker.start()
+        self.ui.ui.btn_benchmark.setText("取消測試")
+        log_info(f"效能測試開始：{'、'.join(name for name, _ in profiles)}")
+
+    def _on_benchmark_done(self, results):
+        self.ui.ui.btn_benchmark.setText("A/B 測試")
+        report = format_benchmark_report(results)
+        self.ui.append_log(report)
+        log_info(report.replace("\n", "；"))
+        self.ui.show_message("效能測試結果", report)
+
+    # 玩家名單同步 & UI 動態啟用（名單由核心輪詢，這裡只同步職位）
+    def _on_players(self, players):
+        if self.role_worker and self.role_worker.isRunning():
+            return
+        self.role_worker = RoleSyncWorker(players, self.role_mgr, self.role_source)
+        self.role_worker.done.connect(self._on_player_data_ready)
+        self.role_worker.start()
+
+    def _on_player_data_ready(self, player_list):
+        if not self.rcon_ready:
+            return
+        self.session_store.observe(player_list, role_lookup=self.role_mgr.get_role, uuid_lookup=self.uuid_for)
+        self.metrics_store.append("players", len(player_list))
+        self.ui.show_player_list(player_list, self.role_mgr.get_role)
+        self.ui.enable_player_features()
+
+    # 玩家批次管理
+    def on_bulk_player_action(self, action, names, reason="", role=None):
+        if not names:
+            return
+        if not self.rcon_ready and action != "role":
+            self.ui.show_message("RCON未連線", "請等伺服器完全啟動後再執行管理動作", "warn")
+            return
+        if self.bulk_worker and self.bulk_worker.isRunning():
+            self.ui.show_message("請稍候", "上一個批次操作尚未完成", "warn")
+            return
+        self.bulk_worker = BulkActionWorker(
+            self.rcon_mgr, self.role_mgr, self.role_source, action, list(names), reason, role, self.rcon_ready)
+        self.bulk_worker.progress.connect(self.ui.update_bulk_progress)
+        self.bulk_worker.finished_report.connect(self._on_bulk_action_done)
+        self.ui.begin_bulk_progress(action, len(names))
+        self.bulk_worker.start()
+
+    def _on_bulk_action_done(self, action, results):
+        ok = sum(1 for _, success, _ in results if success)
+        log_info(f"批次操作 {action}: 成功 {ok}/{len(results)}")
+        self.ui.append_log(f"批次操作 {action}：成功 {ok} / {len(results)}")
+        if action == "role":
+            self.ui.refresh_player_roles(self.role_mgr.get_role, [name for name, _, _ in results])
+        self.ui.show_bulk_report(action, results)
+
+    # 玩家詳細資料（世界存檔）
+    def uuid_for(self, name):
+        """由伺服器名單索引查 UUID（不經 RCON），查不到回傳 None"""
+        return self.server_lists.uuid_for(name) if self.server_lists else None
+
+    def resolve_uuid(self, name):
+        uuid = self.uuid_for(name)
+        if uuid:
+            return uuid
+        player = self.player_table.get(name)
+        if player and player.uuid:
+            return player.uuid
+        return offline_uuid(name)
+
+    def player_status_text(self, name):
+        return self.server_lists.describe(name) if self.server_lists else ""
+
+    def refresh_server_lists(self):
+        """增量重載 usercache / whitelist / ops / 封禁名單"""
+        if not self.server_lists:
+            return
+        changed = self.server_lists.refresh()
+        if "usercache" in changed:
+            self.ui.add_known_players(self.server_lists.known_players())
+
+    def request_player_stats(self, name):
+        """
+        回傳快取中仍有效的玩家資料；若需重新解析則回傳 None 並在背景載入，
+        完成後呼叫 ui.update_player_stats(name, stats)。
+        """
+        if not self.stats_loader:
+            return {}
+        uuid = self.resolve_uuid(name)
+        cached = self.stats_loader.peek(uuid)
+        if cached is not None:
+            return cached
+        if name not in self.stats_workers:
+            worker = PlayerStatsWorker(self.stats_loader, name, uuid)
+            worker.stats_ready.connect(self._on_player_stats_ready)
+            self.stats_workers[name] = worker
+            worker.start()
+        return None
+
+    def _on_player_stats_ready(self, name, stats):
+        worker = self.stats_workers.pop(name, None)
+        if worker:
+            worker.wait()
+        self.ui.update_player_stats(name, stats)
+
+    def on_compact_sessions(self):
+        try:
+            kept = self.session_store.compact()
+            log_info(f"遊玩紀錄壓縮完成，保留 {kept} 筆事件")
+        except Exception as e:
+            log_error(f"遊玩紀錄壓縮失敗: {e}")
 
     # 插件管理（列表）
     def reload_plugins_list(self):
@@ -425,7 +825,7 @@ class ServerController:
                 self.ui.show_message("插件熱重載", f"重載失敗：{resp}", "error")
         except Exception as e:
             self.ui.show_message("RCON失敗", str(e), "error")
-            self.rcon_ready = False
+            self.core.rcon_lost()
 
     def on_plugin_enable(self):
         if not self.rcon_ready:
@@ -441,7 +841,7 @@ class ServerController:
             self.ui.show_message("啟用結果", resp)
         except Exception as e:
             self.ui.show_message("RCON失敗", str(e), "error")
-            self.rcon_ready = False
+            self.core.rcon_lost()
 
     def on_plugin_disable(self):
         if not self.rcon_ready:
@@ -457,32 +857,17 @@ class ServerController:
             self.ui.show_message("停用結果", resp)
         except Exception as e:
             self.ui.show_message("RCON失敗", str(e), "error")
-            self.rcon_ready = False      
+            self.core.rcon_lost()
 
     def update_plugman_status(self):
         available = False
         if self.rcon_ready and self.rcon_mgr:
-            try:
-                available = self.rcon_mgr.is_plugman_available()
-            except Exception as e:
-                available = False
+            available = self.rcon_mgr.check_plugman_available()     # 失敗時回傳 False
         self.ui.set_plugman_status(available)
 
     def on_check_plugin_updates(self):
         self.ui.show_message("尚未實作", "插件更新查詢功能暫未開放", "warn")
 
-    def on_manual_backup(self):
-        if not self.backup_mgr:
-            self.ui.show_message("錯誤", "請先設定世界資料夾與備份路徑", "error")
-            return
-        try:
-            path = self.backup_mgr.create_backup()
-            self.ui.append_log(f"備份完成: {os.path.basename(path)}")
-            self.ui.show_message("備份完成", f"已備份 {os.path.basename(path)}")
-        except Exception as e:
-            log_error(f"備份失敗: {e}")
-            notify("備份失敗", str(e))
-            self.ui.show_message("備份失敗", str(e), "error")
 
     # 檔案/資料夾選擇 UI
     def on_select_core_path(self):
@@ -514,6 +899,50 @@ class ServerController:
             self.ui.ui.edit_backup_dir.setText(folder)
             self._update_managers()
 
+    # 啟動指令預覽
+    def _launch_settings(self):
+        return {
+            "java_path": self.ui.ui.edit_java_path.text(),
+            "core_path": self.ui.ui.edit_core_path.text(),
+            "xms": self.ui.ui.spin_xms.value(),
+            "xmx": self.ui.ui.spin_xmx.value(),
+            "args": self.ui.ui.edit_args.text(),
+            "jvm_profile": self.ui.ui.combo_jvm_profile.currentData() or "manual",
+            "large_pages": self.ui.ui.combo_large_pages.currentData() or "auto",
+            "jvm_pretouch": self.config.get("jvm_pretouch", True),
+        }
+
+    def on_preview_launch_cmd(self, *_):
+        """依目前設定即時顯示完整啟動指令與參數衝突；Java 版本未知時先在背景查詢"""
+        cfg = self._launch_settings()
+        java = cfg["java_path"] or "java"
+        java_major = cached_java_version(java)
+        if java_major is False:
+            if self.java_probe is None or not self.java_probe.isRunning():
+                self.java_probe = JavaProbeWorker(java)
+                self.java_probe.done.connect(self._on_java_probed)
+                self.java_probe.start()
+            java_major = None
+        cmd = build_launch_command(cfg, java_major=java_major or 0)
+        jvm_part = cmd[1:cmd.index("-jar")]
+        problems = validate(jvm_part, java_major, self.host_info)
+        if java_major is not None:      # 偵測中先不提示，查到版本後會重新預覽
+            fallback = gc_fallback_warning(cfg["jvm_profile"], java_major)
+            if fallback:
+                problems.insert(0, ("warn", fallback))
+        self.ui.ui.lbl_launch_preview.setText(subprocess.list2cmdline(cmd))
+        host = self.host_info
+        head = (f"主機 {host['ram_mb'] // 1024} GB / {host['cores']} 核心，建議 Xms = Xmx = {suggest_heap_mb(host)} MB，"
+                + (f"Java {java_major}" if java_major else "Java 版本偵測中…" if java_major is None else "無法取得 Java 版本"))
+        lines = [head] + [("❌ " if level == "error" else "⚠ ") + msg for level, msg in problems]
+        self.ui.ui.lbl_launch_warnings.setText("\n".join(lines))
+        color = "#ff5555" if any(level == "error" for level, _ in problems) else "#ffb86c" if problems else "#7a8a80"
+        self.ui.ui.lbl_launch_warnings.setStyleSheet(f"color: {color};")
+
+    def _on_java_probed(self, java_path, major):
+        print(f"[DEBUG] Java 版本: {java_path} -> {major or '未知'}")
+        self.on_preview_launch_cmd()
+
     # 其餘事件 placeholder
     def on_tab_changed(self, idx): pass
     def on_change_language(self, idx): pass
@@ -521,33 +950,61 @@ class ServerController:
     def on_validate_core_path(self): pass
     def on_validate_java_path(self): pass
     def on_validate_port(self): pass
-    def on_preview_launch_cmd(self): pass
 
     def on_send_command(self):
-        if not self.server_running or not self.server_process or self.server_process.poll() is not None:
+        if not self.server_running:
             self.ui.show_message("錯誤", "伺服器未啟動，無法發送指令。", "error")
             return
         cmd = self.ui.ui.edit_command.text().strip()
-        if cmd:
-            try:
-                self.server_process.stdin.write(cmd + "\n")
-                self.server_process.stdin.flush()
-                self.ui.append_log(f"> {cmd}")
-                self.ui.ui.edit_command.clear()
-            except Exception as e:
+        if not cmd:
+            return
+        try:
+            # 附加模式沒有 stdin，核心改在背景走 RCON，回應以訊息事件送回
+            self.core.command(cmd)
+            self.ui.append_log(f"> {cmd}")
+            self.ui.ui.edit_command.clear()
+        except Exception as e:
+            if self.attached:
+                self.ui.show_message("錯誤", str(e), "error")
+            else:
                 self.ui.append_log(f"指令發送失敗：{e}", is_error=True)
 
-    def on_update_status(self):
+    def _on_status_tick(self):
+        self._record_metrics()
+        self.on_update_status()
+
+    def _record_metrics(self):
         try:
-            now = QDateTime.currentDateTime()
             cpu = psutil.cpu_percent()
             ram = psutil.virtual_memory().percent
+            self._host_usage = (cpu, ram)
+            self.process_sampler.set_pid(self.core.pid)
+            server = self.process_sampler.latest
+            self.metrics_store.append_many({
+                "host_cpu": cpu,
+                "host_ram": ram,
+                "rcon": 1 if self.rcon_ready else 0,
+                "server_cpu": server.cpu if server else None,
+                "server_rss_mb": server.rss_mb if server else None,
+                "server_threads": server.threads if server else None,
+                "server_read_bps": server.read_bps if server else None,
+                "server_write_bps": server.write_bps if server else None,
+            })
+        except Exception as e:
+            print(f"[DEBUG] 指標取樣失敗: {e}")
+
+    def on_update_status(self):
+        try:
+            self.refresh_server_lists()
+            now = QDateTime.currentDateTime()
+            cpu, ram = self._host_usage
+            server = self.process_sampler.latest
             if hasattr(self.ui, "label_time"):
                 self.ui.label_time.setText(f"系統時間：{now.toString('yyyy/MM/dd HH:mm:ss')}")
-            if hasattr(self.ui, "label_cpu"):
-                self.ui.label_cpu.setText(f"CPU：{cpu}%")
-            if hasattr(self.ui, "label_ram"):
-                self.ui.label_ram.setText(f"RAM：{ram}%")
+            if hasattr(self.ui, "label_cpu") and cpu is not None:
+                self.ui.label_cpu.setText(f"CPU：{cpu}%" + (f"｜伺服器 {server.cpu}%" if server else ""))
+            if hasattr(self.ui, "label_ram") and ram is not None:
+                self.ui.label_ram.setText(f"RAM：{ram}%" + (f"｜伺服器 {server.rss_mb:.0f} MB" if server else ""))
             if hasattr(self.ui, "label_rcon"):
                 self.ui.label_rcon.setText("RCON：已連線" if self.rcon_ready else "RCON：未連線")
             if self.rcon_ready:
@@ -556,46 +1013,99 @@ class ServerController:
             else:
                 self.ui.disable_player_features()
                 self.ui.disable_plugin_features()
-            if self.server_process:
-                running = self.server_process.poll() is None
-            else:
-                running = False
-            # self.server_running 內部變數同步
-            if self.server_running != running:
-                self.server_running = running
-                print(f"[DEBUG] server_running 狀態修正: {running}")
-
-                # 主動同步按鈕狀態
-                self.update_server_button_status()
+            self.update_server_button_status()
         except Exception as e:
             print(f"[DEBUG] 狀態列更新失敗: {e}")
             log_error(f"狀態列更新失敗: {e}")
 
+    # ========== TPS / MSPT ==========
+    def _on_tps_polled(self, sample, events):
+        """核心在背景查詢並記錄（含桌面通知），這裡只更新圖表資料與狀態列"""
+        if sample:
+            self.metrics_store.append_many({"tps": sample.get("tps"), "mspt": sample.get("mspt"),
+                                            "mspt_max": sample.get("mspt_max")})
+        if hasattr(self.ui, "label_tps"):
+            self.ui.label_tps.setText(self.tps_monitor.summary())
+        for name, change, text in events:
+            self.ui.append_log(f"[TPS] {text}", is_error=(change == "alert"))
 
     def update_server_button_status(self):
+        stopping = self.lifecycle.state == STOPPING
+        self.ui.ui.btn_stop.setText("強制停止" if stopping else "停止伺服器")
         if self.server_running:
             self.ui.ui.btn_start.setEnabled(False)
             self.ui.ui.btn_stop.setEnabled(True)
-            self.ui.ui.btn_restart.setEnabled(True)
+            self.ui.ui.btn_restart.setEnabled(not self.attached and not stopping)
+            self.ui.ui.btn_attach.setEnabled(False)
         else:
-            self.ui.ui.btn_start.setEnabled(True)
+            self.ui.ui.btn_start.setEnabled(not self.lifecycle.active)
             self.ui.ui.btn_stop.setEnabled(False)
             self.ui.ui.btn_restart.setEnabled(False)
+            self.ui.ui.btn_attach.setEnabled(not self.lifecycle.active)
+
+    # ========== 多實例 ==========
+    def on_instance_action(self, name, action):
+        """儀表板上的啟動/停止/重啟/備份，全部非同步"""
+        try:
+            core = self.instances.get(name)
+            ok, message = {"start": core.start, "stop": core.stop,
+                           "restart": core.restart, "backup": core.backup}[action]()
+        except Exception as e:
+            print(f"[DEBUG] on_instance_action exception: {e}")
+            self.ui.show_message("錯誤", f"{name}：{e}", "error")
+            return
+        if not ok:
+            self.ui.show_message("提示", f"{name}：{message}")
+        else:
+            log_info(f"[{name}] {message}")
+
+    def on_instance_command(self, name, text):
+        try:
+            self.instances.get(name).command(text)
+        except Exception as e:
+            self.ui.show_message("錯誤", f"{name}：{e}", "error")
+
+    def _run_background(self):
+        self.instances.run_background()
+        if not self.core.running:
+            # 沒有接回伺服器：上次關閉時仍在線的 session 以最後寫入時間結束；接回時則等玩家名單核對
+            self.session_store.close_all()
 
     def on_exit(self):
         try:
-            if self.server_running:
-                self.on_stop_server()
-            self.player_timer.stop()
+            # 伺服器繼續執行（監管或附加模式）時保留進行中的 session，下次接回後依線上名單核對
+            keep_sessions = self.attached or self.supervised
+            if self.attached:
+                self.core.detach()      # 關閉啟動器不應停止附加的伺服器
+            elif self.supervised:
+                # 伺服器由監管程序持有，只中斷連線，下次開啟啟動器會自動接回
+                log_info("啟動器關閉，伺服器繼續由監管程序執行")
             self.status_timer.stop()
-            if self.player_worker and self.player_worker.isRunning():
-                self.player_worker.quit()
-                self.player_worker.wait()
-            if self.log_reader and self.log_reader.isRunning():
-                self.log_reader.terminate()
-            if self.rcon_mgr:
-                self.rcon_mgr.disconnect()
-            self.rcon_ready = False
+            self.process_sampler.stop()
+            self.metrics_store.close()
+            self.compact_timer.stop()
+            if keep_sessions:
+                self.session_store.save_snapshot()
+            else:
+                self.session_store.close_all()
+            # 直接啟動的伺服器不能留下：照一般流程停止，有整體時限，不會無限等待
+            self.instances.shutdown()
+            self.log_flush_timer.stop()
+            if self.benchmark_worker and self.benchmark_worker.isRunning():
+                self.benchmark_worker.runner.cancel()
+                self.benchmark_worker.wait()
+            if self.role_worker and self.role_worker.isRunning():
+                self.role_worker.wait(3000)
+            if self.bulk_worker and self.bulk_worker.isRunning():
+                self.bulk_worker.wait(5000)
+            if self.search_worker and self.search_worker.isRunning():
+                self.search_worker.wait()
+            if self.history_worker and self.history_worker.isRunning():
+                self.history_worker.requestInterruption()
+                self.history_worker.wait()
+            self._flush_console()
+            self.console_archive.stop()
+            self.launcher_archive.stop()
         except Exception as e:
             print(f"[DEBUG] 程式結束清理異常: {e}")
             log_error(f"程式結束清理異常: {e}")
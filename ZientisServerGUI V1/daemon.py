@@ -0,0 +1,301 @@
+"""
+無介面（headless）模式：不載入 Qt，以本機 HTTP/JSON API 控制伺服器。
+
+用法：python daemon.py [--host 127.0.0.1] [--port 8765] [--token 密鑰]
+
+GET  /status /players /plugins /backups /metrics
+GET  /logs?since=<seq>&limit=<n>           since 為負數代表最後 n 行
+GET  /logs/search?q=&level=WARN&regex=1
+GET  /boots?limit=20                      開機時間軸與比較報告
+GET  /tps?limit=100                        TPS/MSPT 歷史、查詢方式與警示狀態
+POST /start /stop /restart /backup         非同步，回傳 202
+POST /command          {"command": "say hi"}
+POST /plugins/<reload|enable|disable>  {"name": "Essentials"}
+
+多實例（設定檔的 "instances"）：GET /instances 取得所有實例與彙總，
+其餘路徑加上 /instances/<名稱> 前綴即操作該實例，例如 POST /instances/lobby/start；
+不加前綴時操作第一台。
+
+設定 token（參數或 launcher_config.json 的 daemon_token）後，請求需帶 Authorization: Bearer <token>。
+POST 一律需要 Content-Type: application/json；帶有非本機 Origin 的請求、
+以及只聽本機時 Host 不是本機名稱的請求都會被拒絕（防止網頁跨站請求與 DNS rebinding）。
+"""
+import sys
+import json
+import signal
+import secrets
+import argparse
+import threading
+import ipaddress
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from model.config import ConfigManager
+from model.instance_manager import InstanceManager
+from model.boot_profiler import format_report
+from utils.logger import setup_logger, log_info
+
+MAX_BODY = 64 * 1024
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _host_name(value):
+    """Host 標頭或 Origin 的主機部分（去掉埠號與 IPv6 的中括號），小寫"""
+    value = (value or "").strip().lower()
+    if value.startswith("["):
+        return value[1:].partition("]")[0]
+    return value.rpartition(":")[0] if value.count(":") == 1 else value
+
+
+def _is_local(name):
+    if name == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(name).is_loopback
+    except ValueError:
+        return False
+
+
+def make_handler(manager, token, local_only=True):
+    """
+    建立綁定 InstanceManager 的請求處理類別；每個連線在自己的執行緒，動作都不會等伺服器。
+    local_only：只聽本機時檢查 Host 標頭，擋下 DNS rebinding。
+    """
+
+    def resolve(path):
+        """拆出 /instances/<名稱> 前綴，回傳 (ServerCore, 剩餘路徑)"""
+        if path.startswith("/instances/"):
+            name, _, rest = path[len("/instances/"):].partition("/")
+            try:
+                return manager.get(name), "/" + rest if rest else "/"
+            except KeyError:
+                raise ApiError(404, f"找不到實例：{name}")
+        if manager.default is None:
+            raise ApiError(404, "尚未設定任何伺服器")
+        return manager.default, path
+
+    def list_instances():
+        rows = manager.snapshot()
+        return 200, {"instances": rows, "totals": manager.totals(rows)}
+
+    def accepted(result):
+        ok, message = result
+        if not ok:
+            raise ApiError(409, message)
+        return 202, {"ok": True, "message": message}
+
+    def get_logs(core, query):
+        since = int(query.get("since", "-200"))
+        limit = min(int(query.get("limit", "1000")), 10000)
+        lines = core.log_index.lines_since(since, limit)
+        if lines:
+            next_seq = lines[-1][0] + 1
+        else:
+            next_seq = since if since >= 0 else core.log_index.next_seq
+        return 200, {"next": next_seq,
+                     "lines": [{"seq": s, "level": lv, "raw": raw} for s, lv, raw in lines]}
+
+    def search_logs(core, query):
+        results = core.log_index.search(
+            query.get("q", ""), min_level=query.get("level") or None,
+            regex=query.get("regex") in ("1", "true"), limit=min(int(query.get("limit", "500")), 5000))
+        return 200, {"results": [{"seq": s, "level": lv, "raw": raw} for s, lv, raw in results]}
+
+    def get_boots(core, query):
+        history = core.boot_profiler.history
+        profiles = history.load(limit=min(int(query.get("limit", "20")), 200), instance=core.name)
+        report = format_report(profiles[-1], profiles[:-1]) if profiles else ""
+        return 200, {"report": report, "profiles": profiles}
+
+    def get_tps(core, query):
+        monitor = core.tps_monitor
+        limit = min(int(query.get("limit", "100")), monitor.history.maxlen)
+        return 200, {
+            "latest": monitor.latest,
+            "method": monitor.method,
+            "interval": monitor.interval,
+            "alerts": {name: t.active for name, t in monitor.thresholds.items()},
+            "history": list(monitor.history)[-limit:],
+        }
+
+    def post_command(core, body):
+        line = str(body.get("command", "")).strip()
+        if not line:
+            raise ApiError(400, "缺少 command")
+        try:
+            core.command(line)
+        except RuntimeError as e:
+            raise ApiError(409, str(e))
+        return 202, {"ok": True}
+
+    def post_plugin(core, action, body):
+        name = str(body.get("name", "")).strip()
+        if not name:
+            raise ApiError(400, "缺少 name")
+        try:
+            return 200, {"ok": True, "result": core.plugin_action(action, name)}
+        except ValueError as e:
+            raise ApiError(404, str(e))
+        except RuntimeError as e:
+            raise ApiError(409, str(e))
+
+    get_routes = {
+        "/status": lambda core, q: (200, core.status()),
+        "/players": lambda core, q: (200, {"players": list(core.players), "rcon": core.rcon_ready}),
+        "/plugins": lambda core, q: (200, {"plugins": core.list_plugins()}),
+        "/backups": lambda core, q: (200, {"backups": core.list_backups(), "running": core.backup_running,
+                                           "last": core.last_backup}),
+        "/metrics": lambda core, q: (200, core.metrics()),
+        "/logs": get_logs,
+        "/logs/search": search_logs,
+        "/boots": get_boots,
+        "/tps": get_tps,
+    }
+    post_routes = {
+        "/start": lambda core, b: accepted(core.start()),
+        "/stop": lambda core, b: accepted(core.stop()),
+        "/restart": lambda core, b: accepted(core.restart()),
+        "/backup": lambda core, b: accepted(core.backup()),
+        "/command": post_command,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "ZientisDaemon"
+
+        def log_message(self, fmt, *args):
+            print(f"[DEBUG] {self.address_string()} {fmt % args}")
+
+        def _reply(self, status, data):
+            body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self):
+            if not token:
+                return True
+            given = self.headers.get("Authorization", "")
+            return secrets.compare_digest(given, f"Bearer {token}")
+
+        def _check_origin(self, method):
+            """瀏覽器送出的跨站請求會帶 Origin、簡單請求只能用 text/plain 等類型，據此擋下"""
+            origin = self.headers.get("Origin")
+            if origin is not None and not _is_local(_host_name(urlsplit(origin).netloc)):
+                raise ApiError(403, "不接受跨站請求")
+            if local_only and not _is_local(_host_name(self.headers.get("Host"))):
+                raise ApiError(403, "Host 不是本機")
+            if method == "POST":
+                ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+                if ctype != "application/json":
+                    raise ApiError(415, "POST 需要 Content-Type: application/json")
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                raise ApiError(413, "內容過大")
+            if not length:
+                return {}
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                raise ApiError(400, "JSON 格式錯誤")
+            if not isinstance(body, dict):
+                raise ApiError(400, "JSON 需為物件")
+            return body
+
+        def _dispatch(self, method):
+            url = urlsplit(self.path)
+            path = url.path.rstrip("/") or "/"
+            try:
+                self._check_origin(method)
+                if not self._authorized():
+                    raise ApiError(401, "未授權")
+                if method == "GET" and path == "/instances":
+                    status, data = list_instances()
+                elif method == "GET":
+                    core, path = resolve(path)
+                    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    route = get_routes.get(path)
+                    if route is None:
+                        raise ApiError(404, "找不到路徑")
+                    status, data = route(core, query)
+                else:
+                    core, path = resolve(path)
+                    body = self._read_body()
+                    if path.startswith("/plugins/"):
+                        status, data = post_plugin(core, path[len("/plugins/"):], body)
+                    else:
+                        route = post_routes.get(path)
+                        if route is None:
+                            raise ApiError(404, "找不到路徑")
+                        status, data = route(core, body)
+            except ApiError as e:
+                status, data = e.status, {"ok": False, "error": str(e)}
+                if method == "POST":
+                    self.close_connection = True    # 被拒絕時可能還沒讀取內容，不能沿用這條連線
+            except ValueError as e:
+                status, data = 400, {"ok": False, "error": str(e)}
+            except Exception as e:
+                print(f"[DEBUG] API {method} {path} exception: {e}")
+                status, data = 500, {"ok": False, "error": str(e)}
+            self._reply(status, data)
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zientis 無介面模式")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", default=None, help="API 密鑰（預設讀取設定的 daemon_token）")
+    args = parser.parse_args(argv)
+
+    config = ConfigManager().load()
+    setup_logger()
+    token = args.token if args.token is not None else config.get("daemon_token", "")
+    local_only = args.host in LOCAL_HOSTS
+    if not local_only and not token:
+        print("對外開放時必須設定 --token", file=sys.stderr)
+        return 2
+
+    manager = InstanceManager(config)
+    manager.run_background()
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(manager, token, local_only))
+    httpd.daemon_threads = True
+    log_info(f"daemon 已啟動: http://{args.host}:{httpd.server_address[1]}")
+    print(f"[DEBUG] daemon listening on {args.host}:{httpd.server_address[1]}")
+
+    def on_signal(signum, frame):
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+    for name in ("SIGINT", "SIGTERM"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), on_signal)
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+        manager.shutdown()   # 監管模式下伺服器繼續執行，下次啟動 daemon 會自動接回
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--supervisor"]:
+        # 打包後由 launch_supervisor 以本執行檔啟動監管程序
+        import supervisor
+        sys.exit(supervisor.main(sys.argv[2:]))
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from ui.launcher_ui import ZientisLauncherUI
 
@@ -8,6 +9,11 @@ def my_excepthook(exctype, value, traceback):
 sys.excepthook = my_excepthook
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()   # 打包後歷史日誌索引的子程序需要
+    if sys.argv[1:2] == ["--supervisor"]:
+        # 打包後由 launch_supervisor 以本執行檔啟動監管程序
+        import supervisor
+        sys.exit(supervisor.main(sys.argv[2:]))
     app = QApplication(sys.argv)
     window = ZientisLauncherUI()
     window.show()
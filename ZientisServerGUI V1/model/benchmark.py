@@ -0,0 +1,281 @@
+import os
+import re
+import json
+import time
+import shutil
+import secrets
+import threading
+from statistics import mean, median
+
+from model.server_core import ServerCore
+from model.server_lifecycle import RUNNING, STOPPED, CRASHED
+from utils.jvm_flags import java_version
+from utils.logger import log_info, log_error
+
+# 指標：(鍵, 名稱, 越大越好)
+METRICS = [
+    ("boot", "開機秒數", False),
+    ("mspt_avg", "MSPT 平均", False),
+    ("mspt_max", "MSPT 最大", False),
+    ("tps", "TPS", True),
+    ("rss_mb", "記憶體 MB", False),
+    ("gc_count", "GC 暫停次數", False),
+    ("gc_total_ms", "GC 暫停總計 ms", False),
+    ("gc_max_ms", "最長 GC 暫停 ms", False),
+    ("lag_events", "延遲警告", False),
+]
+# 每個方案可以覆寫的欄位（其餘沿用主設定）
+PROFILE_KEYS = ("java_path", "xms", "xmx", "args", "jvm_profile", "large_pages", "jvm_pretouch", "core_path")
+# 複製測試資料夾時略過（日誌、當機報告、世界鎖）
+_COPY_IGNORE = shutil.ignore_patterns("logs", "crash-reports", "session.lock", "*.log.gz", "debug")
+
+
+def benchmark_profiles(config):
+    """由 benchmark_profiles 產生 [(名稱, 設定)]；每個方案繼承主設定，只覆寫 PROFILE_KEYS 中的欄位"""
+    result = []
+    for i, entry in enumerate(config.get("benchmark_profiles", [])):
+        name = str(entry.get("name") or f"profile{i + 1}")
+        result.append((name, {**config, **{k: v for k, v in entry.items() if k in PROFILE_KEYS}}))
+    return result
+
+
+def set_properties(path, values):
+    """改寫 server.properties 中的欄位，沒有的欄位附加在最後"""
+    lines = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    pending = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if not line.startswith("#") and key in pending:
+            lines[i] = f"{key}={pending.pop(key)}"
+    lines += [f"{k}={v}" for k, v in pending.items()]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+class BenchmarkRunner:
+    """
+    A/B 測試啟動方案：每個方案依序開機 runs 次，量測開機時間，預熱後在穩定期間
+    取樣 MSPT/TPS（RCON）與 RSS，並從 -Xlog:gc 輸出統計 GC 暫停，最後停止伺服器。
+    copy_world 時每次都從原始資料夾複製一份測試用資料夾（另用 benchmark_port），
+    每次都從相同的世界狀態開始，也不會動到正式世界。
+    run() 會執行很久，請在背景執行緒呼叫；cancel() 會在下一個檢查點停止目前的伺服器並結束。
+    """
+    def __init__(self, config, profiles=None, progress=None, results_path="benchmark_results.jsonl"):
+        self.config = config
+        self.profiles = profiles if profiles is not None else benchmark_profiles(config)
+        self.progress = progress or (lambda text: None)
+        self.results_path = results_path
+        self.runs = int(config.get("benchmark_runs", 2))
+        self.warmup = float(config.get("benchmark_warmup", 60))
+        self.duration = float(config.get("benchmark_duration", 180))
+        self.sample_interval = float(config.get("benchmark_sample_interval", 5))
+        self.boot_timeout = float(config.get("benchmark_boot_timeout", 600))
+        self.copy_world = bool(config.get("benchmark_copy_world", True))
+        self.work_root = config.get("benchmark_dir", "benchmark_runs")
+        self._cancel = threading.Event()
+        self.results = []
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        """依序執行所有方案，回傳每次執行的結果 dict list"""
+        session = time.strftime("%Y%m%d-%H%M%S")
+        # 方案交錯執行（A B A B），降低主機狀態隨時間變化造成的偏差
+        plan = [(run_no, name, cfg) for run_no in range(1, self.runs + 1) for name, cfg in self.profiles]
+        for n, (run_no, name, cfg) in enumerate(plan, 1):
+            if self.cancelled:
+                break
+            self.progress(f"({n}/{len(plan)}) {name} 第 {run_no} 次")
+            try:
+                result = self._run_one(name, cfg, run_no, session)
+            except Exception as e:
+                log_error(f"效能測試 {name} 失敗: {e}")
+                result = {"error": str(e)}
+            result.update(profile=name, run=run_no, session=session)
+            self.results.append(result)
+            self._save(result)
+        if self.copy_world and not self.config.get("benchmark_keep_runs", False):
+            shutil.rmtree(os.path.join(self.work_root, session), ignore_errors=True)
+        return self.results
+
+    def _save(self, result):
+        try:
+            with open(self.results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[DEBUG] 無法寫入效能測試結果: {e}")
+
+    # ========== 單次執行 ==========
+    def _prepare(self, name, cfg, run_no, session):
+        cfg = dict(cfg, use_supervisor=False, restart_on_crash=False, triggers=[], world="",
+                   console_index_lines=50_000, boot_label=f"benchmark {name}")
+        if not self.copy_world:
+            return cfg, None
+        src = cfg.get("folder", "")
+        if not os.path.isdir(src):
+            raise FileNotFoundError(f"找不到伺服器資料夾：{src}")
+        safe = re.sub(r"[^\w.-]+", "_", name)
+        workdir = os.path.abspath(os.path.join(self.work_root, session, f"{safe}-{run_no}"))
+        self.progress(f"複製測試資料夾：{workdir}")
+        shutil.copytree(src, workdir, ignore=_COPY_IGNORE)
+        core_path = cfg.get("core_path", "")
+        if core_path and not os.path.isabs(core_path):
+            cfg["core_path"] = os.path.join(os.path.abspath(src), core_path)
+        rcon_pass = secrets.token_hex(8)
+        rcon_port = int(self.config.get("benchmark_rcon_port", 25576))
+        set_properties(os.path.join(workdir, "server.properties"), {
+            "server-port": int(self.config.get("benchmark_port", 25566)),
+            "enable-rcon": "true",
+            "rcon.port": rcon_port,
+            "rcon.password": rcon_pass,
+        })
+        cfg.update(folder=workdir, rcon_host="127.0.0.1", rcon_port=rcon_port, rcon_pass=rcon_pass)
+        return cfg, workdir
+
+    def _run_one(self, name, cfg, run_no, session):
+        cfg, workdir = self._prepare(name, cfg, run_no, session)
+        # 讓 JVM 把 GC 暫停寫到主控台，由 LagTracker 解析（Java 8 沒有 -Xlog）；
+        # 只開 gc 標籤，每次 GC 一行，不加 gc+phases 免得輸出本身影響量測
+        if (java_version(cfg.get("java_path")) or 0) >= 9:
+            cfg["args"] = f"{cfg.get('args', '')} -Xlog:gc:stdout".strip()
+        core = ServerCore(cfg, name=f"benchmark:{name}")
+        core.boot_profiler.history = None       # 不寫入一般的開機紀錄
+        try:
+            return self._measure(core)
+        finally:
+            self._shutdown(core)
+            if workdir and not self.config.get("benchmark_keep_runs", False):
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    def _wait(self, core, seconds, until=None):
+        """持續推進 core 直到經過 seconds 秒或 until() 成立；伺服器結束或取消時回傳 False"""
+        end = time.time() + seconds
+        while time.time() < end:
+            core.tick()
+            if core.state in (STOPPED, CRASHED) or self.cancelled:
+                return False
+            if until is not None and until():
+                return True
+            time.sleep(0.2)
+        return until is None
+
+    def _measure(self, core):
+        t0 = time.time()
+        ok, msg = core.start()
+        if not ok:
+            raise RuntimeError(msg)
+        if not self._wait(core, self.boot_timeout, until=lambda: core.state == RUNNING):
+            self._abort(core, core.last_error or "開機失敗或逾時")
+        profile = core.boot_profiler.last_profile
+        result = {"boot": profile["total"] if profile else round(time.time() - t0, 3),
+                  "boot_phases": profile["phases"] if profile else {}}
+        self.progress(f"開機完成 {result['boot']:.1f} 秒，預熱 {self.warmup:.0f} 秒")
+        if not self._wait(core, self.warmup):
+            self._abort(core, "預熱期間伺服器結束")
+
+        start = time.time()
+        mspt, mspt_max, tps, rss = [], [], [], []
+        rcon_error = None
+        while time.time() - start < self.duration:
+            try:
+                m = core.rcon_mgr.get_mspt()
+                if m:
+                    mspt.append(m["avg"])
+                    mspt_max.append(m.get("max", m.get("p99", m["avg"])))
+                t = core.rcon_mgr.get_tps()
+                if t:
+                    tps.append(t[0])
+            except Exception as e:
+                if rcon_error is None:
+                    log_error(f"效能測試 {core.name} RCON 取樣失敗: {e}")
+                rcon_error = e
+            sample = core.metrics().get("process_rss_mb")
+            if sample:
+                rss.append(sample)
+            if not self._wait(core, self.sample_interval):
+                self._abort(core, "量測期間伺服器結束")
+        end = time.time()
+        if not mspt and not tps:
+            # 沒有任何取樣時結果沒有意義，不能以 None 當成成功的一次
+            reason = f"RCON 錯誤：{rcon_error}" if rcon_error else "伺服器不支援 mspt / tps / tick query 指令"
+            raise RuntimeError(f"量測期間沒有取得任何 MSPT/TPS 取樣（{reason}）")
+
+        events = [e for e in core.lag_tracker.events if start <= e.t <= end]
+        gc = [e.ms for e in events if e.kind == "gc"]
+        result.update(
+            mspt_avg=round(mean(mspt), 2) if mspt else None,
+            mspt_max=round(max(mspt_max), 2) if mspt_max else None,
+            tps=round(mean(tps), 2) if tps else None,
+            rss_mb=round(max(rss), 1) if rss else None,
+            gc_count=len(gc),
+            gc_total_ms=sum(gc),
+            gc_max_ms=max(gc, default=0),
+            lag_events=sum(1 for e in events if e.kind in ("lag", "watchdog")),
+            samples=len(mspt),
+        )
+        log_info(f"效能測試 {core.name}: {result}")
+        return result
+
+    def _abort(self, core, reason):
+        raise RuntimeError("已取消" if self.cancelled else f"{reason}（{core.lifecycle.describe()}）")
+
+    def _shutdown(self, core):
+        """照一般流程停止（寬限時間、強制結束都由生命週期處理）"""
+        if core.running:
+            core.stop()
+            while core.lifecycle.active:
+                core.tick()
+                time.sleep(0.2)
+        core.shutdown()
+
+
+# ========== 報告 ==========
+def summarize(results):
+    """依方案彙總（多次執行取中位數），回傳 {方案: {指標: 值}}，保留方案順序"""
+    summary = {}
+    for r in results:
+        summary.setdefault(r["profile"], [])
+        if not r.get("error"):
+            summary[r["profile"]].append(r)
+    table = {}
+    for name, runs in summary.items():
+        row = {"runs": len(runs)}
+        for key, _, _ in METRICS:
+            values = [r[key] for r in runs if r.get(key) is not None]
+            row[key] = round(median(values), 2) if values else None
+        table[name] = row
+    return table
+
+
+def format_report(results):
+    """純文字比較表：第一個方案為基準，其餘顯示差異百分比，各指標最佳者標 ★"""
+    table = summarize(results)
+    if not table:
+        return "沒有效能測試結果"
+    names = list(table)
+    base = table[names[0]]
+    lines = [f"基準：{names[0]}"]
+    for name in names:
+        row = table[name]
+        errors = [r["error"] for r in results if r["profile"] == name and r.get("error")]
+        lines.append("")
+        lines.append(f"【{name}】成功 {row['runs']} 次" + (f"，失敗 {len(errors)} 次（{errors[-1]}）" if errors else ""))
+        for key, label, higher in METRICS:
+            value = row[key]
+            if value is None:
+                continue
+            candidates = [table[n][key] for n in names if table[n][key] is not None]
+            best = max(candidates) if higher else min(candidates)
+            text = f"  {label}：{value:g}" + (" ★" if len(set(candidates)) > 1 and value == best else "")
+            if name != names[0] and base[key]:
+                text += f"（{(value - base[key]) / base[key] * 100:+.0f}%）"
+            lines.append(text)
+    return "\n".join(lines)
@@ -0,0 +1,220 @@
+import os
+import re
+import json
+import time
+from statistics import median
+
+# 開機各階段的分界行（依出現順序切段，每段持續到下一個分界行）
+_LIBRARIES_RE = re.compile(r"Loading libraries|Downloading (?:libraries|mojang)|Applying patches|Environment: ")
+_SERVER_START_RE = re.compile(r"Starting minecraft server version (\S+)")
+_PLUGIN_RE = re.compile(r"^\[([^\]]+)\] (Loading|Enabling) (?:server plugin )?(\S+) v(\S+)")
+_LEVEL_RE = re.compile(r'Preparing level "([^"]+)"')
+_DIMENSION_RE = re.compile(r"Preparing start region for (?:dimension |level )?(\S+)")
+_SPAWN_PCT_RE = re.compile(r"Preparing spawn area: (\d+)%")
+_ELAPSED_RE = re.compile(r"Time elapsed: (\d+) ms")
+_DONE_RE = re.compile(r"Done \(([\d.,]+)s\)!")
+
+KIND_TEXT = {
+    "jvm": "JVM 啟動", "libraries": "載入函式庫", "init": "伺服器初始化", "plugin_load": "載入插件",
+    "plugin_enable": "啟用插件", "world": "準備世界", "other": "其他",
+}
+
+
+class BootProfiler:
+    """
+    從伺服器輸出切出開機時間軸：JVM 啟動到第一行輸出、函式庫、每個插件的 Loading/Enabling、
+    各維度的出生點準備（含百分比進度），直到 Done (x.xxxs)!。
+    時間採用行的到達時間（主控台的時間戳只到秒）。
+    """
+    def __init__(self, history=None, instance=""):
+        self.history = history
+        self.instance = instance
+        self.active = False
+        self.last_profile = None
+
+    def begin(self, t0=None, label=""):
+        """伺服器程序建立時呼叫"""
+        self.active = True
+        self.t0 = time.time() if t0 is None else t0
+        self.label = label
+        self.version = None
+        self.first_line = None
+        self.marks = []             # (t, kind, name)
+        self.progress = []          # (t, 維度, 百分比)
+        self._dimension = None
+
+    def abort(self):
+        """開機未完成就結束（啟動失敗、當機）"""
+        self.active = False
+
+    def _mark(self, t, kind, name=""):
+        self.marks.append((t, kind, name))
+
+    def feed(self, record, t=None):
+        """回傳完成的 profile（看到 Done 時），其餘回傳 None"""
+        if not self.active:
+            return None
+        t = time.time() if t is None else t
+        msg = record.message
+        if self.first_line is None:
+            self.first_line = t
+            self._mark(t, "init")
+        if "Done (" in msg:
+            m = _DONE_RE.search(msg)
+            if m:
+                return self._finish(t, float(m.group(1).replace(",", ".")))
+        if msg.startswith("["):
+            m = _PLUGIN_RE.match(msg)
+            if m:
+                kind = "plugin_load" if m.group(2) == "Loading" else "plugin_enable"
+                self._mark(t, kind, f"{m.group(3)}@{m.group(4)}")
+            return None
+        if "Prepar" in msg:
+            m = _SPAWN_PCT_RE.search(msg)
+            if m:
+                self.progress.append((round(t - self.t0, 3), self._dimension, int(m.group(1))))
+                return None
+            m = _DIMENSION_RE.search(msg)
+            if m:
+                self._dimension = m.group(1)
+                self._mark(t, "world", self._dimension)
+                return None
+            m = _LEVEL_RE.search(msg)
+            if m:
+                self._mark(t, "other", f"level {m.group(1)}")
+            return None
+        if "Time elapsed" in msg and _ELAPSED_RE.search(msg):
+            self._mark(t, "other")
+        elif _LIBRARIES_RE.search(msg):
+            if not self.marks or self.marks[-1][1] != "libraries":
+                self._mark(t, "libraries")
+        else:
+            m = _SERVER_START_RE.search(msg)
+            if m:
+                self.version = m.group(1)
+                self._mark(t, "init")
+        return None
+
+    def _finish(self, t, reported):
+        self.active = False
+        segments = []
+        for i, (start, kind, name) in enumerate(self.marks):
+            end = self.marks[i + 1][0] if i + 1 < len(self.marks) else t
+            segments.append({"kind": kind, "name": name, "t": round(start - self.t0, 3), "dur": round(end - start, 3)})
+        plugins, worlds = {}, {}
+        for seg in segments:
+            if seg["kind"] in ("plugin_load", "plugin_enable"):
+                name, _, version = seg["name"].partition("@")
+                entry = plugins.setdefault(name, {"load": 0.0, "enable": 0.0, "version": version})
+                entry["load" if seg["kind"] == "plugin_load" else "enable"] += seg["dur"]
+            elif seg["kind"] == "world":
+                worlds[seg["name"]] = round(worlds.get(seg["name"], 0) + seg["dur"], 3)
+        profile = {
+            "instance": self.instance,
+            "started_at": self.t0,
+            "label": self.label,
+            "version": self.version,
+            "total": round(t - self.t0, 3),
+            "reported": reported,
+            "jvm": round((self.first_line or t) - self.t0, 3),
+            "phases": phase_totals(segments, (self.first_line or t) - self.t0),
+            "plugins": plugins,
+            "worlds": worlds,
+            "segments": segments,
+            "progress": self.progress,
+        }
+        self.last_profile = profile
+        if self.history is not None:
+            self.history.append(profile)
+        return profile
+
+
+def phase_totals(segments, jvm=0.0):
+    totals = {"jvm": round(jvm, 3)}
+    for seg in segments:
+        totals[seg["kind"]] = round(totals.get(seg["kind"], 0) + seg["dur"], 3)
+    return totals
+
+
+def top_costs(profile, n=5):
+    """最耗時的插件（載入 + 啟用）與世界，[(名稱, 秒)]"""
+    plugins = sorted(((name, round(p["load"] + p["enable"], 3)) for name, p in profile["plugins"].items()),
+                     key=lambda x: -x[1])[:n]
+    worlds = sorted(profile["worlds"].items(), key=lambda x: -x[1])[:n]
+    return plugins, worlds
+
+
+class BootHistory:
+    """每次開機一行 JSON（boot_profiles.jsonl），用來比較前後差異、找出變慢的插件或階段"""
+    def __init__(self, path="boot_profiles.jsonl"):
+        self.path = path
+
+    def append(self, profile):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(profile, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[DEBUG] 無法寫入開機紀錄: {e}")
+
+    def load(self, limit=50, instance=None):
+        """由舊到新的最近 limit 筆"""
+        if not os.path.exists(self.path):
+            return []
+        profiles = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    p = json.loads(line)
+                except ValueError:
+                    continue
+                if instance is None or p.get("instance", "") == instance:
+                    profiles.append(p)
+        return profiles[-limit:]
+
+    @staticmethod
+    def compare(profile, previous, threshold=0.25, min_delta=0.5):
+        """
+        與之前幾次開機的中位數比較，回傳變慢的項目 [(項目, 基準秒, 本次秒)]，
+        需同時超過 threshold 比例與 min_delta 秒才算（避免小插件的雜訊）。
+        """
+        if not previous:
+            return []
+        items = {"總開機時間": (profile["total"], [p["total"] for p in previous])}
+        for kind, dur in profile["phases"].items():
+            items[KIND_TEXT.get(kind, kind)] = (dur, [p["phases"].get(kind, 0) for p in previous])
+        for name, p in profile["plugins"].items():
+            base = [q["plugins"][name]["load"] + q["plugins"][name]["enable"]
+                    for q in previous if name in q["plugins"]]
+            if base:
+                items[f"插件 {name}"] = (p["load"] + p["enable"], base)
+        for dim, dur in profile["worlds"].items():
+            base = [q["worlds"][dim] for q in previous if dim in q["worlds"]]
+            if base:
+                items[f"世界 {dim}"] = (dur, base)
+        regressions = []
+        for label, (now, base) in items.items():
+            ref = median(base)
+            if now - ref >= min_delta and now > ref * (1 + threshold):
+                regressions.append((label, round(ref, 2), round(now, 2)))
+        regressions.sort(key=lambda r: -(r[2] - r[1]))
+        return regressions
+
+
+def format_report(profile, previous=()):
+    """純文字報告：階段、最慢的插件與世界、與過去比較"""
+    lines = [f"開機 {profile['total']:.1f} 秒（伺服器回報 {profile['reported']:.1f} 秒）"
+             + (f"，版本 {profile['version']}" if profile.get("version") else "")]
+    lines.append("階段：" + "、".join(f"{KIND_TEXT.get(k, k)} {v:.1f}s" for k, v in profile["phases"].items() if v >= 0.05))
+    plugins, worlds = top_costs(profile)
+    if plugins:
+        lines.append("最慢插件：" + "、".join(f"{n} {s:.2f}s" for n, s in plugins))
+    if worlds:
+        lines.append("世界：" + "、".join(f"{n} {s:.1f}s" for n, s in worlds))
+    previous = list(previous)
+    if previous:
+        totals = [p["total"] for p in previous[-10:]] + [profile["total"]]
+        lines.append("最近開機：" + " → ".join(f"{t:.1f}" for t in totals))
+        regressions = BootHistory.compare(profile, previous[-5:])
+        if regressions:
+            lines.append("變慢：" + "、".join(f"{label} {a}s → {b}s" for label, a, b in regressions[:5]))
+    return "\n".join(lines)
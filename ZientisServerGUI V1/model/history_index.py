@@ -0,0 +1,324 @@
+import os
+import re
+import gzip
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.log_parser import LogParser, LEVELS
+
+_FILE_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_JOIN_RE = re.compile(r"^(\w{2,16}) (joined|left) the game")
+_EXC_RE = re.compile(r"((?:[a-z_$][\w$]*\.)+[A-Z][\w$]*(?:Exception|Error|Throwable))(?::|$|\s)")
+_FRAME_RE = re.compile(r"\s+at (?:[\w.$@-]*/+)?([\w.$<>]+)\(")
+_FORGE_TIME_RE = re.compile(r"(\d{2}[A-Za-z]{3}\d{4}) (\d{1,2}:\d{2}:\d{2})")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE,
+    size INTEGER,
+    mtime REAL,
+    lines INTEGER,
+    first_ts TEXT,
+    last_ts TEXT
+);
+CREATE TABLE IF NOT EXISTS player_events (
+    player TEXT COLLATE NOCASE,
+    ts TEXT,
+    kind TEXT,
+    file_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_player_events ON player_events(player, ts);
+CREATE TABLE IF NOT EXISTS exception_hits (
+    sig TEXT,
+    level TEXT,
+    file_id INTEGER,
+    first_ts TEXT,
+    last_ts TEXT,
+    count INTEGER,
+    sample TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_exception_sig ON exception_hits(sig);
+CREATE TABLE IF NOT EXISTS level_counts (
+    file_id INTEGER,
+    level TEXT,
+    count INTEGER
+);
+"""
+# 例外簽章的全文索引（每個簽章一列）；trigram 分詞支援任意子字串查詢，取代全表掃描的 LIKE '%text%'
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS exception_sigs USING fts5(sig, tokenize='trigram');
+"""
+
+
+def _file_date(path):
+    """從 2024-01-18-3.log.gz 取得日期，沒有則用檔案修改日期"""
+    m = _FILE_DATE_RE.search(os.path.basename(path))
+    if m:
+        return m.group(1)
+    return datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d")
+
+
+def scan_archive(path):
+    """
+    串流解壓並解析一個封存日誌（在子程序中執行），回傳可序列化的 dict：
+    玩家進出事件、例外簽章彙總（類別 + 第一個堆疊位置）、各等級行數。
+    """
+    parser = LogParser()
+    parse = parser.parse
+    day = _file_date(path)
+    events, exceptions, levels = [], {}, {}
+    lines = 0
+    first_ts = last_ts = None
+    pending = None          # (例外類別, 等級, ts, 原始行)：等下一行的堆疊位置組成簽章
+
+    def add_exception(cls, frame, level, ts, raw):
+        sig = f"{cls} @ {frame}" if frame else cls
+        hit = exceptions.get(sig)
+        if hit is None:
+            exceptions[sig] = [level, ts, ts, 1, raw[:300]]
+        else:
+            hit[2] = ts
+            hit[3] += 1
+
+    with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            lines += 1
+            r = parse(line)
+            levels[r.level] = levels.get(r.level, 0) + 1
+            if r.time:
+                m = _FORGE_TIME_RE.match(r.time)
+                if m:
+                    ts = datetime.strptime(m.group(1), "%d%b%Y").strftime("%Y-%m-%d ") + m.group(2)
+                else:
+                    ts = f"{day} {r.time.split('.')[0]}"
+                last_ts = ts
+                if first_ts is None:
+                    first_ts = ts
+            ts = last_ts or day
+            if pending is not None:
+                frame = _FRAME_RE.match(line)
+                add_exception(pending[0], frame.group(1) if frame else None, *pending[1:])
+                pending = None
+                if frame:
+                    continue
+            if r.logger is None and r.time is None and line[:1].isspace():
+                continue    # 其餘堆疊行
+            m = _JOIN_RE.match(r.message)
+            if m:
+                events.append((m.group(1), ts, "join" if m.group(2) == "joined" else "leave"))
+                continue
+            if LEVELS.get(r.level, 2) >= LEVELS["WARN"] or line.startswith("Caused by: "):
+                m = _EXC_RE.search(r.message)
+                if m:
+                    pending = (m.group(1), r.level, ts, line)
+    if pending is not None:
+        add_exception(pending[0], None, *pending[1:])
+    return {
+        "lines": lines,
+        "first_ts": first_ts,
+        "last_ts": last_ts,
+        "events": events,
+        "exceptions": exceptions,
+        "levels": levels,
+    }
+
+
+class HistoryIndex:
+    """
+    logs/*.log.gz 的持久化索引（SQLite）：玩家進出、例外簽章、各等級數量。
+    update() 只處理新增或變動的封存檔，解壓解析分散到多個 CPU 核心。
+    """
+    def __init__(self, db_path="log_history.db"):
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self.fts = self._init_fts(conn)
+
+    @staticmethod
+    def _init_fts(conn):
+        """建立簽章全文索引，舊資料庫補上既有簽章；SQLite 不支援 FTS5 trigram 時回傳 False，查詢改用 LIKE"""
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name='exception_sigs'").fetchone()
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            print(f"[DEBUG] SQLite 不支援 FTS5 trigram，例外查詢改用 LIKE: {e}")
+            return False
+        if not exists:
+            conn.execute("INSERT INTO exception_sigs(sig) SELECT DISTINCT sig FROM exception_hits")
+        return True
+
+    def _connect(self):
+        # 每次查詢各自連線，背景索引與 GUI 查詢可在不同執行緒同時使用
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    # ========== 索引 ==========
+    def pending_files(self, logs_dir):
+        """回傳尚未索引或已變動的封存檔"""
+        try:
+            names = [n for n in os.listdir(logs_dir) if n.endswith(".log.gz")]
+        except OSError:
+            return []
+        with self._connect() as conn:
+            known = {name: (size, mtime) for name, size, mtime in conn.execute("SELECT name, size, mtime FROM files")}
+        pending = []
+        for name in sorted(names):
+            path = os.path.join(logs_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if known.get(name) != (st.st_size, st.st_mtime):
+                pending.append(path)
+        return pending
+
+    def update(self, logs_dir, workers=None, progress=None, cancelled=None):
+        """索引新的封存檔，回傳本次處理的檔案數"""
+        paths = self.pending_files(logs_dir)
+        if not paths:
+            return 0
+        workers = workers or max(1, min(len(paths), (os.cpu_count() or 2) - 1))
+        done = 0
+        with self._write_lock, ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(scan_archive, p): p for p in paths}
+            conn = self._connect()
+            try:
+                for fut in as_completed(futures):
+                    path = futures[fut]
+                    try:
+                        result = fut.result()
+                    except Exception as e:    # 損毀或寫入中的封存檔，下次再試
+                        print(f"[DEBUG] 封存日誌解析失敗 {path}: {e}")
+                        result = None
+                    if result is not None:
+                        with conn:
+                            self._store(conn, path, result, self.fts)
+                    done += 1
+                    if progress:
+                        progress(done, len(paths))
+                    if cancelled and cancelled():
+                        for f in futures:
+                            f.cancel()
+                        break
+            finally:
+                conn.close()
+        return done
+
+    @staticmethod
+    def _store(conn, path, result, fts=False):
+        name = os.path.basename(path)
+        st = os.stat(path)
+        row = conn.execute("SELECT id FROM files WHERE name=?", (name,)).fetchone()
+        if row:
+            file_id = row[0]
+            for table in ("player_events", "exception_hits", "level_counts"):
+                conn.execute(f"DELETE FROM {table} WHERE file_id=?", (file_id,))
+            conn.execute(
+                "UPDATE files SET size=?, mtime=?, lines=?, first_ts=?, last_ts=? WHERE id=?",
+                (st.st_size, st.st_mtime, result["lines"], result["first_ts"], result["last_ts"], file_id),
+            )
+        else:
+            file_id = conn.execute(
+                "INSERT INTO files(name, size, mtime, lines, first_ts, last_ts) VALUES (?,?,?,?,?,?)",
+                (name, st.st_size, st.st_mtime, result["lines"], result["first_ts"], result["last_ts"]),
+            ).lastrowid
+        conn.executemany(
+            "INSERT INTO player_events(player, ts, kind, file_id) VALUES (?,?,?,?)",
+            [(p, ts, kind, file_id) for p, ts, kind in result["events"]],
+        )
+        conn.executemany(
+            "INSERT INTO exception_hits(sig, level, file_id, first_ts, last_ts, count, sample) VALUES (?,?,?,?,?,?,?)",
+            [(sig, lvl, file_id, first, last, n, sample)
+             for sig, (lvl, first, last, n, sample) in result["exceptions"].items()],
+        )
+        conn.executemany(
+            "INSERT INTO level_counts(file_id, level, count) VALUES (?,?,?)",
+            [(file_id, lvl, n) for lvl, n in result["levels"].items()],
+        )
+        if fts and result["exceptions"]:
+            conn.execute(
+                "INSERT INTO exception_sigs(sig) SELECT DISTINCT sig FROM exception_hits "
+                "WHERE file_id=? AND sig NOT IN (SELECT sig FROM exception_sigs)", (file_id,),
+            )
+
+    # ========== 查詢 ==========
+    def last_seen(self, player):
+        """玩家最後一次進入伺服器的時間（歷史日誌），沒有紀錄回傳 None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM player_events WHERE player=? AND kind='join'", (player,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def player_events(self, player, limit=200):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT e.ts, e.kind, f.name FROM player_events e JOIN files f ON f.id = e.file_id "
+                "WHERE e.player=? ORDER BY e.ts DESC LIMIT ?", (player, limit),
+            ).fetchall()
+
+    def exceptions(self, text="", regex=False, min_level=None, limit=200):
+        """
+        依簽章查詢例外，回傳 (sig, 等級, 首次出現, 最後出現, 次數, 檔案數, 範例行)，最近發生的在前。
+        """
+        min_code = LEVELS.get(min_level, 0) if min_level else 0
+        with self._connect() as conn:
+            if regex:
+                pattern = re.compile(text)
+                conn.create_function("REGEXP", 2, lambda p, s: s is not None and pattern.search(s) is not None)
+                where, args = "sig REGEXP ?", [text]
+            elif self.fts and len(text) >= 3:
+                # trigram 需要至少 3 個字元；以片語查詢即為不分大小寫的子字串比對
+                where = "sig IN (SELECT sig FROM exception_sigs WHERE exception_sigs MATCH ?)"
+                args = ['"' + text.replace('"', '""') + '"']
+            else:
+                where, args = "sig LIKE ?", [f"%{text}%"]
+            rows = conn.execute(
+                f"SELECT sig, level, MIN(first_ts), MAX(last_ts), SUM(count), COUNT(DISTINCT file_id), MIN(sample) "
+                f"FROM exception_hits WHERE {where} GROUP BY sig ORDER BY MAX(last_ts) DESC LIMIT ?",
+                args + [limit * 2],
+            ).fetchall()
+        return [r for r in rows if LEVELS.get(r[1], 2) >= min_code][:limit]
+
+    def search(self, text="", min_level=None, regex=False, limit=500):
+        """
+        與 LogIndex.search 相同格式的 (序號, 等級, 顯示文字)，供日誌搜尋面板使用：
+        文字剛好是玩家名稱時列出進出紀錄，並列出簽章符合的例外。
+        """
+        results = []
+        if text and not regex and _JOIN_RE.match(f"{text} joined the game") and (not min_level or min_level == "INFO"):
+            for ts, kind, name in self.player_events(text, limit):
+                action = "加入" if kind == "join" else "離開"
+                results.append((len(results), "INFO", f"[{ts}] {text} {action}（{name}）"))
+        for sig, level, first, last, count, files, _ in self.exceptions(text, regex, min_level, limit):
+            results.append((len(results), level,
+                            f"[{first} → {last}] {sig} ×{count}（{files} 個檔案）"))
+        return results[:limit]
+
+    def stats(self):
+        with self._connect() as conn:
+            files, lines = conn.execute("SELECT COUNT(*), COALESCE(SUM(lines), 0) FROM files").fetchone()
+        return {"files": files, "lines": lines}
+
+
+def benchmark(logs_dir, db_path=None):
+    """索引並量測查詢時間，可用 python -m model.history_index <logs 資料夾> 執行"""
+    index = HistoryIndex(db_path or os.path.join(logs_dir, "..", "log_history.db"))
+    start = time.perf_counter()
+    n = index.update(logs_dir, progress=lambda d, t: print(f"\r{d}/{t}", end=""))
+    print(f"\n索引 {n} 個檔案：{time.perf_counter() - start:.1f}s，{index.stats()}")
+    start = time.perf_counter()
+    index.exceptions("Exception")
+    print(f"例外查詢：{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(sys.argv[1])
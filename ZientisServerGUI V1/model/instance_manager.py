@@ -0,0 +1,174 @@
+import time
+import threading
+
+from model.server_core import ServerCore, SharedPools
+from utils.logger import log_info, log_error
+
+# 每台伺服器各自不同、不可從主設定繼承的欄位
+INSTANCE_KEYS = ("folder", "core_path", "world", "backup_dir", "rcon_host", "rcon_port", "rcon_pass")
+# 多實例時每台預設的主控台索引行數（單機預設 200,000，約 70 MB；12 台時各自減半）
+INSTANCE_INDEX_LINES = 100_000
+
+
+def instance_configs(config, include_default=True):
+    """
+    由 launcher_config.json 產生 [(名稱, 設定)]。
+    主設定本身是 "default" 實例（include_default 時）；"instances" 清單中的每一項
+    繼承主設定的共用欄位（Java、記憶體、觸發規則…），再以自己的欄位覆寫。
+    """
+    shared = {k: v for k, v in config.items() if k not in INSTANCE_KEYS and k != "instances"}
+    shared["console_index_lines"] = config.get("instance_index_lines", INSTANCE_INDEX_LINES)
+    result = []
+    if include_default and config.get("folder"):
+        result.append((config.get("instance_name", "default"), config))
+    for i, entry in enumerate(config.get("instances", [])):
+        name = str(entry.get("name") or f"server{i + 1}")
+        result.append((name, {**shared, **entry}))
+    return result
+
+
+class InstanceManager:
+    """
+    在同一個啟動器程序內管理多台伺服器：每台一個 ServerCore，
+    RCON／備份／指標共用執行緒池，執行緒數不隨實例數線性成長；
+    日誌處理與排程則由各實例自己的排程執行緒進行，一台處理過慢不會拖累其他台。
+    """
+    def __init__(self, config, include_default=True):
+        self.config = config
+        self.include_default = include_default
+        self.pools = SharedPools(
+            rcon_workers=int(config.get("pool_rcon_workers", 4)),
+            backup_workers=int(config.get("pool_backup_workers", 1)),
+            metrics_workers=int(config.get("pool_metrics_workers", 2)),
+        )
+        self.instances = {}
+        for name, cfg in instance_configs(config, include_default):
+            if name in self.instances:
+                log_error(f"實例名稱重複，已略過: {name}")
+                continue
+            self.instances[name] = ServerCore(cfg, pools=self.pools, name=name)
+        self._external = set()     # add() 加入的實例，設定由建立者自己套用
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self.instances)
+
+    def __iter__(self):
+        return iter(self.instances.values())
+
+    def get(self, name):
+        """依名稱取得 ServerCore，不存在時 KeyError"""
+        return self.instances[name]
+
+    def add(self, name, core):
+        """加入外部建立的 ServerCore（GUI 的主伺服器），排在最前面成為 default"""
+        self.instances = {name: core, **{k: v for k, v in self.instances.items() if k != name}}
+        self._external.add(name)
+
+    def apply_config(self, config):
+        """
+        儲存設定後套用：既有實例更新設定，新增的實例建立並開始排程，
+        移除的實例結束（直接啟動的伺服器照一般流程停止，監管／附加的伺服器繼續執行）。
+        """
+        self.config = config
+        configs = {}
+        for name, cfg in instance_configs(config, self.include_default):
+            configs.setdefault(name, cfg)
+        instances = {}
+        for name, core in self.instances.items():
+            if name in self._external:
+                instances[name] = core
+            elif name in configs:
+                core.apply_config(configs[name])
+                instances[name] = core
+            else:
+                log_info(f"[{name}] 已從設定移除")
+                threading.Thread(target=self._retire, args=(name, core), daemon=True,
+                                 name=f"Retire-{name}").start()
+        for name, cfg in configs.items():
+            if name not in instances:
+                core = instances[name] = ServerCore(cfg, pools=self.pools, name=name)
+                if self._thread is not None:
+                    core.run_background()
+                log_info(f"[{name}] 已加入多實例管理")
+        self.instances = instances
+
+    def _retire(self, name, core):
+        if core.running and not core.supervised and not core.attached and core.stop()[0]:
+            timeout = float(self.config.get("shutdown_timeout", 90))
+            if not core.wait_stopped(timeout):
+                log_error(f"[{name}] 伺服器未在 {timeout:.0f} 秒內結束，放棄等待")
+        core.shutdown()
+
+    @property
+    def default(self):
+        return next(iter(self.instances.values()), None)
+
+    # ========== 排程 ==========
+    def run_background(self):
+        """每台啟動自己的排程執行緒（會先接回監管中的伺服器），這裡只定期排程指標收集"""
+        for core in self:
+            core.run_background()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="InstanceMetrics")
+        self._thread.start()
+        log_info(f"多實例管理啟動，共 {len(self)} 台")
+
+    def _loop(self):
+        metrics_every = float(self.config.get("instance_metrics_interval", 2))
+        while not self._stop.wait(metrics_every):
+            for core in self:
+                self.pools.metrics.submit(self._collect, core)
+
+    @staticmethod
+    def _collect(core):
+        try:
+            core.metrics()
+        except Exception as e:
+            print(f"[DEBUG] {core.name} metrics exception: {e}")
+
+    def shutdown(self, timeout=None):
+        """
+        停止排程並中斷連線。監管模式與附加的伺服器繼續執行；
+        直接啟動的伺服器會隨啟動器結束，因此先一起送出 stop，由各實例的排程執行緒推進
+        寬限時間與強制結束，這裡最多等待 timeout 秒（預設 shutdown_timeout，90 秒）。
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if timeout is None:
+            timeout = float(self.config.get("shutdown_timeout", 90))
+        deadline = time.time() + timeout
+        stopping = [(name, core) for name, core in self.instances.items()
+                    if core.running and not core.supervised and not core.attached and core.stop()[0]]
+        for name, core in stopping:
+            if not core.wait_stopped(max(0, deadline - time.time())):
+                log_error(f"[{name}] 伺服器未在 {timeout:.0f} 秒內結束，放棄等待")
+        for core in self:
+            core.shutdown()
+        self.pools.shutdown()
+
+    # ========== 儀表板 ==========
+    def snapshot(self):
+        """各實例的狀態與最近一次指標；只讀快取，不做 I/O"""
+        rows = []
+        for name, core in self.instances.items():
+            m = core.last_metrics
+            rows.append(dict(
+                core.status(), name=name,
+                cpu=m.get("process_cpu"), rss_mb=m.get("process_rss_mb"),
+                lag=core.lag_tracker.summary(time.time() - 3600),
+                backup_running=core.backup_running,
+            ))
+        return rows
+
+    def totals(self, rows=None):
+        """彙總：執行中台數、玩家總數、CPU 與記憶體合計"""
+        rows = self.snapshot() if rows is None else rows
+        return {
+            "instances": len(rows),
+            "running": sum(1 for r in rows if r["state"] == "running"),
+            "players": sum(r["players"] for r in rows),
+            "cpu": round(sum(r["cpu"] or 0 for r in rows), 1),
+            "rss_mb": round(sum(r["rss_mb"] or 0 for r in rows), 1),
+        }
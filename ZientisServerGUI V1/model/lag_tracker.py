@@ -0,0 +1,156 @@
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque, namedtuple
+
+# 延遲相關訊息
+_LAG_RE = re.compile(r"Can't keep up!.*?Running (\d+)ms or (\d+) ticks behind")
+_TICK_TOOK_RE = re.compile(r"A single server tick took ([\d.]+) seconds")
+_WATCHDOG_RE = re.compile(r"The server has not responded for (\d+) seconds")
+# JVM GC：-Xlog:gc 的 "Pause Young (Normal) ... 23.456ms"、分代 ZGC（gc+phases）的 "Y: Pause Mark Start 0.012ms"、
+# 舊版 -verbose:gc 的 "[GC ... 0.0234 secs]"
+_GC_PAUSE_RE = re.compile(r"GC\(\d+\) (?:[YO]: )?(Pause [A-Za-z ]+?)(?: \([^)]*\))*\s.*?([\d.]+)ms\s*$")
+_GC_OLD_RE = re.compile(r"\[(Full GC|GC)\b.*?([\d.]+) secs\]")
+# 區塊活動：存檔、生成出生點、預先生成插件等
+_CHUNK_RE = re.compile(
+    r"Saving the game|Saved the game|Saving chunks for level|All chunks are saved|"
+    r"Preparing (?:spawn area|start region)|\[Chunky\]|Chunk(?:Master)?.*(?:generat|task)",
+    re.IGNORECASE,
+)
+
+LagEvent = namedtuple("LagEvent", "t kind ms ticks detail")
+
+KINDS = ("lag", "watchdog", "gc", "chunk", "backup")
+
+
+def _count_at(samples, t):
+    """samples 為依時間遞增的 (t, 人數)；(t, inf) 排在同一時間的所有取樣之後，直接二分搜尋不必先取出時間"""
+    i = bisect_right(samples, (t, float("inf")))
+    return samples[i - 1][1] if i else None
+
+
+class LagTracker:
+    """
+    將延遲警告、GC 暫停、watchdog 訊息整理成時間序列，
+    並記錄玩家人數、備份與區塊活動，用來推測延遲尖峰的原因。
+    """
+    def __init__(self, max_events=20000, max_samples=20000, window=60):
+        self.events = deque(maxlen=max_events)         # LagEvent，依時間遞增
+        self.player_samples = deque(maxlen=max_samples)  # (t, 人數)
+        self.window = window                             # 關聯分析的前後時間範圍（秒）
+        self._backup_started = None
+
+    # ========== 輸入 ==========
+    def feed(self, record, t=None):
+        """解析一行日誌，是延遲相關事件時回傳 LagEvent"""
+        msg = record.message
+        # 先做便宜的字串檢查，絕大多數行不會進到正規式
+        if "behind" not in msg and "tick took" not in msg and "responded" not in msg \
+                and "GC" not in msg and "hunk" not in msg and "Sav" not in msg and "Prepar" not in msg:
+            return None
+        t = time.time() if t is None else t
+        event = self._parse(msg, t)
+        if event is not None:
+            self.events.append(event)
+        return event
+
+    @staticmethod
+    def _parse(msg, t):
+        m = _LAG_RE.search(msg)
+        if m:
+            return LagEvent(t, "lag", int(m.group(1)), int(m.group(2)), "")
+        m = _TICK_TOOK_RE.search(msg)
+        if m:
+            ms = int(float(m.group(1)) * 1000)
+            return LagEvent(t, "watchdog", ms, ms // 50, "單一 tick 過長")
+        m = _WATCHDOG_RE.search(msg)
+        if m:
+            ms = int(m.group(1)) * 1000
+            return LagEvent(t, "watchdog", ms, ms // 50, "伺服器無回應")
+        m = _GC_PAUSE_RE.search(msg)
+        if m:
+            return LagEvent(t, "gc", int(float(m.group(2))), 0, m.group(1))
+        m = _GC_OLD_RE.search(msg)
+        if m:
+            return LagEvent(t, "gc", int(float(m.group(2)) * 1000), 0, m.group(1))
+        if _CHUNK_RE.search(msg):
+            return LagEvent(t, "chunk", 0, 0, msg[:80])
+        return None
+
+    def record_players(self, count, t=None):
+        self.player_samples.append((time.time() if t is None else t, count))
+
+    def backup_started(self, t=None):
+        self._backup_started = time.time() if t is None else t
+
+    def backup_finished(self, t=None):
+        """備份事件記在結束時間（ms 為耗時），事件序列才會維持時間遞增"""
+        end = time.time() if t is None else t
+        start = self._backup_started or end
+        self._backup_started = None
+        self.events.append(LagEvent(end, "backup", int((end - start) * 1000), 0, "備份"))
+
+    # ========== 查詢 ==========
+    def series(self, kind="lag", since=None):
+        """回傳 [(t, ms)]，供圖表使用"""
+        return [(e.t, e.ms) for e in self.events if e.kind == kind and (since is None or e.t >= since)]
+
+    def markers(self, kinds=("gc", "chunk", "backup", "watchdog"), since=None):
+        """回傳 [(t, kind)]，在圖表上以垂直線標示"""
+        return [(e.t, e.kind) for e in self.events if e.kind in kinds and (since is None or e.t >= since)]
+
+    def players_series(self, since=None):
+        return [s for s in self.player_samples if since is None or s[0] >= since]
+
+    def players_at(self, t):
+        """t 時（之前最近一次取樣）的線上人數"""
+        return _count_at(self.player_samples, t)
+
+    def correlate(self, spike_ms=1000, since=None, limit=50):
+        """
+        找出 ms 超過 spike_ms 的延遲尖峰，並列出前後 window 秒內的可能原因。
+        回傳 dict list（新到舊）：t, ms, ticks, players, avg_players, causes
+        """
+        events = list(self.events)
+        times = [e.t for e in events]
+        samples = list(self.player_samples)
+        counts = [c for _, c in samples]
+        avg_players = sum(counts) / len(counts) if counts else None
+        backup_spans = [(e.t - e.ms / 1000, e.t) for e in events if e.kind == "backup"]
+        if self._backup_started is not None:
+            backup_spans.append((self._backup_started, float("inf")))
+        report = []
+        for e in reversed(events):
+            if e.kind not in ("lag", "watchdog") or e.ms < spike_ms:
+                continue
+            if since is not None and e.t < since:
+                break
+            lo, hi = bisect_left(times, e.t - self.window), bisect_right(times, e.t + self.window)
+            nearby = events[lo:hi]
+            causes = []
+            gc_ms = sum(n.ms for n in nearby if n.kind == "gc")
+            if gc_ms:
+                causes.append(f"GC 暫停共 {gc_ms} ms")
+            chunks = sum(1 for n in nearby if n.kind == "chunk")
+            if chunks:
+                causes.append(f"區塊活動 {chunks} 次")
+            if any(a - self.window <= e.t <= b + self.window for a, b in backup_spans):
+                causes.append("備份進行中")
+            players = _count_at(samples, e.t)
+            if players is not None and avg_players and players > avg_players * 1.5:
+                causes.append(f"玩家數偏高（{players}，平均 {avg_players:.1f}）")
+            report.append({
+                "t": e.t, "ms": e.ms, "ticks": e.ticks, "kind": e.kind,
+                "players": players, "avg_players": avg_players, "causes": causes,
+            })
+            if len(report) >= limit:
+                break
+        return report
+
+    def summary(self, since=None):
+        lags = [e for e in self.events if e.kind in ("lag", "watchdog") and (since is None or e.t >= since)]
+        if not lags:
+            return "沒有延遲警告"
+        worst = max(lags, key=lambda e: e.ms)
+        total = sum(e.ms for e in lags)
+        return f"延遲警告 {len(lags)} 次，共落後 {total / 1000:.1f} 秒，最嚴重 {worst.ms} ms（{worst.ticks} ticks）"
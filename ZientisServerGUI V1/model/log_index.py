@@ -0,0 +1,281 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+from utils.log_parser import LEVELS
+
+TOKEN_RE = re.compile(r"[0-9A-Za-z_一-鿿]{2,}")
+_LEVEL_CODES = LEVELS
+_LEVEL_NAMES = {v: k for k, v in LEVELS.items()}
+# 預設容量：每行（原始字串＋索引）約 300 多 bytes，20 萬行約 70 MB。
+# 字詞與等級查詢在數百萬行仍在數 ms 內；正規式需要掃描原始行，每百萬行約 100 ms，
+# 因此預設不放到數百萬行，需要更長的歷史請調高設定 console_index_lines。
+DEFAULT_CAPACITY = 200_000
+# 跳脫字元後面接的參數長度：\xhh、\uhhhh、\Uhhhhhhhh
+_ESCAPE_ARGS = {"x": 2, "u": 4, "U": 8}
+
+
+def required_literals(pattern):
+    r"""
+    從（區分大小寫的）正規式中取出必定出現的字面字串，供掃描前以 `in` 快速排除。
+    含 | 或 (?i) 時無法保證，回傳空 list。任何跳脫序列（\. \d \u00e9 \N{...} \1 …）
+    都會中斷字面字串並連同參數一起略過，寧可少排除也不能漏掉符合的行。
+    """
+    if "|" in pattern or "(?i" in pattern:
+        return []
+    lits, cur = [], []
+    depth, i, n = 0, 0, len(pattern)
+
+    def flush():
+        if len(cur) >= 2:
+            lits.append("".join(cur))
+        cur.clear()
+
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            nxt = pattern[i + 1:i + 2]
+            i += 2
+            flush()
+            if nxt in _ESCAPE_ARGS:
+                i += _ESCAPE_ARGS[nxt]
+            elif nxt == "N" and pattern[i:i + 1] == "{":
+                close = pattern.find("}", i)
+                i = n if close < 0 else close + 1
+            elif nxt.isdigit():
+                while i < n and pattern[i].isdigit():     # 八進位或反向參照
+                    i += 1
+            continue
+        if c == "[":
+            flush()
+            j = i + 1
+            while j < n and pattern[j] != "]":
+                j += 2 if pattern[j] == "\\" else 1
+            i = j + 1
+            continue
+        if c in "()":
+            depth += 1 if c == "(" else -1
+            flush()
+        elif c in "?*{":
+            if cur:
+                cur.pop()                # 前一個字元可省略
+            flush()
+            if c == "{":
+                i = pattern.find("}", i) if "}" in pattern[i:] else n
+        elif c in ".^$+":
+            flush()
+        elif depth == 0:
+            cur.append(c)
+        i += 1
+    flush()
+    return lits
+
+
+class LogIndex:
+    """
+    本次工作階段的日誌環狀儲存 + 倒排索引（字詞、等級）。
+    超過容量時最舊的行被覆寫，索引中的過期序號每次寫入時清除一小批字詞，輪流掃過全部。
+    查詢只在複製索引與取出行時短暫持鎖，比對在鎖外進行，不會卡住寫入端。
+    """
+    PRUNE_STEP = 2000                      # 每次寫入最多清理的字詞數
+    FETCH_BATCH = 1024                     # 查詢時每次持鎖取出的行數
+    SCAN_CHUNK = 4096
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._raw = []                     # 環狀儲存，位置 = seq % capacity
+        self._levels = bytearray()
+        self.next_seq = 0
+        self._tokens = {}                  # token -> array('Q') of seq（遞增）
+        self._level_postings = {code: array("Q") for code in _LEVEL_NAMES}
+        self._since_prune = 0
+        self._prune_queue = []             # 本輪尚未清理的字詞
+        self._lock = threading.Lock()
+
+    @property
+    def oldest_seq(self):
+        return max(0, self.next_seq - self.capacity)
+
+    def __len__(self):
+        return self.next_seq - self.oldest_seq
+
+    # ========== 寫入 ==========
+    def add_many(self, records):
+        with self._lock:
+            for r in records:
+                self._add(r)
+            self._prune_step()
+
+    def _add(self, record):
+        seq = self.next_seq
+        code = _LEVEL_CODES.get(record.level, 2)
+        if len(self._raw) < self.capacity:
+            self._raw.append(record.raw)
+            self._levels.append(code)
+        else:
+            pos = seq % self.capacity
+            self._raw[pos] = record.raw
+            self._levels[pos] = code
+            self._since_prune += 1
+        self._level_postings[code].append(seq)
+        tokens = self._tokens
+        for tok in set(TOKEN_RE.findall(record.message.lower())):
+            posting = tokens.get(tok)
+            if posting is None:
+                posting = tokens[tok] = array("Q")
+            posting.append(seq)
+        self.next_seq = seq + 1
+
+    def _prune_step(self):
+        """移除已被覆寫的舊序號：每覆寫 1/4 容量開始新的一輪，每次只處理 PRUNE_STEP 個字詞"""
+        queue = self._prune_queue
+        oldest = self.oldest_seq
+        if not queue:
+            if self._since_prune < self.capacity // 4:
+                return
+            self._since_prune = 0
+            queue.extend(self._tokens)
+            for posting in self._level_postings.values():
+                del posting[:bisect_left(posting, oldest)]
+        tokens = self._tokens
+        for _ in range(min(self.PRUNE_STEP, len(queue))):
+            tok = queue.pop()
+            posting = tokens.get(tok)
+            if posting is None:
+                continue
+            cut = bisect_left(posting, oldest)
+            if cut == len(posting):
+                del tokens[tok]
+            elif cut:
+                del posting[:cut]
+
+    # ========== 查詢 ==========
+    def search(self, text="", min_level=None, regex=False, limit=500):
+        """
+        由新到舊回傳最多 limit 筆 (seq, 等級, 原始行)。
+        text: 一般模式為 AND 字詞查詢（不分大小寫、只比對完整字詞，"Play" 找不到 "Player42"）；
+              regex=True 時為區分大小寫的正規式，
+              比對整行（含時間與執行緒前綴）。字詞索引只含訊息部分，因此正規式不查索引，
+              改用必要字串整段快速排除後逐行比對。
+        min_level: 例如 "WARN" 代表只看 WARN 以上。
+        """
+        pattern = re.compile(text) if regex and text else None
+        literals = required_literals(text) if pattern is not None else []
+        tokens = [] if regex else [t.lower() for t in TOKEN_RE.findall(text)]
+        min_code = _LEVEL_CODES.get(min_level, 0) if min_level else 0
+        with self._lock:
+            # 只複製需要的索引（寫入端會就地清理），掃描與比對都在鎖外
+            oldest, end = self.oldest_seq, self.next_seq
+            if tokens:
+                postings = []
+                for tok in set(tokens):
+                    posting = self._tokens.get(tok)
+                    if posting is None:
+                        return []
+                    postings.append(posting[:])
+            elif min_code:
+                lists = [self._level_postings[c][:] for c in _LEVEL_NAMES if c >= min_code]
+        if tokens:
+            postings.sort(key=len)
+            candidates = self._intersect_desc(postings, oldest)
+        elif min_code:
+            candidates = self._merge_desc(lists, oldest)
+        elif not text:
+            candidates = range(end - 1, oldest - 1, -1)
+        elif not regex:
+            return []  # 只有標點等無法索引的字元
+        else:
+            candidates = self._scan_desc(oldest, end, literals)
+        results = []
+        for batch in _batches(candidates, self.FETCH_BATCH):
+            for seq, code, raw in self._fetch(batch):
+                if code < min_code:
+                    continue
+                if pattern is not None:
+                    if literals and not all(lit in raw for lit in literals):
+                        continue
+                    if not pattern.search(raw):
+                        continue
+                results.append((seq, _LEVEL_NAMES[code], raw))
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _fetch(self, seqs):
+        """短暫持鎖取出 (seq, 等級代碼, 原始行)，略過查詢期間已被覆寫的行"""
+        with self._lock:
+            oldest = self.oldest_seq
+            levels, raw, cap = self._levels, self._raw, self.capacity
+            return [(s, levels[s % cap], raw[s % cap]) for s in seqs if s >= oldest]
+
+    def lines_since(self, seq, limit=1000):
+        """
+        回傳序號 >= seq 的最多 limit 行 (seq, 等級, 原始行)，由舊到新；供遠端追蹤主控台。
+        seq 為負數時代表最後 -seq 行。
+        """
+        with self._lock:
+            start = max(self.oldest_seq, seq if seq >= 0 else self.next_seq + seq)
+            end = min(self.next_seq, start + limit)
+            return [(s, _LEVEL_NAMES[self._levels[s % self.capacity]], self._raw[s % self.capacity])
+                    for s in range(start, end)]
+
+    def _scan_desc(self, oldest, end, literals):
+        """逐段由新到舊掃描；整段接起來都找不到必要字串時直接跳過該段（複製該段時才持鎖）"""
+        hi = end
+        while hi > oldest:
+            lo = max(oldest, hi - self.SCAN_CHUNK)
+            if literals:
+                a, b = lo % self.capacity, (hi - 1) % self.capacity + 1
+                with self._lock:
+                    chunk = self._raw[a:b] if a < b else self._raw[a:] + self._raw[:b]
+                joined = "\n".join(chunk)
+                if not all(lit in joined for lit in literals):
+                    hi = lo
+                    continue
+            yield from range(hi - 1, lo - 1, -1)
+            hi = lo
+
+    @staticmethod
+    def _intersect_desc(postings, oldest):
+        smallest, others = postings[0], postings[1:]
+        for i in range(len(smallest) - 1, -1, -1):
+            seq = smallest[i]
+            if seq < oldest:
+                return
+            ok = True
+            for other in others:
+                j = bisect_left(other, seq)
+                if j == len(other) or other[j] != seq:
+                    ok = False
+                    break
+            if ok:
+                yield seq
+
+    @staticmethod
+    def _merge_desc(lists, oldest):
+        # 合併各等級的序號（由新到舊）
+        idx = [len(p) - 1 for p in lists]
+        while True:
+            best = -1
+            for k, p in enumerate(lists):
+                if idx[k] >= 0 and (best < 0 or p[idx[k]] > lists[best][idx[best]]):
+                    best = k
+            if best < 0:
+                return
+            seq = lists[best][idx[best]]
+            if seq < oldest:
+                return
+            idx[best] -= 1
+            yield seq
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
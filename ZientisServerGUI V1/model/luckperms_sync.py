@@ -0,0 +1,161 @@
+import os
+import re
+import time
+import sqlite3
+
+from model.player import ROLE_PRIORITY
+
+COLOR_CODE_RE = re.compile(r"§[0-9a-fk-or]", re.IGNORECASE)
+MEMBER_LINE_RE = re.compile(r"^\s*>\s*([A-Za-z0-9_]{1,16})\b")
+# listmembers 的標題行："... - page 1 of 3 - (27 entries)"
+PAGE_RE = re.compile(r"\bpage (\d+) of (\d+)", re.IGNORECASE)
+
+
+class LuckPermsRoleSource:
+    """
+    批次讀取 LuckPerms 權限群組並轉換成啟動器職位。
+    優先直接讀取本地 SQLite 儲存（一次 SQL 查詢），否則透過 RCON 查詢各群組成員。
+    H2 儲存需要 Java 驅動無法直接讀取，會自動改用 RCON。
+    """
+    DEFAULT_GROUP_ROLES = {"owner": "服主", "admin": "管理員", "vip": "VIP", "default": "玩家"}
+    SQLITE_CHUNK = 900
+    MAX_PAGES = 50             # 單一群組最多讀取的頁數，超過視為查詢不完整
+
+    def __init__(self, server_folder, rcon_mgr=None, group_roles=None, ttl=60, mode="auto"):
+        self.server_folder = server_folder
+        self.rcon_mgr = rcon_mgr
+        self.group_roles = {k.lower(): v for k, v in (group_roles or self.DEFAULT_GROUP_ROLES).items()}
+        self.ttl = ttl
+        self.mode = mode
+        self._cache = {}           # name(lower) -> (role, 取得時間)
+        self._rcon_fetched_at = 0
+        self._rcon_complete = False    # 上次 RCON 查詢是否取得所有群組的成員
+
+    @property
+    def sqlite_path(self):
+        return os.path.join(self.server_folder, "plugins", "LuckPerms", "luckperms-sqlite.db")
+
+    def _use_sqlite(self):
+        if self.mode == "rcon":
+            return False
+        return os.path.isfile(self.sqlite_path)
+
+    def _best_role(self, groups):
+        roles = [self.group_roles[g.lower()] for g in groups if g and g.lower() in self.group_roles]
+        if not roles:
+            return None
+        return min(roles, key=lambda r: ROLE_PRIORITY.get(r, 99))
+
+    def fetch_roles(self, player_names):
+        """
+        回傳 {name: role}，只包含查得到群組的玩家。
+        快取未過期的玩家不會重新查詢；每次刷新最多送出一批查詢。
+        RCON 模式下不在任何對應群組的玩家視為 default 群組，已移出群組的玩家會因此被重設。
+        """
+        now = time.time()
+        if self.mode == "off":
+            return {}
+        if self._use_sqlite():
+            stale = [n for n in player_names
+                     if n.lower() not in self._cache or now - self._cache[n.lower()][1] > self.ttl]
+            if stale:
+                self._query_sqlite(stale, now)
+        elif self.rcon_mgr and now - self._rcon_fetched_at > self.ttl:
+            self._query_rcon(now)
+        default_role = None
+        if not self._use_sqlite() and self._rcon_complete:
+            default_role = self.group_roles.get("default", "玩家")
+        result = {}
+        for name in player_names:
+            cached = self._cache.get(name.lower())
+            if cached and cached[0]:
+                result[name] = cached[0]
+            elif default_role:
+                result[name] = default_role
+        return result
+
+    def _query_sqlite(self, names, now):
+        lowered = [n.lower() for n in names]
+        uri = "file:" + self.sqlite_path.replace("\\", "/") + "?mode=ro"
+        groups = {n: set() for n in lowered}
+        conn = sqlite3.connect(uri, uri=True, timeout=2)
+        try:
+            # SQLite 單一查詢的參數數量有上限，超過時分段
+            for i in range(0, len(lowered), self.SQLITE_CHUNK):
+                chunk = lowered[i:i + self.SQLITE_CHUNK]
+                sql = (
+                    "SELECT p.username, p.primary_group, up.permission "
+                    "FROM luckperms_players p "
+                    "LEFT JOIN luckperms_user_permissions up "
+                    "ON up.uuid = p.uuid AND up.permission LIKE 'group.%' AND up.value = 1 "
+                    f"WHERE p.username IN ({','.join('?' * len(chunk))})"
+                )
+                for username, primary, perm in conn.execute(sql, chunk):
+                    bucket = groups.setdefault(username.lower(), set())
+                    bucket.add(primary)
+                    if perm:
+                        bucket.add(perm[len("group."):])
+        finally:
+            conn.close()
+        for name, gs in groups.items():
+            self._cache[name] = (self._best_role(gs), now)
+
+    def _query_rcon(self, now):
+        """
+        每個對應群組先查第一頁（指令數與線上人數無關），有分頁的群組再一次補查其餘頁。
+        任何一頁失敗或頁數過多都視為不完整：沿用上次結果，且不把沒看到的玩家重設為預設職位。
+        """
+        groups = [g for g in self.group_roles if g != "default"]
+        self._rcon_fetched_at = now
+        first = self._run_pages([(g, 1) for g in groups])
+        if first is None:
+            return self._rcon_incomplete()
+        pages = [(g, p) for g in groups for p in range(2, first[(g, 1)][1] + 1)]
+        if len(pages) > self.MAX_PAGES * len(groups):
+            return self._rcon_incomplete()
+        rest = self._run_pages(pages) if pages else {}
+        if rest is None:
+            return self._rcon_incomplete()
+        members = {}
+        for (group, _), (names, _) in list(first.items()) + list(rest.items()):
+            for name in names:
+                members.setdefault(name, set()).add(group)
+        self._cache = {name: (self._best_role(gs), now) for name, gs in members.items()}
+        self._rcon_complete = True
+
+    def _run_pages(self, pages):
+        """送出 [(群組, 頁)]，回傳 {(群組, 頁): (成員 list, 總頁數)}；任何一條失敗回傳 None"""
+        cmds = [f"lp group {g} listmembers {p}" for g, p in pages]
+        responses = self.rcon_mgr.run_commands(cmds)
+        if len(responses) < len(cmds) or not all(isinstance(r, str) for r in responses):
+            return None
+        result = {}
+        for key, resp in zip(pages, responses):
+            text = COLOR_CODE_RE.sub("", resp)
+            page = PAGE_RE.search(text)
+            names = [m.group(1).lower() for m in map(MEMBER_LINE_RE.match, text.splitlines()) if m]
+            result[key] = (names, int(page.group(2)) if page else 1)
+        return result
+
+    def _rcon_incomplete(self):
+        # 無法判斷誰已移出群組：保留上次的快取，沒看到的玩家維持原職位
+        print("[DEBUG] LuckPerms 群組成員查詢不完整，沿用上次結果")
+        self._rcon_complete = False
+
+    def plugin_installed(self):
+        return os.path.isdir(os.path.join(self.server_folder, "plugins", "LuckPerms"))
+
+    def group_for_role(self, role):
+        """職位反查 LuckPerms 群組（找不到回傳 None）"""
+        for group, r in self.group_roles.items():
+            if r == role:
+                return group
+        return None
+
+    def invalidate(self, name=None):
+        if name is None:
+            self._cache.clear()
+            self._rcon_fetched_at = 0
+            self._rcon_complete = False
+        else:
+            self._cache.pop(name.lower(), None)
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+# 彙總層級：(每格秒數, 保留格數)——1 分鐘留 1 天、1 小時留 30 天、1 天留 2 年
+LEVELS = ((60, 1440), (3600, 24 * 30), (86400, 365 * 2))
+
+
+class Rollup:
+    """單一層級：已完成的格子 (開始時間, min, max, avg) 與目前累計中的格子"""
+    __slots__ = ("step", "done", "start", "count", "total", "low", "high")
+
+    def __init__(self, step, size):
+        self.step = step
+        self.done = deque(maxlen=size)
+        self.start = None
+        self.count = 0
+        self.total = 0.0
+        self.low = self.high = 0.0
+
+    def add(self, t, v):
+        start = t - t % self.step
+        if self.count and start > self.start:
+            self.done.append(self.current())
+            self.count = 0
+        if not self.count:       # 時間倒退（校時）時 start 較小，直接併入目前的格子
+            self.start, self.total, self.low, self.high = start, 0.0, v, v
+        self.count += 1
+        self.total += v
+        if v < self.low:
+            self.low = v
+        if v > self.high:
+            self.high = v
+
+    def current(self):
+        return (self.start, self.low, self.high, round(self.total / self.count, 3))
+
+    def points(self):
+        pts = list(self.done)
+        if self.count:
+            pts.append(self.current())
+        return pts
+
+    def to_dict(self):
+        return {"done": list(self.done),
+                "cur": [self.start, self.count, self.total, self.low, self.high] if self.count else None}
+
+    def load(self, data):
+        self.done.extend(tuple(p) for p in data.get("done", []))
+        if data.get("cur"):
+            self.start, self.count, self.total, self.low, self.high = data["cur"]
+
+
+class Series:
+    """一個指標：原始值環狀緩衝區 + 各層級的 min/max/avg 彙總，記憶體大小固定"""
+    __slots__ = ("raw", "levels")
+
+    def __init__(self, raw_size):
+        self.raw = deque(maxlen=raw_size)
+        self.levels = [Rollup(step, size) for step, size in LEVELS]
+
+    def add(self, t, v):
+        self.raw.append((t, v))
+        for level in self.levels:
+            level.add(t, v)
+
+    def points(self, since, until, max_points):
+        """
+        回傳 [(t, min, max, avg)]：由細到粗選第一個涵蓋 since 且點數不超過 max_points 的層級；
+        資料還不夠久時改選最早有資料的層級（同樣早時取較細的）。
+        """
+        best = None
+        candidates = [[(t, v, v, v) for t, v in self.raw]] + [level.points() for level in self.levels]
+        for pts in candidates:
+            in_range = [p for p in pts if since <= p[0] <= until]
+            if len(in_range) > max_points:
+                continue
+            if pts and pts[0][0] <= since:
+                return in_range
+            if in_range and (best is None or in_range[0][0] < best[0][0]):
+                best = in_range
+        return best if best is not None else in_range
+
+    def to_dict(self):
+        return {"raw": list(self.raw), "levels": {str(l.step): l.to_dict() for l in self.levels}}
+
+    def load(self, data):
+        self.raw.extend(tuple(p) for p in data.get("raw", []))
+        levels = data.get("levels", {})
+        for level in self.levels:
+            if str(level.step) in levels:
+                level.load(levels[str(level.step)])
+
+
+class MetricsStore:
+    """
+    啟動器的內嵌時間序列資料庫（RRD 形式）：每個指標保留 raw_size 筆原始值，
+    並即時彙總成 1 分鐘／1 小時／1 天的 min/max/avg，記憶體不隨時間成長。
+    append() 可由任何執行緒呼叫；查詢自動挑選合適的解析度，一週、一個月的圖只需幾百個點。
+    資料定期（autosave 秒）在背景寫入 metrics_store.json，重新開啟後接續。
+    """
+    def __init__(self, path="metrics_store.json", raw_size=3600, autosave=60):
+        self.path = path
+        self.raw_size = raw_size
+        self.autosave = autosave
+        self.lock = threading.Lock()
+        self.series_map = {}
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+        self.load()
+
+    # ========== 寫入 ==========
+    def append(self, name, value, t=None):
+        if value is None:
+            return
+        t = time.time() if t is None else t
+        with self.lock:
+            series = self.series_map.get(name)
+            if series is None:
+                series = self.series_map[name] = Series(self.raw_size)
+            series.add(t, float(value))
+            self._dirty = True
+
+    def append_many(self, values, t=None):
+        """一次寫入多個指標 {名稱: 值}（同一時間點）"""
+        t = time.time() if t is None else t
+        for name, value in values.items():
+            self.append(name, value, t)
+
+    # ========== 查詢 ==========
+    def names(self):
+        with self.lock:
+            return sorted(self.series_map)
+
+    def query(self, name, since, until=None, max_points=1500):
+        """[(t, min, max, avg)]；解析度依時間範圍自動選擇"""
+        until = time.time() if until is None else until
+        with self.lock:
+            series = self.series_map.get(name)
+            return series.points(since, until, max_points) if series else []
+
+    def series(self, name, since, until=None, max_points=1500, field="avg", scale=1.0):
+        """[(t, 值)]，供 TimeSeriesChart 使用；field 為 "min"、"max" 或 "avg" """
+        i = ("min", "max", "avg").index(field) + 1
+        return [(p[0], p[i] * scale) for p in self.query(name, since, until, max_points)]
+
+    def latest(self, name):
+        with self.lock:
+            series = self.series_map.get(name)
+            return series.raw[-1] if series and series.raw else None
+
+    # ========== 持久化 ==========
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[DEBUG] 指標資料讀取失敗: {e}")
+            return
+        with self.lock:
+            for name, payload in data.get("series", {}).items():
+                series = Series(self.raw_size)
+                series.load(payload)
+                self.series_map[name] = series
+
+    def save(self):
+        """寫入暫存檔後取代，寫到一半中斷也不會損毀舊檔"""
+        with self.lock:
+            if not self._dirty:
+                return
+            data = {"version": 1, "saved_at": time.time(),
+                    "series": {name: s.to_dict() for name, s in self.series_map.items()}}
+            self._dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[DEBUG] 指標資料寫入失敗: {e}")
+
+    def start(self):
+        """啟動背景自動儲存"""
+        if self._thread is None and self.autosave:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="MetricsStore")
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.autosave):
+            self.save()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
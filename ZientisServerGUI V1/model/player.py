@@ -1,7 +1,92 @@
 # model/player.py
+ROLE_PRIORITY = {"服主": 0, "管理員": 1, "VIP": 2, "玩家": 3}
+
 class Player:
-    def __init__(self, name, role="玩家"):
+    __slots__ = ("name", "role", "uuid", "online")
+
+    def __init__(self, name, role="玩家", uuid=None, online=False):
         self.name = name
         self.role = role    # 例如 "管理員"、"VIP"、"玩家"等
+        self.uuid = uuid
+        self.online = online
+
+    def sort_key(self):
+        return (ROLE_PRIORITY.get(self.role, 99), not self.online, self.name.lower())
+
     def __repr__(self):
         return f"<Player {self.name} ({self.role})>"
+
+
+class PlayerTable:
+    """
+    玩家名單（線上 + 已知離線玩家），只會新增列不會刪除，
+    讓 Qt model 能以插入/變更通知增量更新，而不是整張重建。
+    """
+    def __init__(self):
+        self.rows = []      # List[Player]
+        self.index = {}     # name -> row
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, row):
+        return self.rows[row]
+
+    def get(self, name):
+        row = self.index.get(name)
+        return self.rows[row] if row is not None else None
+
+    def upsert(self, name, role=None, uuid=None, online=None):
+        """新增或更新玩家，回傳 (row, 是否新增, 是否有變更)"""
+        row = self.index.get(name)
+        if row is None:
+            row = len(self.rows)
+            self.rows.append(Player(name, role or "玩家", uuid, bool(online)))
+            self.index[name] = row
+            return row, True, True
+        p = self.rows[row]
+        changed = False
+        if role is not None and p.role != role:
+            p.role = role
+            changed = True
+        if uuid is not None and p.uuid != uuid:
+            p.uuid = uuid
+            changed = True
+        if online is not None and p.online != online:
+            p.online = online
+            changed = True
+        return row, False, changed
+
+    def load_known(self, players):
+        """
+        載入已知（離線）玩家。players: name -> {"role", "uuid", ...}
+        回傳 (新增列數, 變更列 list)
+        """
+        first_new = len(self.rows)
+        changed = []
+        for name, info in players.items():
+            row, is_new, is_changed = self.upsert(name, info.get("role"), info.get("uuid"), None)
+            if is_changed and not is_new:
+                changed.append(row)
+        return len(self.rows) - first_new, changed
+
+    def sync_online(self, online_names, role_lookup=None):
+        """
+        同步線上名單，回傳 (新增列數, 變更列 list)。
+        """
+        current = set(online_names)
+        first_new = len(self.rows)
+        changed = []
+        for p in self.rows[:first_new]:
+            if p.online and p.name not in current:
+                p.online = False
+                changed.append(self.index[p.name])
+        for name in online_names:
+            role = role_lookup(name) if role_lookup else None
+            row, is_new, is_changed = self.upsert(name, role, None, True)
+            if is_changed and not is_new:
+                changed.append(row)
+        return len(self.rows) - first_new, changed
+
+    def online_players(self):
+        return [p for p in self.rows if p.online]
@@ -30,13 +30,34 @@ class PlayerRoleManager:
         self.roles[name] = role
         self.save_roles()
 
-    def sync_roles_from_server(self, player_list):
+    set_role = update_role
+
+    def update_roles(self, names, role):
+        """批次變更多名玩家職位，只寫檔一次"""
+        for name in names:
+            self.roles[name] = role
+        self.save_roles()
+
+    def sync_roles_from_server(self, player_list, source=None):
         """
-        可對接伺服器外掛或API，這裡僅示意全部預設為'玩家'
-        你可根據伺服器權限指令API自動刷新
+        由權限外掛來源（例如 LuckPermsRoleSource）批次同步職位，
+        查不到的新玩家預設為'玩家'；只有內容變動時才寫檔，回傳變動的玩家。
         """
-        # Example: 接外掛/資料庫獲得的名單與職位後同步 roles
+        fetched = {}
+        if source:
+            try:
+                fetched = source.fetch_roles(player_list)
+            except Exception as e:
+                print(f"[DEBUG] 權限群組同步失敗: {e}")
+        changed = []
         for name in player_list:
-            if name not in self.roles:
-                self.roles[name] = "玩家"
-        self.save_roles()
+            role = fetched.get(name)
+            if role is None and name in self.roles:
+                continue
+            role = role or "玩家"
+            if self.roles.get(name) != role:
+                self.roles[name] = role
+                changed.append(name)
+        if changed:
+            self.save_roles()
+        return changed
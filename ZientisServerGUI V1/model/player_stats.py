@@ -0,0 +1,186 @@
+import os
+import io
+import gzip
+import json
+import heapq
+import struct
+import hashlib
+import threading
+
+
+_MISS = object()
+
+
+def offline_uuid(name):
+    """離線模式伺服器的玩家 UUID（與 Java 的 UUID.nameUUIDFromBytes 相同）"""
+    h = bytearray(hashlib.md5(f"OfflinePlayer:{name}".encode("utf-8")).digest())
+    h[6] = (h[6] & 0x0F) | 0x30
+    h[8] = (h[8] & 0x3F) | 0x80
+    s = h.hex()
+    return f"{s[:8]}-{s[8:12]}-{s[12:16]}-{s[16:20]}-{s[20:]}"
+
+
+# ========== 最小 NBT 解析（只讀） ==========
+def _read_nbt_payload(buf, tag):
+    if tag == 1:
+        return struct.unpack(">b", buf.read(1))[0]
+    if tag == 2:
+        return struct.unpack(">h", buf.read(2))[0]
+    if tag == 3:
+        return struct.unpack(">i", buf.read(4))[0]
+    if tag == 4:
+        return struct.unpack(">q", buf.read(8))[0]
+    if tag == 5:
+        return struct.unpack(">f", buf.read(4))[0]
+    if tag == 6:
+        return struct.unpack(">d", buf.read(8))[0]
+    if tag == 7:
+        (n,) = struct.unpack(">i", buf.read(4))
+        return buf.read(n)
+    if tag == 8:
+        (n,) = struct.unpack(">H", buf.read(2))
+        return buf.read(n).decode("utf-8", errors="replace")
+    if tag == 9:
+        item_tag, n = struct.unpack(">bi", buf.read(5))
+        return [_read_nbt_payload(buf, item_tag) for _ in range(max(n, 0))]
+    if tag == 10:
+        out = {}
+        while True:
+            (child,) = struct.unpack(">b", buf.read(1))
+            if child == 0:
+                return out
+            (n,) = struct.unpack(">H", buf.read(2))
+            key = buf.read(n).decode("utf-8", errors="replace")
+            out[key] = _read_nbt_payload(buf, child)
+    if tag == 11:
+        (n,) = struct.unpack(">i", buf.read(4))
+        return list(struct.unpack(f">{n}i", buf.read(4 * n)))
+    if tag == 12:
+        (n,) = struct.unpack(">i", buf.read(4))
+        return list(struct.unpack(f">{n}q", buf.read(8 * n)))
+    raise ValueError(f"未知的 NBT 標籤 {tag}")
+
+
+def read_nbt_file(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    buf = io.BytesIO(raw)
+    (tag,) = struct.unpack(">b", buf.read(1))
+    (n,) = struct.unpack(">H", buf.read(2))
+    buf.read(n)
+    return _read_nbt_payload(buf, tag)
+
+
+class PlayerStatsLoader:
+    """
+    讀取 <world>/stats、advancements、playerdata 下的玩家資料。
+    每個檔案依 mtime 快取解析結果，檔案沒變動就不會重新解析。
+    """
+    TOP_STATS = 8
+
+    def __init__(self, world_path):
+        self.world_path = world_path
+        self._files = {}    # path -> (mtime, 解析結果)
+        self._lock = threading.Lock()
+
+    def _paths(self, uuid):
+        return {
+            "stats": os.path.join(self.world_path, "stats", f"{uuid}.json"),
+            "advancements": os.path.join(self.world_path, "advancements", f"{uuid}.json"),
+            "playerdata": os.path.join(self.world_path, "playerdata", f"{uuid}.dat"),
+        }
+
+    def has_data(self, uuid):
+        return any(os.path.exists(p) for p in self._paths(uuid).values())
+
+    def _cached(self, path, parser):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            hit = self._files.get(path)
+        if hit and hit[0] == mtime:
+            return hit[1]
+        if parser is None:
+            return _MISS
+        try:
+            value = parser(path)
+        except Exception as e:
+            print(f"[DEBUG] 玩家資料解析失敗 {path}: {e}")
+            value = None
+        with self._lock:
+            self._files[path] = (mtime, value)
+        return value
+
+    def peek(self, uuid):
+        """只回傳快取中且檔案未變動的資料；有任何檔案需要重新解析時回傳 None"""
+        parts = {}
+        for key, path in self._paths(uuid).items():
+            value = self._cached(path, None)
+            if value is _MISS:
+                return None
+            parts[key] = value
+        return self._combine(parts)
+
+    def load(self, uuid):
+        """載入（必要時重新解析）玩家資料，供背景執行緒呼叫"""
+        paths = self._paths(uuid)
+        parts = {
+            "stats": self._cached(paths["stats"], self._parse_stats),
+            "advancements": self._cached(paths["advancements"], self._parse_advancements),
+            "playerdata": self._cached(paths["playerdata"], self._parse_playerdata),
+        }
+        return self._combine(parts)
+
+    @staticmethod
+    def _combine(parts):
+        out = {}
+        for value in parts.values():
+            if value:
+                out.update(value)
+        return out
+
+    # ========== 解析 ==========
+    def _parse_stats(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        stats = data.get("stats", {})
+        custom = stats.get("minecraft:custom", {})
+        # 1.17+ 為 play_time，舊版為 play_one_minute（單位皆為 tick）
+        play_ticks = custom.get("minecraft:play_time", custom.get("minecraft:play_one_minute", 0))
+        flat = []
+        for category, entries in stats.items():
+            cat = category.split(":", 1)[-1]
+            for key, value in entries.items():
+                if key in ("minecraft:play_time", "minecraft:play_one_minute", "minecraft:total_world_time"):
+                    continue
+                flat.append((value, f"{cat}/{key.split(':', 1)[-1]}"))
+        top = [(name, value) for value, name in heapq.nlargest(self.TOP_STATS, flat)]
+        return {"play_ticks": play_ticks, "top_stats": top}
+
+    @staticmethod
+    def _parse_advancements(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        done = sum(
+            1 for key, value in data.items()
+            if isinstance(value, dict) and value.get("done") and not key.startswith("minecraft:recipes/")
+        )
+        return {"advancements_done": done}
+
+    @staticmethod
+    def _parse_playerdata(path):
+        nbt = read_nbt_file(path)
+        out = {}
+        if "Pos" in nbt:
+            out["pos"] = [round(v, 1) for v in nbt["Pos"]]
+        if "Dimension" in nbt:
+            dim = nbt["Dimension"]
+            out["dimension"] = {0: "minecraft:overworld", -1: "minecraft:the_nether", 1: "minecraft:the_end"}.get(dim, dim)
+        for src, dst in (("Health", "health"), ("foodLevel", "food"), ("XpLevel", "xp_level")):
+            if src in nbt:
+                out[dst] = nbt[src]
+        return out
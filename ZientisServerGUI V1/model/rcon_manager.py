@@ -1,37 +1,215 @@
-from mcrcon import MCRcon
+import re
+import socket
+import struct
+import threading
+
+# 批次操作：動作 -> 指令樣板
+BULK_ACTIONS = {
+    "kick": "kick {name} {reason}",
+    "ban": "ban {name} {reason}",
+    "pardon": "pardon {name}",
+    "whitelist_add": "whitelist add {name}",
+    "whitelist_remove": "whitelist remove {name}",
+}
+
+# 原版/Paper 常見的失敗回應
+FAILURE_RE = re.compile(
+    r"(no player was found|does not exist|unknown or incomplete|nothing changed|"
+    r"is not banned|already|not whitelisted|could not|failed|error)",
+    re.IGNORECASE,
+)
+
+_COLOR_RE = re.compile(r"§.")
+# Paper mspt：最近 5s、10s、1m 各一組 avg/min/max
+_MSPT_RE = re.compile(r"([\d.]+)/([\d.]+)/([\d.]+)")
+# 原版 1.20.3+ 的 tick query
+_TICK_AVG_RE = re.compile(r"Average time per tick: ([\d.]+) ?ms")
+_TICK_PCT_RE = re.compile(r"P(50|95|99): ([\d.]+) ?ms")
+
+
+def parse_tps(resp):
+    """Paper/Spigot 的 tps 回應 → [1m, 5m, 15m]，無法解析時回傳 None"""
+    text = _COLOR_RE.sub("", resp or "")
+    if "TPS" not in text:
+        return None
+    values = [float(v) for v in re.findall(r"\*?(\d+(?:\.\d+)?)", text.rsplit(":", 1)[-1])]
+    return values[:3] or None
+
+
+def parse_mspt(resp):
+    """
+    Paper mspt 或原版 tick query 的回應 → {"avg", "min", "max"}（Paper，取最近 5 秒）
+    或 {"avg", "p50", "p95", "p99"}（原版）；無法解析時回傳 None
+    """
+    text = _COLOR_RE.sub("", resp or "")
+    m = _MSPT_RE.search(text)
+    if m:
+        return {"avg": float(m.group(1)), "min": float(m.group(2)), "max": float(m.group(3))}
+    m = _TICK_AVG_RE.search(text)
+    if m:
+        result = {"avg": float(m.group(1))}
+        result.update({f"p{k}": float(v) for k, v in _TICK_PCT_RE.findall(text)})
+        return result
+    return None
+
 
 class RconManager:
-    def __init__(self, host, port, password):
+    """
+    Source RCON 用戶端（直接使用 socket）。mcrcon 在非 Windows 平台建構時會註冊 SIGALRM，
+    只能在主執行緒使用；這裡不用 signal，任何執行緒都能連線，同一條連線以鎖保護。
+    """
+    def __init__(self, host, port, password, timeout=10):
         self.host = host
         self.port = port
         self.password = password
-        self.mcr = None
+        self.timeout = timeout
+        self.sock = None
+        self.lock = threading.RLock()
+        self._next_id = 1000
+
+    @property
+    def connected(self):
+        return self.sock is not None
 
     def connect(self):
-        try:
-            if self.mcr is None:
-                self.mcr = MCRcon(self.host, self.password, port=self.port)
-                self.mcr.connect()
-        except Exception as e:
-            self.mcr = None
-            raise e
+        with self.lock:
+            if self.sock is not None:
+                return
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            try:
+                sock.sendall(self._pack(1, 3, self.password))
+                while True:
+                    rid, _ = self._recv_packet(sock)
+                    if rid == -1:
+                        raise PermissionError("RCON 密碼錯誤")
+                    if rid == 1:       # 部分伺服器先回一個空的 RESPONSE_VALUE，再回認證結果
+                        break
+            except Exception:
+                sock.close()
+                raise
+            self.sock = sock
 
     def disconnect(self):
-        if self.mcr:
+        with self.lock:
+            if self.sock is not None:
+                try:
+                    self.sock.close()
+                except OSError:
+                    pass
+                self.sock = None
+
+    def run_command(self, cmd):
+        with self.lock:
             try:
-                self.mcr.disconnect()
+                if self.sock is None:
+                    self.connect()
+                return self._exchange(cmd, self.timeout)
             except Exception:
-                pass
-            self.mcr = None
+                self.disconnect()
+                raise
 
-    def run_command(self, cmd):
+    def run_commands(self, cmds, progress=None, timeout=10):
+        """
+        在同一條連線上依序執行多條指令（省去每條指令重新連線與搶鎖）。
+        原版/Paper 每次只讀一個封包，一次送多個會被斷線，因此逐條送出並讀完回應後才送下一條。
+        回傳各指令的回應（失敗的項目為 Exception）。
+        progress: (已完成數, 總數) 的回呼
+        """
+        results = []
+        total = len(cmds)
+        with self.lock:
+            for cmd in cmds:
+                try:
+                    results.append(self._exchange(cmd, timeout))
+                except Exception as e:
+                    self.disconnect()
+                    results.append(e)
+                if progress:
+                    progress(len(results), total)
+        return results
+
+    def _exchange(self, cmd, timeout):
+        """
+        送出一條指令並讀取完整回應。超過 4096 位元組的回應會分成多個封包，
+        所以收到第一個封包後再送一個哨兵封包（type 0，伺服器回 "Unknown request"），
+        收到哨兵的回應即代表前面的分段都已收齊。
+        """
+        if self.sock is None:
+            self.connect()
+        sock = self.sock
+        rid = self._next_id
+        sentinel = rid + 1
+        self._next_id = sentinel + 1 if sentinel < 2**30 else 1000
+        old_timeout = sock.gettimeout()
+        sock.settimeout(timeout)
         try:
-            if self.mcr is None:
-                self.connect()
-            return self.mcr.command(cmd)
-        except Exception as e:
-            self.disconnect()
-            raise e
+            sock.sendall(self._pack(rid, 2, cmd))
+            parts = []
+            got, data = self._recv_packet(sock)
+            if got == -1:
+                raise PermissionError("RCON 認證失敗")
+            parts.append(data)
+            sock.sendall(self._pack(sentinel, 0, ""))
+            while True:
+                got, data = self._recv_packet(sock)
+                if got == sentinel:
+                    break
+                if got == rid:
+                    parts.append(data)
+        finally:
+            sock.settimeout(old_timeout)
+        return "".join(parts)
+
+    @staticmethod
+    def _pack(req_id, req_type, text):
+        payload = struct.pack("<ii", req_id, req_type) + text.encode("utf8") + b"\x00\x00"
+        return struct.pack("<i", len(payload)) + payload
+
+    @staticmethod
+    def _recv_exact(sock, length):
+        data = bytearray()
+        while len(data) < length:
+            chunk = sock.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError("RCON 連線中斷")
+            data += chunk
+        return bytes(data)
+
+    def _recv_packet(self, sock):
+        (length,) = struct.unpack("<i", self._recv_exact(sock, 4))
+        payload = self._recv_exact(sock, length)
+        rid, _ = struct.unpack("<ii", payload[:8])
+        return rid, payload[8:-2].decode("utf8", errors="replace")
+
+    def bulk_action(self, action, names, reason="", progress=None):
+        """
+        對多名玩家執行同一個管理動作，回傳 [(name, 成功與否, 訊息)]。
+        """
+        template = BULK_ACTIONS[action]
+        cmds = [template.format(name=n, reason=reason).strip() for n in names]
+        return [self.classify_response(n, r) for n, r in zip(names, self.run_commands(cmds, progress=progress))]
+
+    @staticmethod
+    def classify_response(name, resp):
+        if isinstance(resp, Exception):
+            return name, False, str(resp)
+        text = re.sub(r"§.", "", resp or "").strip()
+        return name, not FAILURE_RE.search(text), text
+
+    def kick_player(self, name, reason=""):
+        return self.run_command(f"kick {name} {reason}".strip())
+
+    def ban_player(self, name, reason=""):
+        return self.run_command(f"ban {name} {reason}".strip())
+
+    def pardon_player(self, name):
+        return self.run_command(f"pardon {name}")
+
+    def whitelist_add(self, name):
+        return self.run_command(f"whitelist add {name}")
+
+    def whitelist_remove(self, name):
+        return self.run_command(f"whitelist remove {name}")
 
     def reset_plugman_cache(self):
         self._plugman_available = None
@@ -52,6 +230,16 @@ class RconManager:
     def disable_plugin(self, plugin_name):
         return self.run_command(f"plugman disable {plugin_name}")
 
+    def get_tps(self):
+        return parse_tps(self.run_command("tps"))
+
+    def get_mspt(self):
+        """優先使用 Paper 的 mspt，沒有時改用原版的 tick query"""
+        result = parse_mspt(self.run_command("mspt"))
+        if result is None:
+            result = parse_mspt(self.run_command("tick query"))
+        return result
+
     def get_online_players(self):
         resp = self.run_command("list")
         if isinstance(resp, str) and "There are" in resp:
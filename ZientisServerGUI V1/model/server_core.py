@@ -0,0 +1,842 @@
+import os
+import time
+import platform
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from model.backup_manager import BackupManager
+from model.rcon_manager import RconManager
+from model.log_index import LogIndex, DEFAULT_CAPACITY
+from model.lag_tracker import LagTracker
+from model.trigger_engine import TriggerEngine
+from model.tps_monitor import TpsMonitor
+from model.boot_profiler import BootProfiler, BootHistory
+from model.server_lifecycle import ServerLifecycle, STARTING, STOPPING, STOPPED, CRASHED, STATE_TEXT
+from model.supervisor_client import SupervisorClient, launch_supervisor, find_supervisor
+from utils.jvm_flags import split_args, generate_flags, gc_fallback_warning, java_version, host_info
+from utils.log_buffer import LogBuffer
+from utils.log_parser import LogParser, LogRecord
+from utils.log_tail import LogTailer
+from utils.logger import log_info, log_error
+from utils.stream_lines import LineSplitter, READ_BLOCK, console_encoding, encode_command
+
+# 每秒處理日誌的次數（核心排程與 GUI 主控台更新共用，設定 console_fps 可覆寫）
+CONSOLE_FPS = 20
+
+
+def build_launch_command(cfg, java_major=None):
+    """
+    依設定組出 Java 啟動指令（GUI 與 daemon 共用）。
+    使用者參數中的 JVM 參數（-X、-D…）放在 -jar 之前、產生的參數之後（同名時以使用者為準），
+    其餘當作伺服器參數放在核心之後。java_major 未提供且需要時會執行 java -version（有快取）。
+    """
+    java = cfg.get("java_path") or "java"
+    xmx = int(cfg.get("xmx", 4096))
+    jvm_args, server_args = split_args(str(cfg.get("args", "")))
+    profile = cfg.get("jvm_profile", "manual")
+    generated = []
+    if profile != "manual":
+        if java_major is None:
+            java_major = java_version(java)
+        generated = generate_flags(profile, xmx, java_major, host_info(),
+                                   cfg.get("large_pages", "auto"), bool(cfg.get("jvm_pretouch", True)))
+    return (
+        [java, f"-Xms{int(cfg.get('xms', 1024))}M", f"-Xmx{xmx}M"] + generated + jvm_args
+        + ["-jar", cfg.get("core_path", "")] + server_args + ["nogui"]
+    )
+
+
+def read_stream(stream, buffer, encoding="auto", block_size=READ_BLOCK, mode="block", on_lines=None):
+    """
+    以大區塊讀取伺服器輸出，解析後整批寫入 LogBuffer，直到串流結束。
+    read1 只做一次底層讀取：有多少拿多少，不會等滿 block_size；mode="line" 時改為逐行讀取。
+    每行記下讀到的時間（arrived），之後整批處理時開機分析與延遲統計才有正確的時間。
+    on_lines(原始行 list) 在寫入 LogBuffer 之前呼叫（封存用，不受緩衝區丟行影響）。
+    """
+    splitter = LineSplitter(encoding)
+    parse = LogParser().parse
+    read = stream.readline if mode == "line" else (lambda: stream.read1(block_size))
+    while True:
+        data = read()
+        if not data:
+            break
+        lines = splitter.feed(data)
+        if lines:
+            if on_lines is not None:
+                on_lines(lines)
+            now = time.time()
+            buffer.push_many([parse(line, now) for line in lines])
+    rest = splitter.flush()
+    if rest:
+        if on_lines is not None:
+            on_lines(rest)
+        now = time.time()
+        buffer.push_many([parse(line, now) for line in rest])
+
+
+def find_server_process(folder):
+    """找出工作目錄為伺服器資料夾的 java 程序，找不到回傳 None"""
+    target = os.path.normcase(os.path.abspath(folder))
+    for proc in psutil.process_iter(["name", "cwd"]):
+        try:
+            name = (proc.info["name"] or "").lower()
+            cwd = proc.info["cwd"]
+            if "java" in name and cwd and os.path.normcase(os.path.abspath(cwd)) == target:
+                return proc
+        except (psutil.Error, OSError):
+            continue
+    return None
+
+
+class AttachedProcess:
+    """
+    附加模式的伺服器（systemd、screen 或其他程式啟動的）：以 psutil 追蹤程序，
+    提供與 subprocess.Popen 相同的 poll/terminate/kill；找不到程序時視為一直存活，直到中斷附加。
+    沒有 stdin，指令改走 RCON。
+    """
+    def __init__(self, proc):
+        self.proc = proc
+        self.pid = proc.pid if proc is not None else None
+        self.returncode = None
+
+    def poll(self):
+        if self.proc is None or self.returncode is not None:
+            return self.returncode
+        try:
+            if self.proc.is_running() and self.proc.status() != psutil.STATUS_ZOMBIE:
+                return None
+        except psutil.Error:
+            pass
+        self.returncode = 0      # 不是本程式的子程序，取不到真正的結束代碼
+        return self.returncode
+
+    def terminate(self):
+        if self.proc is not None:
+            self.proc.terminate()
+
+    def kill(self):
+        if self.proc is not None:
+            self.proc.kill()
+
+
+class SharedPools:
+    """RCON、備份、指標共用的執行緒池；多個 ServerCore 共用同一組時執行緒數不隨實例數成長"""
+    def __init__(self, rcon_workers=1, backup_workers=1, metrics_workers=1):
+        self.rcon = ThreadPoolExecutor(rcon_workers, thread_name_prefix="CoreRcon")
+        self.backup = ThreadPoolExecutor(backup_workers, thread_name_prefix="CoreBackup")
+        self.metrics = ThreadPoolExecutor(metrics_workers, thread_name_prefix="CoreMetrics")
+
+    def shutdown(self):
+        for pool in (self.rcon, self.backup, self.metrics):
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ServerCore:
+    """
+    不依賴 Qt 的伺服器控制核心，GUI、daemon 與多實例共用：
+    啟停（預設透過監管程序）、附加、指令、日誌管線（觸發規則、延遲追蹤、索引）、
+    RCON、玩家、TPS、插件、備份與指標。耗時的動作都在背景執行緒進行，呼叫端不會被卡住。
+    pools 為 None 時自備執行緒池；由 InstanceManager 管理時傳入共用的 SharedPools。
+
+    listeners 中的 callback(事件, 資料) 在背景執行緒被呼叫（GUI 需自行轉回主執行緒）：
+    "records" 本批日誌、"backlog" 接回監管程序時重播的日誌（只供顯示）、"state" (舊, 新)、"rcon" 是否可用、"players" 線上名單、
+    "tps" (取樣, 警示事件)、"boot" 開機 profile、"backup" (路徑, 錯誤)、
+    "message" (文字, 是否錯誤)、"start_failed" 錯誤訊息。
+    """
+    PLAYER_INTERVAL = 3
+    RCON_RETRY = 2
+
+    def __init__(self, config, pools=None, name=""):
+        self.config = config
+        self.name = name
+        self._tag = f"[{name}] " if name else ""
+        self.pools = pools or SharedPools()
+        self._own_pools = pools is None
+        self.folder = config.get("folder", "")
+        self.lock = threading.RLock()
+        self.process = None            # subprocess.Popen、SupervisorClient 或 AttachedProcess
+        self.lifecycle = ServerLifecycle.from_config(config)
+        self.lifecycle.listeners.append(self._on_state_changed)
+        self.started_at = None
+        self.encoding = console_encoding(config.get("console_encoding", "auto"))
+        self.log_buffer = LogBuffer()
+        self.log_index = LogIndex(int(config.get("console_index_lines", DEFAULT_CAPACITY)))
+        self.lag_tracker = LagTracker()
+        self.boot_profiler = BootProfiler(BootHistory(), instance=name)
+        self.trigger_engine, errors = TriggerEngine.from_config(config.get("triggers", []))
+        for err in errors:
+            log_error(f"{self._tag}觸發規則錯誤: {err}")
+        self.rcon_mgr = RconManager(
+            config.get("rcon_host", "127.0.0.1"),
+            int(config.get("rcon_port", 25575)),
+            config.get("rcon_pass", ""),
+        )
+        self.rcon_ready = False
+        self._rcon_due = None          # 下次嘗試連線 RCON 的時間，None 代表不需連線
+        self._rcon_attempts = 0
+        self._rcon_busy = False        # 執行緒池中已有此實例的 RCON 工作
+        self._players_due = 0
+        self.players = []
+        self.tps_monitor = TpsMonitor.from_config(config)
+        self.backup_mgr = self._backup_manager(config)
+        self.backup_running = False
+        self.last_backup = None
+        self.last_metrics = {}
+        self.listeners = []            # callback(事件, 資料)
+        self.archive = None            # 有 write_many(lines) 的封存（ArchiveWriter），在讀取執行緒寫入
+        self._stop = threading.Event()
+        self._tail_stop = None         # 附加模式追蹤 latest.log 的停止旗標
+        self._reconnect_due = 0        # 監管程序連線中斷時下次重新連線的時間
+        self._overrides = {}           # 上次 start() 的啟動覆寫
+        self._proc_stats = None        # psutil.Process（保留以取得正確的 cpu_percent）
+
+    @staticmethod
+    def _backup_manager(config):
+        world = config.get("world", "")
+        return BackupManager(world, config.get("backup_dir") or os.path.join(os.getcwd(), "backups")) if world else None
+
+    def apply_config(self, config):
+        """
+        套用新的設定（GUI 儲存設定時）：觸發規則、備份、RCON 與停止參數立即生效；
+        伺服器資料夾與主控台編碼在伺服器停止時才更換。
+        """
+        with self.lock:
+            self.config = config
+            if not self.lifecycle.active:
+                self.folder = config.get("folder", "")
+                self.encoding = console_encoding(config.get("console_encoding", "auto"))
+            fresh = ServerLifecycle.from_config(config)
+            for key in ("grace", "save_extend", "term_grace", "restart_on_crash", "restart_delay", "restart_max"):
+                setattr(self.lifecycle, key, getattr(fresh, key))
+            self.trigger_engine, errors = TriggerEngine.from_config(config.get("triggers", []))
+            self.backup_mgr = self._backup_manager(config)
+            rcon = (config.get("rcon_host", "127.0.0.1"), int(config.get("rcon_port", 25575)), config.get("rcon_pass", ""))
+            if rcon != (self.rcon_mgr.host, self.rcon_mgr.port, self.rcon_mgr.password):
+                self.rcon_mgr.disconnect()
+                self.rcon_mgr = RconManager(*rcon)
+                if self.rcon_ready:
+                    self.rcon_lost()
+        for err in errors:
+            log_error(f"{self._tag}觸發規則錯誤: {err}")
+
+    def _emit(self, event, data=None):
+        for cb in list(self.listeners):
+            try:
+                cb(event, data)
+            except Exception as e:
+                print(f"[DEBUG] {self._tag}listener {event} exception: {e}")
+
+    def _message(self, text, is_error=False):
+        self._emit("message", (text, is_error))
+
+    def _archive_lines(self, lines):
+        archive = self.archive
+        if archive is not None:
+            archive.write_many(lines)
+
+    # ========== 排程 ==========
+    def run_background(self):
+        """接回監管中的伺服器並啟動自己的排程執行緒（每個實例一條，互不拖累）"""
+        self.reattach()
+        self._spawn(self._tick_loop, "CoreTick")
+
+    def reattach(self):
+        """若上次的伺服器仍在監管程序中就接回，回傳是否接回"""
+        state = find_supervisor(self.folder) if self.folder else None
+        if state is None or self.lifecycle.active:
+            return False
+        try:
+            self._connect_supervisor(state)
+        except Exception as e:
+            log_error(f"{self._tag}無法連線到監管程序: {e}")
+            return False
+        self.lifecycle.adopt()
+        log_info(f"{self._tag}已接回監管中的伺服器 PID {self.process.pid}")
+        self._message(f"已重新連線到監管中的伺服器（PID {self.process.pid}），重播最近的日誌")
+        self._schedule_rcon()
+        return True
+
+    def shutdown(self):
+        """結束核心（伺服器若由監管程序持有或為附加模式則繼續執行）"""
+        self._stop.set()
+        if self.supervised:
+            self.process.disconnect()
+        if self._tail_stop is not None:
+            self._tail_stop.set()
+        self.rcon_mgr.disconnect()
+        if self._own_pools:
+            self.pools.shutdown()
+
+    def wait_stopped(self, timeout):
+        """等待伺服器結束（由排程執行緒推進停止流程），逾時回傳 False"""
+        deadline = time.time() + timeout
+        while self.lifecycle.active:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.2)
+        return True
+
+    @staticmethod
+    def _spawn(target, name, *args):
+        t = threading.Thread(target=target, args=args, daemon=True, name=name)
+        t.start()
+        return t
+
+    def _tick_loop(self):
+        interval = 1 / max(1, int(self.config.get("console_fps", CONSOLE_FPS)))
+        while not self._stop.wait(interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[DEBUG] {self._tag}tick exception: {e}")
+
+    def tick(self, now=None):
+        """處理暫存日誌、推進生命週期並排程 RCON 連線／玩家輪詢；不等待任何 I/O"""
+        now = now or time.time()
+        self.pump()
+        self._advance_lifecycle(now)
+        if not self.running:
+            return
+        proc = self.process
+        if isinstance(proc, SupervisorClient) and not proc.connected and now >= self._reconnect_due:
+            # 連線中斷但監管程序還在：在背景重新連線，不卡住排程
+            self._reconnect_due = now + 5
+            self.pools.rcon.submit(self._reconnect_supervisor, proc)
+        if self._rcon_busy:
+            return
+        if not self.rcon_ready:
+            if self._rcon_due is not None and now >= self._rcon_due:
+                self._submit_rcon(self._rcon_attempt)
+        elif now >= self._players_due:
+            self._players_due = now + self.PLAYER_INTERVAL
+            self._submit_rcon(self._poll_players)
+        elif self.tps_monitor.due(now):
+            self._submit_rcon(self._poll_tps)
+
+    def pump(self):
+        """處理暫存的日誌：開機分析、生命週期、觸發規則、延遲追蹤、寫入索引，再交給 listeners"""
+        records, dropped = self.log_buffer.drain()
+        if not records:
+            return
+        if dropped:
+            msg = f"…（處理過慢，略過 {dropped} 行）"
+            records.insert(0, LogRecord(None, None, "WARN", None, msg, msg))
+        feed_lifecycle = self.lifecycle.feed
+        lock = self.lock
+        feed_lag = self.lag_tracker.feed
+        match = self.trigger_engine.match
+        boot = self.boot_profiler
+        now = time.time()
+        for record in records:
+            t = record.arrived or now
+            if boot.active:
+                profile = boot.feed(record, t)
+                if profile:
+                    log_info(f"{self._tag}開機完成，耗時 {profile['total']:.1f} 秒")
+                    self._emit("boot", profile)
+            with lock:      # 與 stop()/restart() 互斥，狀態轉換不會互相覆蓋
+                feed_lifecycle(record, t)
+            for rule, m in match(record):
+                self._run_trigger(rule, m, record)
+            feed_lag(record, t)
+        self.log_index.add_many(records)
+        self._emit("records", records)
+
+    # ========== 觸發規則 ==========
+    def _run_trigger(self, rule, match, record):
+        if rule.action == "rcon_ready":
+            if not self.rcon_ready and self._rcon_due is None:
+                self._schedule_rcon(delay=1.5)
+            return
+        log_info(f"{self._tag}觸發規則「{rule.name}」: {rule.action} ← {record.raw}")
+        if rule.action == "rcon":
+            if not self.rcon_ready:
+                self._message(f"觸發規則「{rule.name}」略過：RCON 未連線", True)
+                return
+            self.pools.rcon.submit(self._trigger_command, rule.expand(match))
+        elif rule.action == "notify":
+            self._notify(f"觸發：{rule.name}", record.message[:200])
+        elif rule.action == "backup":
+            ok, message = self.backup()
+            self._message(f"觸發規則「{rule.name}」：{'開始備份…' if ok else message}", not ok)
+        elif rule.action == "restart":
+            self._message(f"觸發規則「{rule.name}」：重啟伺服器", True)
+            self._notify("伺服器重啟", f"觸發規則「{rule.name}」")
+            self.restart()
+
+    def _notify(self, title, text):
+        try:
+            from utils.notification import notify
+            notify(f"{self._tag}{title}", text)
+        except Exception as e:      # 無桌面環境時沒有通知服務
+            print(f"[DEBUG] notify 失敗: {e}")
+
+    def _trigger_command(self, cmd):
+        try:
+            resp = self.rcon_mgr.run_command(cmd)
+        except Exception as e:
+            log_error(f"{self._tag}觸發指令失敗 {cmd}: {e}")
+            self._message(f"觸發指令失敗：{cmd}（{e}）", True)
+            return
+        self._message(f"[觸發] > {cmd}" + (f"\n{resp}" if resp else ""))
+
+    # ========== RCON ==========
+    def _schedule_rcon(self, delay=0.0, attempts=10):
+        self._rcon_attempts = attempts
+        self._rcon_due = time.time() + delay
+
+    def _submit_rcon(self, fn):
+        self._rcon_busy = True
+
+        def run():
+            try:
+                fn()
+            finally:
+                self._rcon_busy = False
+        self.pools.rcon.submit(run)
+
+    def _rcon_attempt(self):
+        """嘗試連線一次；失敗時排定下次重試，不佔用執行緒等待"""
+        try:
+            self.rcon_mgr.connect()
+            test = self.rcon_mgr.run_command("list")
+            if test and "There are" in test:
+                self.rcon_ready = True
+                self._rcon_due = None
+                self._players_due = 0
+                log_info(f"{self._tag}RCON 連線成功")
+                self._emit("rcon", True)
+                return
+        except Exception as e:
+            print(f"[DEBUG] {self._tag}RCON 連線失敗: {e}")
+            self.rcon_mgr.disconnect()
+        self._rcon_attempts -= 1
+        if self._rcon_attempts == 9:
+            self._message("RCON 連線失敗，將自動重試...", True)
+        if self._rcon_attempts > 0:
+            self._rcon_due = time.time() + self.RCON_RETRY
+        else:
+            self._rcon_due = None
+            log_error(f"{self._tag}RCON 初始化超時")
+            self._message("RCON 初始化超時，無法啟用 RCON 相關功能", True)
+
+    def rcon_lost(self, delay=1.0):
+        """RCON 斷線：停用相關功能並排定重新連線"""
+        self.rcon_ready = False
+        self.rcon_mgr.disconnect()
+        self.tps_monitor.reset()
+        self._emit("rcon", False)
+        if self.running:
+            self._schedule_rcon(delay)
+
+    def _poll_players(self):
+        try:
+            players = self.rcon_mgr.get_online_players()
+        except Exception as e:
+            print(f"[DEBUG] {self._tag}玩家名單更新失敗: {e}")
+            self._message(f"玩家名單更新失敗：{e}", True)
+            self.rcon_lost()
+            return
+        self.players = players
+        self.lag_tracker.record_players(len(players))
+        self._emit("players", players)
+
+    def _poll_tps(self):
+        monitor = self.tps_monitor
+        try:
+            sample = monitor.poll(self.rcon_mgr.run_command)
+        except Exception as e:
+            print(f"[DEBUG] {self._tag}TPS 查詢失敗: {e}")
+            sample = None
+        events = monitor.record(sample, players=len(self.players))
+        for name, change, text in events:
+            if change == "alert":
+                log_error(f"{self._tag}{text}")
+                self._notify("伺服器變慢", text)
+            else:
+                log_info(f"{self._tag}{text}")
+                self._notify("伺服器已恢復", text)
+        self._emit("tps", (sample, events))
+
+    # ========== 啟停與指令 ==========
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def supervised(self):
+        return isinstance(self.process, SupervisorClient)
+
+    @property
+    def attached(self):
+        return isinstance(self.process, AttachedProcess)
+
+    @property
+    def pid(self):
+        proc = self.process
+        return proc.pid if proc is not None and self.running else None
+
+    @property
+    def state(self):
+        return self.lifecycle.state
+
+    @property
+    def last_error(self):
+        return self.lifecycle.last_error
+
+    def _connect_supervisor(self, state, replay=True):
+        """
+        連線到監管程序。replay 為 True（接回既有的伺服器）時，連線時重播的積存日誌只補進索引與畫面；
+        剛由本程式啟動時積存的是本次的開機輸出，照常處理。
+        """
+        parse = LogParser().parse
+        buffer = self.log_buffer
+
+        def on_lines(lines, backlog):
+            if backlog and replay:
+                records = [parse(l) for l in lines]      # 重播的行不知道原本的時間
+                # 重播的積存日誌只補進索引與畫面，不再觸發規則、延遲統計、狀態機與封存
+                self.log_index.add_many(records)
+                self._emit("backlog", records)
+            else:
+                self._archive_lines(lines)
+                now = time.time()
+                buffer.push_many([parse(l, now) for l in lines])
+        client = SupervisorClient(state, on_lines)
+        client.connect()
+        with self.lock:
+            self.process = client
+            self.started_at = state.get("started_at") or time.time()
+
+    def _reconnect_supervisor(self, client):
+        try:
+            client.connect()
+        except Exception as e:
+            print(f"[DEBUG] {self._tag}監管程序重新連線失敗: {e}")
+
+    def start(self, overrides=None):
+        """
+        非同步啟動，回傳 (是否受理, 訊息)。
+        overrides 覆寫本次啟動用的欄位（GUI 傳入設定頁上尚未儲存的 Java、核心、參數與資料夾）。
+        """
+        with self.lock:
+            if not self.lifecycle.can_start or self.running:
+                return False, f"伺服器目前狀態：{self.lifecycle.describe()}"
+            if overrides is not None:
+                self._overrides = overrides     # 自動重啟沿用上次的覆寫
+            cfg = dict(self.config, **self._overrides)
+            self.folder = cfg.get("folder", "")
+            self.lifecycle.begin_start()
+            self.process = None
+        self._spawn(self._start, "CoreStart", cfg)
+        return True, "啟動中"
+
+    def _start(self, cfg):
+        try:
+            cmd = build_launch_command(cfg)     # 可能執行 java -version，因此在背景執行緒
+            profile = cfg.get("jvm_profile", "manual")
+            warning = profile == "zgc" and gc_fallback_warning(profile, java_version(cfg.get("java_path") or "java"))
+            if warning:
+                log_error(f"{self._tag}{warning}")
+                self._message(warning, True)
+            self.trigger_engine.reset_once()
+            self.rcon_ready = False
+            if cfg.get("use_supervisor", True):
+                try:
+                    state = launch_supervisor(cmd, self.folder, backlog=int(cfg.get("supervisor_backlog", 20000)))
+                except Exception as e:
+                    log_error(f"{self._tag}監管程序啟動失敗，改為直接啟動: {e}")
+                else:
+                    self._connect_supervisor(state, replay=False)
+                    log_info(f"{self._tag}伺服器啟動成功（監管模式）: {cmd}")
+                    self._message("伺服器已啟動（監管模式）")
+                    return
+            kwargs = {}
+            if platform.system() == "Windows":
+                kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+            proc = subprocess.Popen(cmd, cwd=self.folder, stdin=subprocess.PIPE,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, **kwargs)
+            with self.lock:
+                self.process = proc
+                self.started_at = time.time()
+            self._spawn(read_stream, "CoreReader", proc.stdout, self.log_buffer, self.encoding,
+                        int(cfg.get("console_read_kb", READ_BLOCK // 1024)) * 1024, cfg.get("console_reader", "block"),
+                        self._archive_lines)
+            log_info(f"{self._tag}伺服器啟動成功: {cmd}")
+            self._message("伺服器已啟動")
+        except Exception as e:
+            log_error(f"{self._tag}伺服器啟動失敗: {e}")
+            self._notify("伺服器啟動失敗", str(e))
+            with self.lock:
+                self.lifecycle.start_failed(e)
+            self._emit("start_failed", str(e))
+
+    # ========== 附加 ==========
+    def attach(self, backlog_bytes=64 * 1024):
+        """
+        附加到已在執行的伺服器：仍在監管程序中就重新連線，否則追蹤 logs/latest.log、
+        以 psutil 追蹤程序並連線 RCON。回傳 (是否成功, 訊息)。
+        """
+        if self.lifecycle.active:
+            return False, f"伺服器目前狀態：{self.lifecycle.describe()}"
+        if self.reattach():
+            return True, "已重新連線到監管中的伺服器"
+        log_path = os.path.join(self.folder, "logs", "latest.log")
+        if not self.folder or not os.path.isfile(log_path):
+            return False, f"找不到 {log_path}，無法附加。"
+        proc = find_server_process(self.folder)
+        if proc is None:
+            self._message("未偵測到伺服器程序，僅追蹤日誌並嘗試連線 RCON。", True)
+        tailer = LogTailer(log_path, backlog_bytes=backlog_bytes)
+        stop = threading.Event()
+        with self.lock:
+            self._tail_stop = stop
+            self.process = AttachedProcess(proc)
+            self.started_at = proc.create_time() if proc is not None else time.time()
+        self._spawn(self._tail_loop, "CoreTail", tailer, stop)
+        self.trigger_engine.reset_once()
+        self.lifecycle.adopt()
+        self._schedule_rcon()
+        pid = f"（PID {proc.pid}）" if proc is not None else ""
+        log_info(f"{self._tag}附加到伺服器: {log_path} {pid}")
+        return True, f"已附加到伺服器{pid}：{log_path}"
+
+    def _tail_loop(self, tailer, stop, interval=0.25):
+        splitter = LineSplitter(self.encoding)
+        parse = LogParser().parse
+        push_many = self.log_buffer.push_many
+        try:
+            while not stop.wait(interval):
+                for data in tailer.read():
+                    lines = splitter.feed(data)
+                    if lines:
+                        self._archive_lines(lines)
+                        now = time.time()
+                        push_many([parse(line, now) for line in lines])
+        except Exception as e:
+            print(f"[DEBUG] {self._tag}追蹤 latest.log 失敗: {e}")
+        finally:
+            tailer.close()
+
+    def detach(self):
+        """中斷附加或與監管程序的連線，伺服器本身不受影響"""
+        with self.lock:
+            proc = self.process
+            if isinstance(proc, SupervisorClient):
+                proc.disconnect()
+            if self._tail_stop is not None:
+                self._tail_stop.set()
+                self._tail_stop = None
+            self.process = None
+            old = self.lifecycle.state
+            self.lifecycle.release()
+        self._reset_connection()
+        self._emit("state", (old, STOPPED))
+
+    def stop(self):
+        """
+        非同步停止：送出 stop 後由 tick() 依寬限時間推進；停止中再呼叫一次則立即強制結束。
+        附加模式透過 RCON 送出 stop；RCON 未連線或不知道程序時只中斷附加。
+        """
+        with self.lock:
+            if not self.running:
+                if self.lifecycle.cancel_restart():
+                    return True, "已取消異常結束後的自動重啟"
+                return False, "伺服器未啟動"
+            if self.lifecycle.state == STOPPING:
+                self.lifecycle.force()
+                return True, "再次要求停止：不再等待存檔，強制結束伺服器"
+            if self.attached and not (self.rcon_ready and self.process.pid):
+                detach = True
+            else:
+                detach = False
+                self.lifecycle.request_stop()
+        if detach:
+            self.detach()
+            return True, "已中斷附加，伺服器不受影響。"
+        self._send_stop()
+        return True, "已送出停止指令，等待伺服器存檔…"
+
+    def restart(self):
+        """停止後在程序結束的那次 tick 立即啟動；未執行時直接啟動"""
+        with self.lock:
+            if not self.running:
+                return self.start()
+            if self.attached:
+                return False, "附加模式無法重啟"
+            sending = self.lifecycle.state != STOPPING
+            self.lifecycle.request_restart()
+        if sending:
+            self._send_stop()
+        return True, "重啟中：伺服器結束後立即重新啟動…"
+
+    def _send_stop(self):
+        try:
+            self.command("stop")
+        except Exception as e:
+            log_error(f"{self._tag}送出 stop 失敗: {e}")
+            with self.lock:
+                self.lifecycle.force()
+
+    def _advance_lifecycle(self, now):
+        # 狀態判斷與自動啟動都在鎖內：同時送來的 stop()/restart() 不會被這次 tick 覆蓋
+        with self.lock:
+            proc = self.process
+            alive = self.running
+            if self.lifecycle.state == STARTING and proc is None:
+                return     # 程序還在建立中
+            actions = self.lifecycle.tick(now, alive, None if alive or proc is None else proc.returncode)
+            if "start" in actions:
+                self.start()
+        for action in actions:
+            if action == "terminate":
+                log_error(f"{self._tag}伺服器停止逾時，強制終止")
+                proc.terminate()
+            elif action == "kill":
+                log_error(f"{self._tag}伺服器仍未結束，強制結束程序")
+                proc.kill()
+
+    def _on_state_changed(self, old, new):
+        log_info(f"{self._tag}伺服器狀態：{STATE_TEXT.get(old, old)} → {self.lifecycle.describe()}")
+        if new == STARTING:
+            self.boot_profiler.begin(label=self.config.get("boot_label", ""))
+        if new in (STOPPED, CRASHED):
+            self.boot_profiler.abort()
+            if self.supervised:
+                self.process.disconnect()
+            if self._tail_stop is not None:
+                self._tail_stop.set()
+                self._tail_stop = None
+            self._reset_connection()
+        if new == CRASHED:
+            log_error(f"{self._tag}伺服器異常結束: {self.lifecycle.describe()}")
+            self._notify("伺服器異常結束", self.lifecycle.describe())
+        self._emit("state", (old, new))
+
+    def _reset_connection(self):
+        was_ready = self.rcon_ready
+        self.rcon_ready = False
+        self._rcon_due = None
+        self.players = []
+        self.tps_monitor.reset()
+        self.rcon_mgr.disconnect()
+        if was_ready:
+            self._emit("rcon", False)
+
+    def command(self, line):
+        """送出主控台指令；附加模式沒有 stdin，改在背景透過 RCON 送出並以 "message" 回報回應"""
+        proc = self.process
+        if proc is None or proc.poll() is not None:
+            raise RuntimeError("伺服器未啟動")
+        if isinstance(proc, AttachedProcess):
+            if not self.rcon_ready:
+                raise RuntimeError("附加模式需透過 RCON 發送指令，RCON 尚未連線。")
+            self.pools.rcon.submit(self._rcon_command, line)
+        elif isinstance(proc, SupervisorClient):
+            proc.send_command(line)
+        else:
+            proc.stdin.write(encode_command(line, self.encoding))
+            proc.stdin.flush()
+
+    def _rcon_command(self, line):
+        try:
+            resp = self.rcon_mgr.run_command(line)
+        except Exception as e:
+            self._message(f"指令發送失敗：{e}", True)
+            if line == "stop":
+                with self.lock:
+                    self.lifecycle.force()
+            return
+        if resp:
+            self._message(resp)
+
+    # ========== 查詢 ==========
+    def status(self):
+        return {
+            "state": self.state,
+            "state_text": self.lifecycle.describe(),
+            "pid": self.pid,
+            "supervised": self.supervised,
+            "attached": self.attached,
+            "uptime": int(time.time() - self.started_at) if self.running and self.started_at else 0,
+            "rcon": self.rcon_ready,
+            "players": len(self.players),
+            "last_error": self.last_error,
+            "exit_code": self.lifecycle.exit_code,
+            "tps": (self.tps_monitor.latest or {}).get("tps"),
+            "mspt": (self.tps_monitor.latest or {}).get("mspt"),
+        }
+
+    def list_plugins(self):
+        from model.plugin_manager import PluginManager   # 用到時才載入（requests 載入較慢）
+        mgr = PluginManager(os.path.join(self.folder, "plugins"))
+        return [dict(file=jar, **mgr.parse_plugin_info(os.path.join(mgr.plugins_dir, jar)))
+                for jar in mgr.list_plugins()]
+
+    def plugin_action(self, action, name):
+        if not self.rcon_ready:
+            raise RuntimeError("RCON 未連線")
+        actions = {"reload": self.rcon_mgr.reload_plugin, "enable": self.rcon_mgr.enable_plugin,
+                   "disable": self.rcon_mgr.disable_plugin}
+        if action not in actions:
+            raise ValueError(f"未知的插件動作：{action}")
+        return actions[action](name)
+
+    def list_backups(self):
+        if not self.backup_mgr or not os.path.isdir(self.backup_mgr.backup_dir):
+            return []
+        return self.backup_mgr.list_backups()
+
+    def backup(self):
+        """背景建立備份，回傳 (是否受理, 訊息)；完成時送出 "backup" 事件"""
+        with self.lock:
+            if not self.backup_mgr:
+                return False, "未設定世界資料夾"
+            if self.backup_running:
+                return False, "備份進行中"
+            self.backup_running = True
+        self.pools.backup.submit(self._backup)
+        return True, "備份中"
+
+    def _backup(self):
+        self.lag_tracker.backup_started()
+        try:
+            path = self.backup_mgr.create_backup()
+            self.last_backup = {"file": os.path.basename(path), "time": time.time(), "error": None}
+            log_info(f"{self._tag}備份完成: {path}")
+        except Exception as e:
+            path = ""
+            self.last_backup = {"file": None, "time": time.time(), "error": str(e)}
+            log_error(f"{self._tag}備份失敗: {e}")
+            self._notify("備份失敗", str(e))
+        finally:
+            self.lag_tracker.backup_finished()
+            self.backup_running = False
+        self._emit("backup", (path, self.last_backup["error"]))
+
+    def metrics(self):
+        """目前的系統與程序指標（同時更新 last_metrics 供儀表板讀取）"""
+        data = {
+            "system_cpu": psutil.cpu_percent(),
+            "system_ram": psutil.virtual_memory().percent,
+            "log_lines": self.log_index.next_seq,
+            "lag": self.lag_tracker.summary(time.time() - 3600),
+            "lag_spikes": self.lag_tracker.correlate(since=time.time() - 3600, limit=10),
+        }
+        pid = self.pid
+        if pid:
+            try:
+                if self._proc_stats is None or self._proc_stats.pid != pid:
+                    self._proc_stats = psutil.Process(pid)
+                p = self._proc_stats
+                with p.oneshot():
+                    data["process_cpu"] = p.cpu_percent()
+                    data["process_rss_mb"] = round(p.memory_info().rss / 1024 / 1024, 1)
+                    data["process_threads"] = p.num_threads()
+            except psutil.Error:
+                pass
+        self.last_metrics = data
+        return data
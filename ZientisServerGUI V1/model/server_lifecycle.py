@@ -0,0 +1,216 @@
+import re
+import time
+
+STOPPED = "stopped"
+STARTING = "starting"
+RUNNING = "running"
+STOPPING = "stopping"
+CRASHED = "crashed"
+
+STATE_TEXT = {STOPPED: "已停止", STARTING: "啟動中", RUNNING: "執行中", STOPPING: "停止中", CRASHED: "異常結束"}
+
+# 啟動完成：Done (12.345s)! For help, type "help"
+_DONE_RE = re.compile(r"Done \([\d.,]+s\)!")
+# 伺服器自己印出的停止訊息（整行比對，玩家聊天 "<Steve> Stopping server" 不算）
+_STOP_RE = re.compile(r"Stopping (?:the )?server")
+# 停止過程中的存檔進度；出現時代表伺服器仍在工作，寬限時間往後延
+_SAVE_RE = re.compile(
+    r"Stopping server|Saving players|Saving worlds|Saving chunks for level '([^']*)'|"
+    r"All (?:chunks|dimensions) are saved|Closing Server|Stopping the server",
+)
+
+
+class ServerLifecycle:
+    """
+    伺服器生命週期狀態機（不依賴 Qt，也不自己開執行緒）：
+    由擁有者把日誌交給 feed()、定期呼叫 tick(now, alive)，依回傳的動作
+    （"terminate" / "kill" / "start"）操作程序，因此停止與重啟都不會卡住呼叫端。
+
+    停止流程：request_stop() 後等待 grace 秒；期間每看到一行存檔進度就至少再給 save_extend 秒，
+    大型世界存檔不會被提前強制結束。逾時先 terminate，再過 term_grace 秒仍未結束才 kill。
+    重啟：request_restart() 在舊程序一結束的那次 tick 就回傳 "start"，不用猜要等幾秒。
+    異常結束自動重啟（restart_on_crash）：等待 restart_delay 秒、每次加倍，連續 restart_max 次後放棄；
+    伺服器穩定執行 restart_reset 秒或使用者手動停止後重新計算。
+    """
+    def __init__(self, grace=60, save_extend=30, term_grace=15, restart_on_crash=False,
+                 restart_delay=10, restart_max=3, restart_reset=600):
+        self.grace = grace
+        self.save_extend = save_extend
+        self.term_grace = term_grace
+        self.restart_on_crash = restart_on_crash
+        self.restart_delay = restart_delay
+        self.restart_max = restart_max
+        self.restart_reset = restart_reset
+        self.crash_restarts = 0        # 連續自動重啟次數
+        self.restart_at = None         # 排定的自動重啟時間
+        self.state = STOPPED
+        self.since = time.time()
+        self.restart_pending = False
+        self.save_progress = ""
+        self.exit_code = None
+        self.last_error = None
+        self._deadline = None
+        self._escalation = None       # None / "terminate" / "kill"：已送出的強制手段
+        self.listeners = []           # callback(舊狀態, 新狀態)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            grace=float(config.get("stop_grace_seconds", 60)),
+            save_extend=float(config.get("stop_save_extend_seconds", 30)),
+            term_grace=float(config.get("stop_term_seconds", 15)),
+            restart_on_crash=bool(config.get("restart_on_crash", False)),
+            restart_delay=float(config.get("crash_restart_delay", 10)),
+            restart_max=int(config.get("crash_restart_max", 3)),
+        )
+
+    # ========== 狀態 ==========
+    def _set(self, state, now=None):
+        old, self.state = self.state, state
+        self.since = time.time() if now is None else now
+        if old != state:
+            for cb in list(self.listeners):
+                cb(old, state)
+
+    @property
+    def active(self):
+        """程序應該存在的狀態"""
+        return self.state in (STARTING, RUNNING, STOPPING)
+
+    @property
+    def can_start(self):
+        return self.state in (STOPPED, CRASHED)
+
+    def describe(self):
+        text = STATE_TEXT.get(self.state, self.state)
+        if self.state == STOPPING and self.save_progress:
+            text += f"（{self.save_progress}）"
+        elif self.state == CRASHED:
+            if self.exit_code is not None:
+                text += f"（代碼 {self.exit_code}）"
+            if self.restart_at is not None:
+                text += f"，{max(0, self.restart_at - time.time()):.0f} 秒後自動重啟"
+        return text
+
+    # ========== 事件 ==========
+    def begin_start(self, now=None):
+        if not self.can_start:
+            return False
+        self.restart_pending = False
+        self.restart_at = None
+        self.exit_code = None
+        self.last_error = None
+        self.save_progress = ""
+        self._deadline = None
+        self._escalation = None
+        self._set(STARTING, now)
+        return True
+
+    def start_failed(self, error, now=None):
+        self.last_error = str(error)
+        self.restart_pending = False
+        self._set(STOPPED, now)
+
+    def adopt(self, now=None):
+        """接回已在執行的伺服器（附加、監管程序重新連線）"""
+        self.restart_pending = False
+        self._deadline = None
+        self._escalation = None
+        self._set(RUNNING, now)
+
+    def release(self, now=None):
+        """不再管理伺服器（中斷附加）：直接回到已停止，不視為結束事件、不通知 listeners"""
+        self.restart_pending = False
+        self._deadline = None
+        self._escalation = None
+        self.state = STOPPED
+        self.since = time.time() if now is None else now
+
+    @staticmethod
+    def _from_server(record):
+        """主執行緒的輸出（Paper 格式沒有執行緒名稱）；聊天來自玩家名稱開頭的訊息"""
+        return record.thread in (None, "Server thread") and not record.message.startswith("<")
+
+    def feed(self, record, now=None):
+        msg = record.message
+        if self.state == STARTING:
+            if "Done (" in msg and _DONE_RE.search(msg):
+                self._set(RUNNING, now)
+        elif self.state == RUNNING:
+            # 在主控台或遊戲內直接輸入 /stop：照正常停止處理，不算異常結束
+            if "Stopping" in msg and _STOP_RE.fullmatch(msg.strip()) and self._from_server(record):
+                self.request_stop(now, manual=False)
+        if self.state == STOPPING and self._from_server(record):
+            m = _SAVE_RE.search(msg)
+            if m:
+                now = time.time() if now is None else now
+                self.save_progress = f"存檔中：{m.group(1)}" if m.group(1) else msg.strip()[:60]
+                if self._escalation is None:
+                    self._deadline = max(self._deadline or now, now + self.save_extend)
+
+    def request_stop(self, now=None, manual=True):
+        """開始停止；呼叫端接著送出 stop 指令。已在停止中時回傳 False"""
+        if manual:
+            self.crash_restarts = 0
+            self.restart_at = None
+        if self.state not in (STARTING, RUNNING):
+            return False
+        now = time.time() if now is None else now
+        self._deadline = now + self.grace
+        self._escalation = None
+        self.save_progress = ""
+        self._set(STOPPING, now)
+        return True
+
+    def request_restart(self, now=None):
+        self.restart_pending = True
+        return self.request_stop(now) or self.state == STOPPING
+
+    def _schedule_crash_restart(self, now):
+        if now - self.since >= self.restart_reset:      # 這次已穩定執行一段時間，重新計算
+            self.crash_restarts = 0
+        if self.crash_restarts >= self.restart_max:
+            self.last_error = f"連續異常結束 {self.crash_restarts} 次，已停止自動重啟"
+            return
+        self.restart_at = now + self.restart_delay * 2 ** self.crash_restarts
+        self.crash_restarts += 1
+
+    def cancel_restart(self):
+        """取消排定的異常自動重啟（等待中按下停止），回傳是否有排定"""
+        pending = self.restart_at is not None
+        self.restart_at = None
+        self.crash_restarts = 0
+        return pending
+
+    def force(self, now=None):
+        """停止中再次要求停止：不再等寬限時間"""
+        if self.state == STOPPING:
+            self._deadline = time.time() if now is None else now
+
+    def tick(self, now, alive, exit_code=None):
+        """依時間與程序是否存活推進狀態，回傳需要執行的動作 list"""
+        if not alive:
+            if not self.active:
+                if self.restart_at is not None and now >= self.restart_at:
+                    self.restart_at = None
+                    return ["start"]
+                return []
+            self.exit_code = exit_code
+            crashed = self.state != STOPPING
+            self._deadline = None
+            if crashed and self.restart_on_crash and not self.restart_pending:
+                self._schedule_crash_restart(now)
+            self._set(CRASHED if crashed else STOPPED, now)
+            if self.restart_pending:
+                self.restart_pending = False
+                return ["start"]
+            return []
+        if self.state != STOPPING or self._deadline is None or now < self._deadline:
+            return []
+        if self._escalation is None:
+            self._escalation = "terminate"
+            self._deadline = now + self.term_grace
+            return ["terminate"]
+        self._escalation = "kill"
+        self._deadline = None
+        return ["kill"]
@@ -0,0 +1,123 @@
+import os
+import json
+
+
+class ServerListIndex:
+    """
+    將伺服器資料夾內的 usercache / whitelist / ops / 封禁名單載入成記憶體索引。
+    refresh() 只重新讀取有變動（mtime 或大小不同）的檔案，查詢皆為 O(1)。
+    建立後需先呼叫一次 refresh()（第一次會回報全部檔案皆有變動）。
+    """
+    FILES = {
+        "usercache": "usercache.json",
+        "whitelist": "whitelist.json",
+        "ops": "ops.json",
+        "banned_players": "banned-players.json",
+        "banned_ips": "banned-ips.json",
+    }
+
+    def __init__(self, server_folder):
+        self.server_folder = server_folder
+        self._stamps = {}               # key -> (mtime_ns, size)
+        self.names = {}                 # key -> {name(lower): uuid}，各來源各自一份
+        self.uuid_names = {}            # uuid -> 最新名稱（由各來源合併）
+        self._uuid_names = {}           # key -> {uuid: 名稱}，各來源各自一份
+        self.whitelist = set()          # uuid
+        self.ops = {}                   # uuid -> op 等級
+        self.banned_players = {}        # uuid -> 封禁資料
+        self.banned_ips = {}            # ip -> 封禁資料
+
+    def _load_json(self, key):
+        path = os.path.join(self.server_folder, self.FILES[key])
+        try:
+            st = os.stat(path)
+        except OSError:
+            if key in self._stamps:
+                del self._stamps[key]
+                return []
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._stamps.get(key) == stamp:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            # 伺服器寫檔途中可能讀到不完整內容，下次再試
+            print(f"[DEBUG] 讀取 {self.FILES[key]} 失敗: {e}")
+            return None
+        self._stamps[key] = stamp
+        return data if isinstance(data, list) else []
+
+    def refresh(self):
+        """重新載入有變動的檔案，回傳變動的項目名稱集合"""
+        changed = set()
+        for key in self.FILES:
+            data = self._load_json(key)
+            if data is None:
+                continue
+            changed.add(key)
+            if key == "banned_ips":
+                self.banned_ips = {e["ip"]: e for e in data if e.get("ip")}
+                continue
+            entries = [e for e in data if e.get("uuid")]
+            self.names[key] = {e["name"].lower(): e["uuid"] for e in entries if e.get("name")}
+            self._uuid_names[key] = {e["uuid"]: e["name"] for e in entries if e.get("name")}
+            if key == "whitelist":
+                self.whitelist = {e["uuid"] for e in entries}
+            elif key == "ops":
+                self.ops = {e["uuid"]: e.get("level", 4) for e in entries}
+            elif key == "banned_players":
+                self.banned_players = {e["uuid"]: e for e in entries}
+        if changed - {"banned_ips"}:
+            # 依目前的檔案重建，已從名單移除的 uuid 不會殘留
+            uuid_names = {}
+            for key in self.FILES:
+                uuid_names.update(self._uuid_names.get(key, {}))
+            self.uuid_names = uuid_names
+        return changed
+
+    # ========== 查詢 ==========
+    def uuid_for(self, name):
+        lowered = name.lower()
+        for key in ("usercache", "whitelist", "ops", "banned_players"):
+            uuid = self.names.get(key, {}).get(lowered)
+            if uuid:
+                return uuid
+        return None
+
+    def name_for(self, uuid):
+        return self.uuid_names.get(uuid)
+
+    def is_whitelisted(self, name):
+        uuid = self.uuid_for(name)
+        return uuid in self.whitelist if uuid else False
+
+    def op_level(self, name):
+        uuid = self.uuid_for(name)
+        return self.ops.get(uuid, 0) if uuid else 0
+
+    def ban_for(self, name):
+        uuid = self.uuid_for(name)
+        return self.banned_players.get(uuid) if uuid else None
+
+    def ip_ban_for(self, ip):
+        return self.banned_ips.get(ip)
+
+    def known_players(self):
+        """usercache 內的所有玩家：{name: {"uuid": uuid}}"""
+        return {self.uuid_names.get(uuid, name): {"uuid": uuid}
+                for name, uuid in self.names.get("usercache", {}).items()}
+
+    def describe(self, name):
+        """玩家的白名單/OP/封禁狀態文字"""
+        parts = []
+        level = self.op_level(name)
+        if level:
+            parts.append(f"OP（等級 {level}）")
+        if self.is_whitelisted(name):
+            parts.append("白名單")
+        ban = self.ban_for(name)
+        if ban:
+            parts.append(f"已封禁：{ban.get('reason', '')}（{ban.get('expires', 'forever')}）")
+        return "、".join(parts)
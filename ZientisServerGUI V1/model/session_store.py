@@ -0,0 +1,278 @@
+import json
+import os
+import time
+import heapq
+from datetime import datetime
+
+class SessionStore:
+    """
+    玩家遊玩紀錄：append-only 事件檔 + 增量維護的彙總快照。
+    查詢只讀記憶體中的彙總資料，不需重掃歷史事件。
+    彙總資料以 UUID 為鍵（未知時用名稱），玩家改名後仍是同一筆紀錄；對外查詢一律用目前名稱。
+    """
+    LOG_FILE = "player_sessions.jsonl"
+    STATS_FILE = "player_sessions_stats.json"
+    RECENT_SESSIONS = 20
+    SNAPSHOT_EVERY = 50
+
+    def __init__(self, log_file=None, stats_file=None, retention_days=90):
+        self.log_file = log_file or self.LOG_FILE
+        self.stats_file = stats_file or self.STATS_FILE
+        self.retention_days = retention_days
+        self.players = {}          # UUID（未知時為名稱）-> 彙總資料（含目前名稱 "name"）
+        self._by_name = {}         # 目前名稱 -> self.players 的鍵
+        self.online = {}           # name -> {"t", "uuid", "role"}
+        self._resumed_at = None    # 載入時仍有進行中的 session：上次寫入紀錄的時間
+        self.peak_online = 0
+        self.peak_time = 0
+        self.hourly = [0] * 24     # 各時段(0~23點)累計在線秒數
+        self._log_offset = 0
+        self._pending = 0
+        self._load()
+
+    # ========== 載入 / 快照 ==========
+    def _load(self):
+        if os.path.exists(self.stats_file):
+            try:
+                with open(self.stats_file, "r", encoding="utf-8") as f:
+                    snap = json.load(f)
+                self.players = snap.get("players", {})
+                self.online = snap.get("online", {})
+                self.peak_online = snap.get("peak_online", 0)
+                self.peak_time = snap.get("peak_time", 0)
+                self.hourly = snap.get("hourly", [0] * 24)
+                self._log_offset = snap.get("log_offset", 0)
+            except Exception:
+                self._log_offset = 0
+        self._migrate()
+        self._replay_log()
+        # 上次關閉時仍在線的 session 先保留：伺服器若還在執行（接回監管程序），
+        # 由第一次 observe() 依線上名單核對；伺服器已停止則由 close_all() 以最後寫入時間結束
+        if self.online:
+            stamps = [os.path.getmtime(p) for p in (self.log_file, self.stats_file) if os.path.exists(p)]
+            self._resumed_at = max(stamps) if stamps else time.time()
+
+    def _migrate(self):
+        """舊版快照以名稱為鍵：有 UUID 的改以 UUID 為鍵，同一 UUID 的多個名稱（改名）合併"""
+        players = {}
+        for key, p in self.players.items():
+            p.setdefault("name", key)
+            key = p.get("uuid") or key
+            old = players.get(key)
+            if old is None:
+                players[key] = p
+                continue
+            if p["last_seen"] > old["last_seen"]:
+                old["name"], old["role"] = p["name"], p.get("role") or old.get("role")
+            old["playtime"] += p["playtime"]
+            old["sessions"] += p["sessions"]
+            old["first_seen"] = min(old["first_seen"], p["first_seen"])
+            old["last_seen"] = max(old["last_seen"], p["last_seen"])
+            old["recent"] = sorted(old["recent"] + p["recent"])[-self.RECENT_SESSIONS:]
+        self.players = players
+        self._by_name = {p["name"]: key for key, p in players.items()}
+
+    def _replay_log(self):
+        """從快照記錄的位移開始重放事件，只處理快照之後新增的部分"""
+        if not os.path.exists(self.log_file):
+            self._log_offset = 0
+            return
+        if os.path.getsize(self.log_file) < self._log_offset:
+            self._log_offset = 0
+        with open(self.log_file, "rb") as f:
+            f.seek(self._log_offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # 寫到一半的行，忽略
+                self._log_offset += len(raw)
+                try:
+                    self._apply(json.loads(raw))
+                except ValueError:
+                    continue
+
+    def save_snapshot(self):
+        snap = {
+            "players": self.players,
+            "online": self.online,
+            "peak_online": self.peak_online,
+            "peak_time": self.peak_time,
+            "hourly": self.hourly,
+            "log_offset": self._log_offset,
+        }
+        tmp = self.stats_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap, f, ensure_ascii=False)
+        os.replace(tmp, self.stats_file)
+        self._pending = 0
+
+    # ========== 事件 ==========
+    def _append(self, event):
+        line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.log_file, "ab") as f:
+            f.write(line)
+        self._log_offset += len(line)
+        self._apply(event)
+        self._pending += 1
+        if self._pending >= self.SNAPSHOT_EVERY:
+            self.save_snapshot()
+
+    def _key(self, name, uuid):
+        """彙總資料的鍵：已知 UUID 就用 UUID，先前只以名稱記錄的資料一併移過去"""
+        if not uuid:
+            return self._by_name.get(name, name)
+        if uuid not in self.players and self._by_name.get(name) == name and name in self.players:
+            p = self.players.pop(name)
+            p["uuid"] = uuid
+            self.players[uuid] = p
+        return uuid
+
+    def _apply(self, ev):
+        name, t = ev["name"], ev["t"]
+        uuid = ev.get("uuid") or (self.online.get(name) or {}).get("uuid")
+        key = self._key(name, uuid)
+        p = self.players.get(key)
+        if p is None:
+            p = self.players[key] = {
+                "name": name, "uuid": uuid, "role": None, "playtime": 0, "sessions": 0,
+                "first_seen": t, "last_seen": t, "recent": [],
+            }
+        elif p.get("name") != name:
+            # 改名：舊名稱不再指向這位玩家
+            if self._by_name.get(p.get("name")) == key:
+                del self._by_name[p["name"]]
+            p["name"] = name
+        self._by_name[name] = key
+        if ev["ev"] == "join":
+            self.online[name] = {"t": t, "uuid": ev.get("uuid"), "role": ev.get("role")}
+            if ev.get("uuid"):
+                p["uuid"] = ev["uuid"]
+            if ev.get("role"):
+                p["role"] = ev["role"]
+            p["last_seen"] = t
+            if len(self.online) > self.peak_online:
+                self.peak_online = len(self.online)
+                self.peak_time = t
+        elif ev["ev"] == "leave":
+            sess = self.online.pop(name, None)
+            if sess is None:
+                return
+            start = sess["t"]
+            p["playtime"] += max(0, t - start)
+            p["sessions"] += 1
+            p["last_seen"] = t
+            p["recent"].append([start, t, sess.get("role")])
+            del p["recent"][:-self.RECENT_SESSIONS]
+            self._add_hourly(start, t)
+
+    def _add_hourly(self, start, end):
+        """把一段在線時間拆分計入各小時的直方圖"""
+        t = start
+        while t < end:
+            dt = datetime.fromtimestamp(t)
+            next_hour = t + (3600 - dt.minute * 60 - dt.second - dt.microsecond / 1e6)
+            seg_end = min(end, next_hour)
+            self.hourly[dt.hour] += seg_end - t
+            t = seg_end
+
+    def record_join(self, name, uuid=None, role=None, t=None):
+        if name in self.online:
+            return
+        self._append({"ev": "join", "t": t or time.time(), "name": name, "uuid": uuid, "role": role})
+
+    def record_leave(self, name, t=None):
+        if name not in self.online:
+            return
+        self._append({"ev": "leave", "t": t or time.time(), "name": name})
+
+    def observe(self, online_names, role_lookup=None, uuid_lookup=None, t=None):
+        """
+        以目前線上名單比對上次狀態，自動補上加入/離開事件。
+        role_lookup / uuid_lookup: name -> 職位 / UUID 的查詢函式
+        載入後第一次核對時，上次留下、已不在線的 session 以上次寫入紀錄的時間結束。
+        """
+        t = t or time.time()
+        left_at, self._resumed_at = self._resumed_at or t, None
+        current = set(online_names)
+        for name in list(self.online):
+            if name not in current:
+                self.record_leave(name, left_at)
+        for name in current:
+            if name not in self.online:
+                role = role_lookup(name) if role_lookup else None
+                uuid = uuid_lookup(name) if uuid_lookup else None
+                self.record_join(name, uuid, role, t)
+
+    def close_all(self, t=None):
+        """伺服器停止時結束所有進行中的 session；載入後還沒核對過的以上次寫入紀錄的時間結束"""
+        t = t or self._resumed_at or time.time()
+        self._resumed_at = None
+        for name in list(self.online):
+            self.record_leave(name, t)
+        self.save_snapshot()
+
+    # ========== 壓縮 ==========
+    def compact(self):
+        """
+        只保留 retention_days 內的原始事件（加上仍在線者的加入事件），
+        較舊的資料僅存在彙總快照中。
+        """
+        cutoff = time.time() - self.retention_days * 86400
+        kept = []
+        if os.path.exists(self.log_file):
+            with open(self.log_file, "rb") as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        continue
+                    try:
+                        ev = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if ev["t"] >= cutoff or (ev["ev"] == "join" and self.online.get(ev["name"], {}).get("t") == ev["t"]):
+                        kept.append(raw)
+        tmp = self.log_file + ".tmp"
+        with open(tmp, "wb") as f:
+            f.writelines(kept)
+        os.replace(tmp, self.log_file)
+        self._log_offset = sum(len(r) for r in kept)
+        self.save_snapshot()
+        return len(kept)
+
+    # ========== 查詢 ==========
+    def known_players(self):
+        """{目前名稱: 彙總資料}，供玩家列表載入離線玩家"""
+        return {p["name"]: p for p in self.players.values()}
+
+    def get_player_summary(self, name):
+        """玩家資訊視窗用：總遊玩時間、次數、最近紀錄（O(1) 查詢）"""
+        p = self.players.get(self._by_name.get(name, name))
+        if p is None:
+            return None
+        summary = dict(p)
+        summary["recent"] = list(p["recent"])
+        sess = self.online.get(name)
+        summary["online_since"] = sess["t"] if sess else None
+        if sess:
+            summary["playtime"] += time.time() - sess["t"]
+        return summary
+
+    def get_hourly_histogram(self):
+        return list(self.hourly)
+
+    def get_peak(self):
+        return self.peak_online, self.peak_time
+
+    def top_players(self, n=10):
+        """[(目前名稱, 彙總資料)]，依總遊玩時間排序"""
+        top = heapq.nlargest(n, self.players.values(), key=lambda p: p["playtime"])
+        return [(p["name"], p) for p in top]
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    if h:
+        return f"{h} 小時 {m} 分"
+    if m:
+        return f"{m} 分 {s} 秒"
+    return f"{s} 秒"
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import threading
+import subprocess
+
+import psutil
+
+STATE_FILE = ".zientis_supervisor.json"
+SUPERVISOR_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "supervisor.py")
+SUPERVISOR_FLAG = "--supervisor"     # 打包後的執行檔以此參數進入監管模式
+
+
+def supervisor_command():
+    """
+    監管程序的啟動指令。打包（PyInstaller 等）後 sys.executable 是啟動器本身、
+    旁邊也沒有 supervisor.py，因此改以 --supervisor 參數重新執行自己。
+    """
+    if getattr(sys, "frozen", False):
+        return [sys.executable, SUPERVISOR_FLAG]
+    return [sys.executable, SUPERVISOR_SCRIPT]
+
+
+def read_state(folder):
+    """讀取伺服器資料夾中的監管程序狀態檔，不存在或損毀回傳 None"""
+    try:
+        with open(os.path.join(folder, STATE_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_supervisor(state):
+    """
+    確認狀態檔記錄的 PID 仍是當初的監管程序，而不是被系統重用給其他程序：
+    監管程序建立於伺服器啟動（started_at）之前，命令列含 --folder。
+    """
+    try:
+        proc = psutil.Process(state.get("pid", -1))
+        if proc.create_time() > (state.get("started_at") or 0) + 1:
+            return False
+        cmdline = proc.cmdline()
+    except psutil.AccessDenied:
+        return True        # 建立時間已符合，只是無權讀取命令列
+    except (psutil.Error, ValueError):
+        return False
+    return "--folder" in cmdline
+
+
+def find_supervisor(folder):
+    """找出仍在執行的監管程序（狀態檔存在且程序還是同一個），否則回傳 None"""
+    state = read_state(folder)
+    if state and _is_supervisor(state):
+        return state
+    return None
+
+
+def launch_supervisor(cmd, folder, backlog=20000, timeout=10):
+    """
+    以獨立程序啟動 supervisor.py（不隨 GUI 結束），等它寫出狀態檔後回傳狀態 dict。
+    """
+    old = read_state(folder)
+    args = supervisor_command() + ["--folder", folder, "--backlog", str(backlog), "--"] + cmd
+    kwargs = {}
+    if platform.system() == "Windows":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    proc = subprocess.Popen(
+        args, cwd=folder,
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        close_fds=True, **kwargs
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        state = read_state(folder)
+        if state and state != old and state.get("pid") == proc.pid:
+            return state
+        if proc.poll() is not None:
+            raise RuntimeError(f"監管程序啟動失敗（代碼 {proc.returncode}）")
+        time.sleep(0.1)
+    raise RuntimeError("等待監管程序逾時")
+
+
+class SupervisorClient:
+    """
+    連線到 supervisor.py，提供與 subprocess.Popen 相同的 poll/wait/terminate/kill 介面，
+    讓控制器不必區分伺服器是直接啟動還是由監管程序持有。
+    on_lines(lines, backlog) 在背景執行緒被呼叫；backlog 為 True 代表連線時重播的積存日誌，
+    那些行先前已發生過，不應再觸發規則或計入延遲統計。
+    """
+    def __init__(self, state, on_lines, since=0, started_at=None):
+        self.port = state["port"]
+        self.token = state["token"]
+        self.supervisor_pid = state["pid"]
+        self.pid = state.get("java_pid")
+        self.started_at = started_at or state.get("started_at")
+        self.on_lines = on_lines
+        self.next_seq = since
+        self.returncode = None
+        self.connected = False
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._exited = threading.Event()
+
+    # ========== 連線 ==========
+    def connect(self, timeout=5):
+        sock = socket.create_connection(("127.0.0.1", self.port), timeout=timeout)
+        # 握手期間保留逾時：埠被其他程式重用或監管程序卡住時不會一直等下去
+        try:
+            self._sock = sock
+            self._send({"type": "hello", "token": self.token, "since": self.next_seq, "started_at": self.started_at})
+            rfile = sock.makefile("rb")
+            first = json.loads(rfile.readline() or b"{}")
+        except (OSError, ValueError):
+            sock.close()
+            self._sock = None
+            raise
+        if first.get("type") != "status":
+            sock.close()
+            raise ConnectionError(first.get("message", "監管程序拒絕連線"))
+        sock.settimeout(None)
+        self.pid = first.get("pid")
+        if first.get("started_at") != self.started_at:
+            self.started_at = first.get("started_at")
+            self.next_seq = 0
+        if not first.get("running") and first.get("exit_code") is not None:
+            self._set_exit(first["exit_code"])
+        self.connected = True
+        threading.Thread(target=self._read_loop, args=(rfile,), daemon=True, name="SupervisorClient").start()
+
+    def _read_loop(self, rfile):
+        try:
+            for raw in rfile:
+                msg = json.loads(raw)
+                kind = msg.get("type")
+                if kind == "log":
+                    lines = msg["lines"]
+                    # 重新連線時可能收到已看過的行，依序號略過
+                    skip = max(0, self.next_seq - msg["seq"])
+                    if skip < len(lines):
+                        self.on_lines(lines[skip:], bool(msg.get("backlog")))
+                    self.next_seq = max(self.next_seq, msg["seq"] + len(lines))
+                elif kind == "exit":
+                    self._set_exit(msg.get("code"))
+        except (OSError, ValueError) as e:
+            print(f"[DEBUG] SupervisorClient 連線中斷: {e}")
+        self.connected = False
+
+    def _send(self, msg):
+        with self._send_lock:
+            self._sock.sendall((json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def disconnect(self):
+        """只中斷連線，伺服器與監管程序繼續執行"""
+        self.connected = False
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    # ========== Popen 相容介面 ==========
+    def _set_exit(self, code):
+        self.returncode = code if code is not None else -1
+        self._exited.set()
+
+    def send_command(self, line):
+        self._send({"type": "command", "line": line})
+
+    def poll(self):
+        if self.returncode is None and not self.connected and not psutil.pid_exists(self.supervisor_pid):
+            self._set_exit(-1)     # 監管程序已不存在
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while self.poll() is None:
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                raise subprocess.TimeoutExpired("supervisor", timeout)
+            self._exited.wait(0.2 if remaining is None else min(0.2, remaining))
+        return self.returncode
+
+    def terminate(self):
+        self._send({"type": "signal", "name": "terminate"})
+
+    def kill(self):
+        self._send({"type": "signal", "name": "kill"})
+
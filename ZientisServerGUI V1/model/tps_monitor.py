@@ -0,0 +1,214 @@
+import re
+import time
+from collections import deque
+
+from model.rcon_manager import parse_tps, parse_mspt
+
+# 原版 debug stop："Stopped tick profiling after 10.02 seconds and 200 ticks (19.96 ticks per second)"
+_DEBUG_TPS_RE = re.compile(r"\(([\d.]+) ticks per second\)")
+# 依序嘗試的查詢方式：Paper/Purpur 的 mspt + tps、原版 1.20.3+ 的 tick query、舊版原版的 debug 取樣
+# debug 取樣會讓 profiler 一直開著，且每次都在伺服器 debug/ 留下報告，只在設定 tps_debug_fallback 時使用
+METHODS = ("paper", "tick", "debug")
+METHOD_TEXT = {"paper": "mspt/tps", "tick": "tick query", "debug": "debug 取樣"}
+
+
+class _Threshold:
+    """
+    帶遲滯的門檻：連續 enter_after 次超過 warn 才警示，
+    警示中要連續 clear_after 次回到 clear 以內才解除，避免在門檻附近反覆通知。
+    """
+    def __init__(self, warn, clear, higher_is_bad, enter_after=2, clear_after=3):
+        self.warn = warn
+        self.clear = clear
+        self.higher_is_bad = higher_is_bad
+        self.enter_after = enter_after
+        self.clear_after = clear_after
+        self.active = False
+        self._streak = 0
+
+    def update(self, value):
+        """回傳 "alert"、"clear" 或 None"""
+        if value is None:
+            return None
+        bad = value > self.warn if self.higher_is_bad else value < self.warn
+        good = value <= self.clear if self.higher_is_bad else value >= self.clear
+        if not self.active:
+            self._streak = self._streak + 1 if bad else 0
+            if self._streak >= self.enter_after:
+                self.active, self._streak = True, 0
+                return "alert"
+        else:
+            self._streak = self._streak + 1 if good else 0
+            if self._streak >= self.clear_after:
+                self.active, self._streak = False, 0
+                return "clear"
+        return None
+
+
+class TpsMonitor:
+    """
+    透過 RCON 追蹤 tick 健康度（TPS/MSPT），輪詢間隔自動調整：
+    變慢（MSPT 接近門檻或快速上升）時縮短到 min_interval，
+    沒有玩家且狀況良好時逐步放寬到 max_interval，其餘維持 interval。
+    poll() 會執行 RCON 指令（阻塞），請在背景執行緒呼叫；record() 更新歷史與警示狀態。
+    """
+    def __init__(self, interval=10, min_interval=2, max_interval=60, mspt_warn=45, mspt_clear=35,
+                 tps_warn=18, tps_clear=19.5, enter_after=2, clear_after=3, history=2000,
+                 debug_fallback=False):
+        self.base_interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = interval
+        self.thresholds = {
+            "mspt": _Threshold(mspt_warn, mspt_clear, True, enter_after, clear_after),
+            "tps": _Threshold(tps_warn, tps_clear, False, enter_after, clear_after),
+        }
+        self.history = deque(maxlen=history)
+        self.method = None             # 目前可用的查詢方式
+        self.next_due = 0
+        self.methods = METHODS if debug_fallback else tuple(m for m in METHODS if m != "debug")
+        self._debug_started = False
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            interval=float(config.get("tps_poll_interval", 10)),
+            min_interval=float(config.get("tps_poll_min", 2)),
+            max_interval=float(config.get("tps_poll_max", 60)),
+            mspt_warn=float(config.get("mspt_warn", 45)),
+            mspt_clear=float(config.get("mspt_clear", 35)),
+            tps_warn=float(config.get("tps_warn", 18)),
+            tps_clear=float(config.get("tps_clear", 19.5)),
+            debug_fallback=bool(config.get("tps_debug_fallback", False)),
+        )
+
+    def due(self, now=None):
+        return (time.time() if now is None else now) >= self.next_due
+
+    def reset(self):
+        """伺服器停止或 RCON 斷線時呼叫：重新偵測查詢方式、解除警示"""
+        self.method = None
+        self._debug_started = False
+        self.interval = self.base_interval
+        self.next_due = 0
+        for threshold in self.thresholds.values():
+            threshold.active = False
+            threshold._streak = 0
+
+    @property
+    def latest(self):
+        return self.history[-1] if self.history else None
+
+    # ========== 查詢（背景執行緒） ==========
+    def poll(self, run_command):
+        """
+        以 run_command(指令) 查詢一次，回傳 {"tps", "mspt", "mspt_max", "method"}；
+        全部方式都不支援時回傳 None。debug 方式第一次只開始取樣，回傳 None，下一次才有結果。
+        """
+        for method in ([self.method] if self.method else self.methods):
+            sample = getattr(self, f"_poll_{method}")(run_command)
+            if sample is not None:
+                self.method = method
+                return sample
+            if method == "debug" and self._debug_started:
+                self.method = method
+                return None
+        self.method = None
+        return None
+
+    @staticmethod
+    def _poll_paper(run_command):
+        mspt = parse_mspt(run_command("mspt"))
+        tps = parse_tps(run_command("tps"))
+        if mspt is None and tps is None:
+            return None
+        return {
+            "tps": tps[0] if tps else min(20.0, 1000 / max(mspt["avg"], 0.001)),
+            "mspt": mspt["avg"] if mspt else None,
+            "mspt_max": mspt.get("max") if mspt else None,
+            "method": "paper",
+        }
+
+    @staticmethod
+    def _poll_tick(run_command):
+        mspt = parse_mspt(run_command("tick query"))
+        if mspt is None:
+            return None
+        return {
+            "tps": round(min(20.0, 1000 / max(mspt["avg"], 0.001)), 2),
+            "mspt": mspt["avg"],
+            "mspt_max": mspt.get("p99"),
+            "method": "tick",
+        }
+
+    def _poll_debug(self, run_command):
+        """debug start/stop 之間的平均 TPS；每次 stop 會在伺服器 debug/ 資料夾留下一份報告"""
+        if not self._debug_started:
+            resp = run_command("debug start") or ""
+            self._debug_started = "Started" in resp or "already" in resp
+            return None
+        m = _DEBUG_TPS_RE.search(run_command("debug stop") or "")
+        run_command("debug start")
+        if not m:
+            self._debug_started = False
+            return None
+        tps = float(m.group(1))
+        return {"tps": tps, "mspt": None, "mspt_max": None, "method": "debug"}
+
+    # ========== 記錄與警示 ==========
+    def record(self, sample, players=None, now=None):
+        """
+        記錄一次結果、調整下次輪詢時間，回傳警示事件 [(指標, "alert"/"clear", 訊息)]。
+        sample 為 None（查詢失敗或尚未有結果）時只排定下次輪詢。
+        """
+        now = time.time() if now is None else now
+        events = []
+        if sample is not None:
+            previous = self.latest
+            sample = dict(sample, t=now, players=players)
+            self.history.append(sample)
+            for name, threshold in self.thresholds.items():
+                change = threshold.update(sample.get(name))
+                if change:
+                    events.append((name, change, self._message(name, change, sample)))
+            self.interval = self._next_interval(sample, previous, players)
+        if self.method == "debug":
+            self.interval = max(self.interval, 30)     # debug 取樣需要足夠長的區間才準確
+        self.next_due = now + self.interval
+        return events
+
+    def _next_interval(self, sample, previous, players):
+        mspt_warn = self.thresholds["mspt"].warn
+        mspt = sample.get("mspt")
+        degrading = any(t.active for t in self.thresholds.values())
+        if mspt is not None:
+            degrading |= mspt >= mspt_warn * 0.7
+            if previous and previous.get("mspt"):
+                degrading |= mspt > previous["mspt"] * 1.5 and mspt >= mspt_warn * 0.3
+        tps = sample.get("tps")
+        if tps is not None:
+            degrading |= tps < self.thresholds["tps"].clear
+        if degrading:
+            return self.min_interval
+        if players == 0:
+            return min(self.max_interval, max(self.interval, self.base_interval) * 1.5)
+        return self.base_interval
+
+    def _message(self, name, change, sample):
+        tps = f"TPS {sample['tps']:.1f}" if sample.get("tps") is not None else ""
+        mspt = f"MSPT {sample['mspt']:.1f} ms" if sample.get("mspt") is not None else ""
+        values = "，".join(v for v in (tps, mspt) if v)
+        if change == "alert":
+            limit = (f"MSPT 超過 {self.thresholds['mspt'].warn:g} ms" if name == "mspt"
+                     else f"TPS 低於 {self.thresholds['tps'].warn:g}")
+            return f"伺服器變慢：{limit}（{values}）"
+        return f"伺服器已恢復（{values}）"
+
+    def summary(self):
+        s = self.latest
+        if s is None:
+            return "TPS：-"
+        parts = [f"TPS：{s['tps']:.1f}" if s.get("tps") is not None else "TPS：-"]
+        if s.get("mspt") is not None:
+            parts.append(f"MSPT {s['mspt']:.1f}")
+        return "｜".join(parts)
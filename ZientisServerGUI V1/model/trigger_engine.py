@@ -0,0 +1,213 @@
+import re
+import time
+
+from model.log_index import required_literals
+from utils.log_parser import LEVELS
+
+try:
+    import ahocorasick          # pyahocorasick，可選
+except ImportError:
+    ahocorasick = None
+
+ACTIONS = ("rcon", "notify", "backup", "restart", "rcon_ready")
+
+# 內建規則：偵測 RCON 啟動（原本寫死在控制器的關鍵字）
+BUILTIN_RULES = [
+    {"name": "RCON 啟動", "pattern": key, "action": "rcon_ready", "level": "INFO"}
+    for key in (
+        "Thread RCON Listener started",
+        "RCON running",
+        "RCON is running",
+        "RCON listener started",
+        "RCON 啟動",
+    )
+]
+
+
+class TriggerRule:
+    """
+    一條觸發規則（設定檔 "triggers" 中的一筆）：
+      {"name": "歡迎", "pattern": "(\\w+) joined the game", "regex": true,
+       "action": "rcon", "command": "say 歡迎 \\1", "level": "INFO", "cooldown": 0}
+    action: rcon / notify / backup / restart；command 可用 \\1、\\g<name> 帶入正規式群組。
+    once: 每次伺服器啟動只觸發一次；cooldown: 兩次觸發的最短間隔（秒）。
+    """
+    __slots__ = ("name", "pattern", "regex", "action", "command", "min_level", "cooldown",
+                 "once", "compiled", "gate", "last_fired", "fired")
+
+    def __init__(self, pattern, action, name=None, regex=False, command="", level=None,
+                 cooldown=None, once=False):
+        if action not in ACTIONS:
+            raise ValueError(f"未知的觸發動作：{action}")
+        if not pattern:
+            raise ValueError("觸發規則缺少 pattern")
+        self.name = name or pattern
+        self.pattern = pattern
+        self.regex = bool(regex)
+        self.action = action
+        self.command = command
+        self.min_level = LEVELS.get(level, 0) if level else 0
+        # 備份、重啟預設有冷卻時間，避免同一段錯誤連續觸發
+        self.cooldown = float(cooldown) if cooldown is not None else (300.0 if action in ("backup", "restart") else 0.0)
+        self.once = once
+        self.compiled = re.compile(pattern) if self.regex else None
+        # 正規式規則以最長的必要字串當閘門，只有該字串出現時才執行正規式
+        lits = required_literals(pattern) if self.regex else [pattern]
+        self.gate = max(lits, key=len) if lits else None
+        self.last_fired = 0.0
+        self.fired = False
+
+    @classmethod
+    def from_config(cls, item):
+        return cls(
+            item.get("pattern", ""), item.get("action", "notify"),
+            name=item.get("name"), regex=item.get("regex", False), command=item.get("command", ""),
+            level=item.get("level"), cooldown=item.get("cooldown"), once=item.get("once", False),
+        )
+
+    def expand(self, match):
+        """產生要執行的指令（正規式規則可帶入群組）"""
+        if match is not None and self.command:
+            return match.expand(self.command)
+        return self.command
+
+
+def _trie_regex(words):
+    """把一組字串組成前綴樹形式的正規式，每個位置的比對成本與規則數量無關"""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node):
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        # 可在此結束時讓較長的字串優先（貪婪的可選群組）
+        return f"(?:{body})?" if "" in node else body
+
+    return re.compile(emit(trie))
+
+
+class TriggerEngine:
+    """
+    把所有規則的字面字串編成一個多字串比對器，每行只掃描一次：
+    有 pyahocorasick 時使用 Aho–Corasick 自動機，否則使用前綴樹正規式，
+    並以「包含關係」補上被較長字串涵蓋的其他字串。
+    只有閘門字串命中的正規式規則才會實際執行正規式，沒有閘門的正規式才每行都跑。
+    """
+    def __init__(self, rules=(), use_automaton=True):
+        self.rules = list(rules)
+        self._by_literal = {}      # 字串 -> 規則 list
+        self._ungated = []         # 沒有必要字串的正規式規則
+        for rule in self.rules:
+            if rule.gate is None:
+                self._ungated.append(rule)
+            else:
+                self._by_literal.setdefault(rule.gate, []).append(rule)
+        literals = list(self._by_literal)
+        self._automaton = None
+        self._trie = None
+        if not literals:
+            return
+        if use_automaton and ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for lit in literals:
+                self._automaton.add_word(lit, lit)
+            self._automaton.make_automaton()
+        else:
+            self._trie = _trie_regex(literals)
+            # 比對到 A 時，A 中包含的其他字串也一定出現
+            self._contains = {a: [b for b in literals if b in a] for a in literals}
+
+    @classmethod
+    def from_config(cls, items, builtin=True):
+        """由設定檔建立；格式錯誤的規則略過並回傳錯誤訊息 list"""
+        rules, errors = [], []
+        for item in (BUILTIN_RULES if builtin else []) + list(items or []):
+            try:
+                rules.append(TriggerRule.from_config(item))
+            except (ValueError, re.error) as e:
+                errors.append(f"{item.get('name') or item.get('pattern')}: {e}")
+        return cls(rules), errors
+
+    def _matched_literals(self, line):
+        if self._automaton is not None:
+            return {lit for _, lit in self._automaton.iter(line)}
+        if self._trie is None:
+            return ()
+        found = set()
+        search = self._trie.search
+        m = search(line)
+        while m is not None:
+            found.update(self._contains[m.group(0)])
+            # 從下一個位置繼續，才不會漏掉重疊的字串
+            m = search(line, m.start() + 1)
+        return found
+
+    def match(self, record, now=None):
+        """回傳此行觸發的 (規則, 正規式 match 或 None) list，已套用等級、冷卻與只觸發一次"""
+        line = record.raw
+        code = LEVELS.get(record.level, 2)
+        candidates = [r for lit in self._matched_literals(line) for r in self._by_literal[lit]]
+        if self._ungated:
+            candidates += self._ungated
+        if not candidates:
+            return []
+        now = time.monotonic() if now is None else now
+        hits = []
+        for rule in candidates:
+            if code < rule.min_level or (rule.once and rule.fired):
+                continue
+            if rule.cooldown and now - rule.last_fired < rule.cooldown:
+                continue
+            m = None
+            if rule.compiled is not None:
+                m = rule.compiled.search(line)
+                if m is None:
+                    continue
+            rule.last_fired = now
+            rule.fired = True
+            hits.append((rule, m))
+        return hits
+
+    def reset_once(self, action=None):
+        """重新啟用只觸發一次的規則（每次啟動伺服器時呼叫）"""
+        for rule in self.rules:
+            if action is None or rule.action == action:
+                rule.fired = False
+
+
+def benchmark(rule_counts=(5, 50, 500), n=50000):
+    """量測每行比對成本是否隨規則數增加，可用 python -m model.trigger_engine 執行"""
+    from utils.log_parser import LogParser
+    parser = LogParser()
+    lines = [parser.parse(l) for l in (
+        "[12:34:56 INFO]: Steve joined the game",
+        "[12:34:56 WARN]: Can't keep up! Is the server overloaded? Running 5023ms or 100 ticks behind",
+        "[12:34:56 INFO]: [Essentials] Loaded 12345 items from items.json.",
+        "\tat net.minecraft.server.MinecraftServer.tick(MinecraftServer.java:123)",
+    )] * (n // 4)
+    for count in rule_counts:
+        items = [{"pattern": f"keyword{i} happened", "action": "notify"} for i in range(count // 2)]
+        items += [{"pattern": rf"player(\d+) reached level{i}", "regex": True, "action": "notify"}
+                  for i in range(count - count // 2)]
+        for use_automaton in (True, False):
+            engine, _ = TriggerEngine.from_config(items)
+            if not use_automaton:
+                engine = TriggerEngine(engine.rules, use_automaton=False)
+            elif ahocorasick is None:
+                continue
+            start = time.perf_counter()
+            for r in lines:
+                engine.match(r)
+            per_line = (time.perf_counter() - start) / len(lines) * 1e6
+            kind = "Aho–Corasick" if use_automaton else "前綴樹正規式"
+            print(f"{count:>4} 條規則（{kind}）：{per_line:.2f} µs/行")
+
+
+if __name__ == "__main__":
+    benchmark()
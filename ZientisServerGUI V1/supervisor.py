@@ -0,0 +1,277 @@
+"""
+伺服器監管程序：擁有 Java 子程序的 stdin/stdout，透過本機 TCP（JSON lines）提供給 GUI。
+GUI 關閉、當機或更新後可重新連線，並重播最近的日誌；不影響伺服器運作。
+
+用法：python supervisor.py --folder <伺服器資料夾> [--backlog 20000] -- java -Xmx4G -jar server.jar nogui
+"""
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import platform
+import secrets
+import argparse
+import threading
+import subprocess
+import socketserver
+from collections import deque
+
+from utils.stream_lines import LineSplitter, READ_BLOCK, encode_command
+
+STATE_FILE = ".zientis_supervisor.json"
+CLIENT_QUEUE = 2000      # 每個連線最多暫存的訊息數，超過代表客戶端卡住，直接斷線
+
+
+def state_path(folder):
+    return os.path.join(folder, STATE_FILE)
+
+
+class Supervisor:
+    def __init__(self, cmd, folder, backlog=20000, linger=30):
+        self.cmd = cmd
+        self.folder = folder
+        self.linger = linger
+        self.token = secrets.token_hex(16)
+        self.backlog = deque(maxlen=backlog)   # (seq, line)
+        self.next_seq = 0
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.splitter = LineSplitter()
+        self.process = None
+        self.started_at = None
+        self.exit_code = None
+        self.exited = threading.Event()
+
+    # ========== Java 子程序 ==========
+    def start(self):
+        kwargs = {}
+        if platform.system() == "Windows":
+            # 監管程序本身沒有主控台（DETACHED_PROCESS），不加這個旗標 java 會自己開一個視窗
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        self.process = subprocess.Popen(
+            self.cmd,
+            cwd=self.folder,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            **kwargs
+        )
+        self.started_at = time.time()
+        threading.Thread(target=self._read_output, daemon=True, name="SupervisorReader").start()
+
+    def _read_output(self):
+        stream = self.process.stdout
+        while True:
+            try:
+                data = stream.read1(READ_BLOCK)
+            except OSError:
+                data = b""
+            if not data:
+                break
+            lines = self.splitter.feed(data)
+            if lines:
+                self._publish(lines)
+        rest = self.splitter.flush()
+        if rest:
+            self._publish(rest)
+        self.exit_code = self.process.wait()
+        self._broadcast({"type": "exit", "code": self.exit_code})
+        self.exited.set()
+
+    def _publish(self, lines):
+        with self.lock:
+            first = self.next_seq
+            for line in lines:
+                self.backlog.append((self.next_seq, line))
+                self.next_seq += 1
+            self._broadcast_locked({"type": "log", "seq": first, "lines": lines})
+
+    def _broadcast(self, msg):
+        with self.lock:
+            self._broadcast_locked(msg)
+
+    def _broadcast_locked(self, msg):
+        # 只做非阻塞的 put，讀取伺服器輸出永遠不會被慢的客戶端拖住
+        for client in list(self.clients):
+            try:
+                client.put_nowait(msg)
+            except queue.Full:
+                self.clients.discard(client)
+                client.put_close()
+
+    def write_command(self, line):
+        if self.process and self.process.poll() is None:
+            self.process.stdin.write(encode_command(line, self.splitter.encoding))
+            self.process.stdin.flush()
+
+    def signal_child(self, name):
+        if self.process and self.process.poll() is None:
+            if name == "kill":
+                self.process.kill()
+            else:
+                self.process.terminate()
+
+    def status(self):
+        return {
+            "type": "status",
+            "pid": self.process.pid if self.process else None,
+            "running": self.process is not None and self.process.poll() is None,
+            "exit_code": self.exit_code,
+            "started_at": self.started_at,
+            "next_seq": self.next_seq,
+        }
+
+    # ========== 客戶端 ==========
+    def attach(self, client, since):
+        """登記客戶端並取得 since 之後的積存日誌（同一把鎖內，不會漏行或重複）"""
+        with self.lock:
+            lines = [line for seq, line in self.backlog if seq >= since]
+            first = self.next_seq - len(lines)
+            self.clients.add(client)
+        return first, lines
+
+    def detach(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def serve(self):
+        supervisor = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                ClientSession(supervisor, self.request, self.rfile).run()
+
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        port = server.server_address[1]
+        self._write_state(port)
+        threading.Thread(target=server.serve_forever, daemon=True, name="SupervisorServer").start()
+        try:
+            self.exited.wait()
+            # 伺服器結束後保留一段時間，讓 GUI 收到結束代碼
+            time.sleep(self.linger)
+        finally:
+            server.shutdown()
+            self._remove_state()
+
+    def _write_state(self, port):
+        path = state_path(self.folder)
+        data = {"pid": os.getpid(), "port": port, "token": self.token,
+                "java_pid": self.process.pid, "started_at": self.started_at}
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def _remove_state(self):
+        """只刪除自己寫的狀態檔；結束前的等待期間可能已有新的監管程序寫入自己的狀態"""
+        path = state_path(self.folder)
+        try:
+            with open(path, encoding="utf-8") as f:
+                owner = json.load(f).get("pid")
+        except (OSError, ValueError):
+            return
+        if owner != os.getpid():
+            return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ClientSession:
+    """一個 GUI 連線：驗證 token 後重播積存日誌，之後轉送即時輸出與指令"""
+    def __init__(self, supervisor, sock, rfile):
+        self.supervisor = supervisor
+        self.sock = sock
+        self.rfile = rfile
+        self.queue = queue.Queue(maxsize=CLIENT_QUEUE)
+
+    def put_nowait(self, msg):
+        self.queue.put_nowait(msg)
+
+    def put_close(self):
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            self.sock.close()
+
+    def _send(self, msg):
+        self.sock.sendall((json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def run(self):
+        try:
+            hello = json.loads(self.rfile.readline() or b"{}")
+        except ValueError:
+            return
+        if not secrets.compare_digest(str(hello.get("token", "")), self.supervisor.token):
+            self._send({"type": "error", "message": "token 錯誤"})
+            return
+        since = int(hello.get("since", 0))
+        if hello.get("started_at") != self.supervisor.started_at:
+            since = 0    # 上次連線的是另一次啟動，序號不適用
+        first, lines = self.supervisor.attach(self, since)
+        try:
+            self._send(self.supervisor.status())
+            if lines:
+                self._send({"type": "log", "seq": first, "lines": lines, "backlog": True})
+            if self.supervisor.exited.is_set():
+                self._send({"type": "exit", "code": self.supervisor.exit_code})
+            threading.Thread(target=self._read_requests, daemon=True).start()
+            while True:
+                msg = self.queue.get()
+                if msg is None:
+                    break
+                self._send(msg)
+        except OSError:
+            pass
+        finally:
+            self.supervisor.detach(self)
+            self.put_close()
+
+    def _read_requests(self):
+        try:
+            for raw in self.rfile:
+                try:
+                    req = json.loads(raw)
+                except ValueError:
+                    continue
+                kind = req.get("type")
+                if kind == "command":
+                    self.supervisor.write_command(req.get("line", ""))
+                elif kind == "signal":
+                    self.supervisor.signal_child(req.get("name", "terminate"))
+                elif kind == "status":
+                    try:
+                        self.queue.put_nowait(self.supervisor.status())
+                    except queue.Full:
+                        break
+        except OSError:
+            pass
+        self.put_close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--" not in argv:
+        print("用法：python supervisor.py --folder <資料夾> -- <java 指令>", file=sys.stderr)
+        return 2
+    split = argv.index("--")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folder", required=True)
+    parser.add_argument("--backlog", type=int, default=20000)
+    parser.add_argument("--linger", type=int, default=30)
+    args = parser.parse_args(argv[:split])
+    # GUI 關閉時終端機送出的訊號不應影響伺服器
+    for name in ("SIGINT", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), signal.SIG_IGN)
+    supervisor = Supervisor(argv[split + 1:], args.folder, args.backlog, args.linger)
+    supervisor.start()
+    supervisor.serve()
+    return supervisor.exit_code or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
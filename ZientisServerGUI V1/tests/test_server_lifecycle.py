@@ -0,0 +1,60 @@
+import unittest
+
+from model.server_lifecycle import ServerLifecycle, RUNNING, STOPPING, CRASHED
+from utils.log_parser import LogParser
+
+
+def running(**kwargs):
+    lc = ServerLifecycle(**kwargs)
+    lc.begin_start(now=0)
+    lc.feed(LogParser().parse('[12:00:00] [Server thread/INFO]: Done (3.2s)! For help, type "help"'), now=1)
+    return lc
+
+
+class StopDetectionTest(unittest.TestCase):
+    def test_player_chat_does_not_stop(self):
+        lc = running()
+        parse = LogParser().parse
+        for line in ("[12:00:01] [Server thread/INFO]: <Steve> Stopping server jk",
+                     "[12:00:01] [Server thread/INFO]: <Steve> Stopping server",
+                     "[12:00:01 INFO]: <Steve> Stopping the server",
+                     "[12:00:01] [Async Chat Thread - #0/INFO]: [Not Secure] <Steve> Stopping server"):
+            lc.feed(parse(line), now=2)
+        self.assertEqual(lc.state, RUNNING)
+        self.assertEqual(lc.tick(100, alive=True), [])
+
+    def test_server_stop_line_stops(self):
+        for line in ("[12:00:01] [Server thread/INFO]: Stopping server",
+                     "[12:00:01 INFO]: Stopping the server",
+                     "[12:00:01] [Server thread/INFO] [minecraft/DedicatedServer]: Stopping server"):
+            lc = running()
+            lc.feed(LogParser().parse(line), now=2)
+            self.assertEqual(lc.state, STOPPING, line)
+
+
+class CrashRestartTest(unittest.TestCase):
+    def test_backoff_and_cap(self):
+        lc = running(restart_on_crash=True, restart_delay=10, restart_max=2)
+        self.assertEqual(lc.tick(5, alive=False, exit_code=1), [])
+        self.assertEqual(lc.state, CRASHED)
+        self.assertEqual(lc.tick(14, alive=False), [])
+        self.assertEqual(lc.tick(15, alive=False), ["start"])
+        lc.begin_start(now=15)
+        self.assertEqual(lc.tick(16, alive=False, exit_code=1), [])
+        self.assertEqual(lc.tick(35, alive=False), [])
+        self.assertEqual(lc.tick(36, alive=False), ["start"])
+        lc.begin_start(now=36)
+        lc.tick(37, alive=False, exit_code=1)
+        self.assertEqual(lc.tick(10_000, alive=False), [])
+        self.assertIsNotNone(lc.last_error)
+
+    def test_cancel_pending_restart(self):
+        lc = running(restart_on_crash=True, restart_delay=10)
+        lc.tick(5, alive=False, exit_code=1)
+        self.assertTrue(lc.cancel_restart())
+        self.assertEqual(lc.tick(100, alive=False), [])
+        self.assertFalse(lc.cancel_restart())
+
+
+if __name__ == "__main__":
+    unittest.main()
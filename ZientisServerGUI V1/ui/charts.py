@@ -0,0 +1,136 @@
+import time
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QPen, QColor, QFont, QPolygonF
+from PySide6.QtCore import Qt, QPointF, QRectF
+
+
+class TimeSeriesChart(QWidget):
+    """
+    自繪的時間序列圖（不依賴 QtCharts）：多條折線/長條、左右兩個 Y 軸、事件垂直標記。
+    資料為 [(unix 秒, 數值)]，X 軸固定顯示最近 window 秒。
+    """
+    MARGIN_LEFT = 48
+    MARGIN_RIGHT = 40
+    MARGIN_TOP = 22
+    MARGIN_BOTTOM = 22
+
+    def __init__(self, parent=None, window=3600, title=""):
+        super().__init__(parent)
+        self.window = window
+        self.title = title
+        self._series = []     # dict: name, color, points, axis("left"/"right"), style("line"/"bar"), unit
+        self._markers = []    # (t, QColor)
+        self.setMinimumHeight(160)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    # ========== 資料 ==========
+    def set_series(self, name, points, color="#50fa7b", axis="left", style="line", unit=""):
+        """新增或更新一條資料線"""
+        for s in self._series:
+            if s["name"] == name:
+                s["points"] = points
+                break
+        else:
+            self._series.append({"name": name, "points": points, "color": QColor(color),
+                                 "axis": axis, "style": style, "unit": unit})
+        self.update()
+
+    def set_markers(self, markers, colors):
+        """markers: [(t, 種類)]；colors: 種類 -> 顏色"""
+        self._markers = [(t, QColor(colors.get(kind, "#888888"))) for t, kind in markers]
+        self.update()
+
+    def set_window(self, seconds):
+        self.window = seconds
+        self.update()
+
+    # ========== 繪圖 ==========
+    def _axis_max(self, axis, since):
+        peak = 0
+        for s in self._series:
+            if s["axis"] == axis:
+                for t, v in s["points"]:
+                    if t >= since and v > peak:
+                        peak = v
+        return peak * 1.1 if peak else 1
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.setRenderHint(QPainter.Antialiasing)
+        p.fillRect(self.rect(), QColor("#15181d"))
+        font = QFont(self.font())
+        font.setPointSize(8)
+        p.setFont(font)
+
+        now = time.time()
+        since = now - self.window
+        plot = QRectF(self.MARGIN_LEFT, self.MARGIN_TOP,
+                      max(1, self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT),
+                      max(1, self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM))
+        x_of = lambda t: plot.left() + (t - since) / self.window * plot.width()
+        maxima = {"left": self._axis_max("left", since), "right": self._axis_max("right", since)}
+        y_of = lambda v, axis: plot.bottom() - v / maxima[axis] * plot.height()
+
+        # 格線與座標
+        grid = QPen(QColor("#2a2f38"))
+        text = QColor("#7a8a80")
+        has_right = any(s["axis"] == "right" for s in self._series)
+        for i in range(5):
+            y = plot.top() + plot.height() * i / 4
+            p.setPen(grid)
+            p.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+            p.setPen(text)
+            frac = (4 - i) / 4
+            p.drawText(QRectF(0, y - 8, self.MARGIN_LEFT - 4, 16), Qt.AlignRight | Qt.AlignVCenter,
+                       f"{maxima['left'] * frac:.0f}")
+            if has_right:
+                p.drawText(QRectF(plot.right() + 4, y - 8, self.MARGIN_RIGHT - 4, 16), Qt.AlignLeft | Qt.AlignVCenter,
+                           f"{maxima['right'] * frac:.0f}")
+        for i in range(5):
+            t = since + self.window * i / 4
+            x = x_of(t)
+            p.setPen(text)
+            label = time.strftime("%m/%d %H:%M" if self.window > 2 * 86400 else "%H:%M", time.localtime(t))
+            p.drawText(QRectF(x - 40, plot.bottom() + 2, 80, 16), Qt.AlignHCenter | Qt.AlignTop, label)
+
+        # 事件標記
+        for t, color in self._markers:
+            if t < since:
+                continue
+            c = QColor(color)
+            c.setAlpha(110)
+            p.setPen(QPen(c, 1, Qt.DashLine))
+            x = x_of(t)
+            p.drawLine(QPointF(x, plot.top()), QPointF(x, plot.bottom()))
+
+        # 資料線
+        p.setClipRect(plot)
+        for s in self._series:
+            pts = [(t, v) for t, v in s["points"] if t >= since]
+            if not pts:
+                continue
+            if s["style"] == "bar":
+                c = QColor(s["color"])
+                p.setPen(QPen(c, 2))
+                for t, v in pts:
+                    x = x_of(t)
+                    p.drawLine(QPointF(x, plot.bottom()), QPointF(x, y_of(v, s["axis"])))
+            else:
+                p.setPen(QPen(s["color"], 1.5))
+                p.drawPolyline(QPolygonF([QPointF(x_of(t), y_of(v, s["axis"])) for t, v in pts]))
+        p.setClipping(False)
+
+        # 標題與圖例
+        x = plot.left()
+        if self.title:
+            p.setPen(QColor("#c0ffe0"))
+            p.drawText(QPointF(x, 14), self.title)
+            x += p.fontMetrics().horizontalAdvance(self.title) + 16
+        for s in self._series:
+            p.fillRect(QRectF(x, 6, 10, 10), s["color"])
+            p.setPen(text)
+            label = f"{s['name']}" + (f"（{s['unit']}）" if s["unit"] else "")
+            p.drawText(QPointF(x + 14, 15), label)
+            x += p.fontMetrics().horizontalAdvance(label) + 30
+        p.end()
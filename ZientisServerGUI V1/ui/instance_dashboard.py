@@ -0,0 +1,104 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit, QTableWidget, QTableWidgetItem,
+    QAbstractItemView, QHeaderView
+)
+from PySide6.QtGui import QColor
+from PySide6.QtCore import QTimer
+
+from model.session_store import format_duration
+
+STATE_COLOR = {"running": "#50fa7b", "starting": "#f1fa8c", "stopping": "#ffb86c", "stopped": "#7a8a80",
+               "crashed": "#ff5555"}
+
+
+class InstanceDashboard(QWidget):
+    """多伺服器總覽：每台一列狀態與資源，操作透過 controller 交給 InstanceManager（不阻塞 UI）"""
+    COLUMNS = ["名稱", "狀態", "PID", "玩家", "CPU %", "記憶體 MB", "運行時間", "延遲（1 小時）"]
+
+    def __init__(self, controller, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        layout = QVBoxLayout(self)
+
+        self.lbl_totals = QLabel(self)
+        layout.addWidget(self.lbl_totals)
+
+        self.table = QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(len(self.COLUMNS) - 1, QHeaderView.Stretch)
+        layout.addWidget(self.table, 1)
+
+        buttons = QHBoxLayout()
+        for label, action in (("啟動", "start"), ("停止", "stop"), ("重啟", "restart"), ("備份", "backup")):
+            btn = QPushButton(label, self)
+            btn.clicked.connect(lambda _=False, a=action: self._on_action(a))
+            buttons.addWidget(btn)
+        buttons.addStretch(1)
+        layout.addLayout(buttons)
+
+        command_row = QHBoxLayout()
+        self.edit_command = QLineEdit(self)
+        self.edit_command.setPlaceholderText("對選取的伺服器送出指令（可多選）")
+        self.edit_command.returnPressed.connect(self._on_command)
+        btn_send = QPushButton("送出", self)
+        btn_send.clicked.connect(self._on_command)
+        command_row.addWidget(self.edit_command, 1)
+        command_row.addWidget(btn_send)
+        layout.addLayout(command_row)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(2000)
+
+    def selected_names(self):
+        rows = sorted({idx.row() for idx in self.table.selectedIndexes()})
+        return [self.table.item(r, 0).text() for r in rows if self.table.item(r, 0)]
+
+    def _on_action(self, action):
+        for name in self.selected_names():
+            self.controller.on_instance_action(name, action)
+        self.refresh()
+
+    def _on_command(self):
+        text = self.edit_command.text().strip()
+        names = self.selected_names()
+        if text and names:
+            for name in names:
+                self.controller.on_instance_command(name, text)
+            self.edit_command.clear()
+
+    def refresh(self):
+        """只在分頁顯示時更新；資料來自 InstanceManager 的快取"""
+        if not self.isVisible() or len(self.controller.instances) < 2:
+            return
+        rows = self.controller.instances.snapshot()
+        totals = self.controller.instances.totals(rows)
+        self.lbl_totals.setText(
+            f"共 {totals['instances']} 台，執行中 {totals['running']} 台｜玩家 {totals['players']}｜"
+            f"CPU {totals['cpu']}%｜記憶體 {totals['rss_mb']:.0f} MB")
+        table = self.table
+        table.setUpdatesEnabled(False)
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            values = [
+                row["name"],
+                row["state_text"] + ("（備份中）" if row["backup_running"] else ""),
+                str(row["pid"] or "-"),
+                str(row["players"]) if row["rcon"] else "-",
+                f"{row['cpu']:.1f}" if row["cpu"] is not None else "-",
+                f"{row['rss_mb']:.0f}" if row["rss_mb"] is not None else "-",
+                format_duration(row["uptime"]) if row["uptime"] else "-",
+                row["last_error"] or row["lag"],
+            ]
+            for c, value in enumerate(values):
+                item = table.item(r, c)
+                if item is None:
+                    item = QTableWidgetItem()
+                    table.setItem(r, c, item)
+                item.setText(value)
+            table.item(r, 1).setForeground(QColor(STATE_COLOR.get(row["state"], "#c0ffe0")))
+        table.setUpdatesEnabled(True)
@@ -1,12 +1,19 @@
 import os
 from PySide6.QtWidgets import (
-    QMainWindow, QFileDialog, QMessageBox, QListWidgetItem, QInputDialog, QMenu, QLabel, QPushButton, QTableWidget, QWidget
+    QMainWindow, QFileDialog, QMessageBox, QInputDialog, QMenu, QLabel, QPushButton, QTableWidget, QWidget,
+    QAbstractItemView, QProgressDialog, QListWidgetItem
 )
-from PySide6.QtGui import QShortcut, QAction, QColor, QTextCharFormat, QIcon, QPixmap
+from PySide6.QtGui import QShortcut, QColor, QTextCharFormat, QTextCursor
 from PySide6.QtUiTools import QUiLoader
 from PySide6.QtCore import QFile, Qt, QTimer, QDateTime
 
 from controller.server_controller import ServerController
+from model.session_store import format_duration
+from ui.charts import TimeSeriesChart
+from ui.instance_dashboard import InstanceDashboard
+from ui.player_list_model import PlayerListModel, PlayerFilterProxy, NameRole, RoleRole, ROLE_FILTER_OPTIONS
+from model.player import ROLE_PRIORITY
+from utils.jvm_flags import PROFILES, PROFILE_TEXT, LARGE_PAGE_MODES, LARGE_PAGE_TEXT
 
 class ZientisLauncherUI(QMainWindow):
     """Zientis GUI主視窗，僅負責UI與事件"""
@@ -30,10 +37,80 @@ class ZientisLauncherUI(QMainWindow):
         self.setup_shortcuts()
         self.set_custom_style()
 
+        # ========== 主控台（行數上限） ==========
+        self.ui.text_log.setReadOnly(True)
+        self.ui.text_log.setMaximumBlockCount(int(self.controller.config.get("console_max_lines", 5000)))
+        # 依解析出的等級上色
+        self._log_formats = {}
+        for level, color in (("WARN", "#ffb86c"), ("ERROR", "#ff5555"), ("FATAL", "#ff5555"), ("DEBUG", "#7a8a80"), ("TRACE", "#7a8a80")):
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self._log_formats[level] = fmt
+        self._log_default_fmt = QTextCharFormat()
+
+        # ========== 日誌搜尋 ==========
+        self.ui.combo_log_level.addItems(["全部等級", "INFO 以上", "WARN 以上", "ERROR 以上"])
+        self._log_search_timer = QTimer(self)
+        self._log_search_timer.setSingleShot(True)
+        self._log_search_timer.setInterval(150)
+        self._log_search_timer.timeout.connect(self._on_log_search_changed)
+        self.ui.edit_log_search.textChanged.connect(self._log_search_timer.start)
+        self.ui.combo_log_level.currentIndexChanged.connect(self._log_search_timer.start)
+        self.ui.check_log_regex.toggled.connect(self._log_search_timer.start)
+        self.ui.check_log_history.toggled.connect(self._log_search_timer.start)
+
+        # ========== JVM 參數方案 ==========
+        for key in PROFILES:
+            self.ui.combo_jvm_profile.addItem(PROFILE_TEXT[key], key)
+        for key in LARGE_PAGE_MODES:
+            self.ui.combo_large_pages.addItem(LARGE_PAGE_TEXT[key], key)
+        self.ui.lbl_launch_preview.setStyleSheet("font-family: Consolas, monospace; color: #c0ffe0;")
+
+        # ========== 玩家列表（model/view） ==========
+        self.player_model = PlayerListModel(
+            self.controller.player_table, self.get_player_head_icon, self.controller.player_status_text, self)
+        self.player_proxy = PlayerFilterProxy(self)
+        self.player_proxy.setSourceModel(self.player_model)
+        self.player_proxy.sort(0)
+        self.ui.list_players.setModel(self.player_proxy)
+        self.ui.list_players.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.bulk_progress = None
+        self.player_info_box = None
+        self.ui.combo_player_role.addItems(ROLE_FILTER_OPTIONS)
+        self.ui.edit_player_search.textChanged.connect(self.player_proxy.set_search_text)
+        self.ui.combo_player_role.currentIndexChanged.connect(
+            lambda idx: self.player_proxy.set_role_filter(ROLE_FILTER_OPTIONS[idx] if idx > 0 else None))
+        self.ui.check_player_online.toggled.connect(self.player_proxy.set_online_only)
+
         # ========== 玩家列表事件 ==========
         self.ui.list_players.setContextMenuPolicy(Qt.CustomContextMenu)
         self.ui.list_players.customContextMenuRequested.connect(self.show_player_context_menu)
-        self.ui.list_players.itemDoubleClicked.connect(self.show_player_info_dialog)
+        self.ui.list_players.doubleClicked.connect(self.show_player_info_dialog)
+
+        # ========== 效能（延遲時間序列） ==========
+        self.lag_chart = TimeSeriesChart(self.ui.tab_perf, title="延遲")
+        self.ui.vbox_perf.insertWidget(1, self.lag_chart, 1)
+        self.tick_chart = TimeSeriesChart(self.ui.tab_perf, title="Tick 健康")
+        self.ui.vbox_perf.insertWidget(2, self.tick_chart, 1)
+        self.proc_chart = TimeSeriesChart(self.ui.tab_perf, title="伺服器程序")
+        self.ui.vbox_perf.insertWidget(3, self.proc_chart, 1)
+        self.io_chart = TimeSeriesChart(self.ui.tab_perf, title="I/O 與執行緒")
+        self.ui.vbox_perf.insertWidget(4, self.io_chart, 1)
+        self.lbl_proc_summary = QLabel(self.ui.tab_perf)
+        self.ui.vbox_perf.insertWidget(5, self.lbl_proc_summary)
+        self._perf_windows = [("最近 1 小時", 3600), ("最近 6 小時", 6 * 3600), ("最近 24 小時", 24 * 3600),
+                              ("最近 7 天", 7 * 86400), ("最近 30 天", 30 * 86400)]
+        self.ui.combo_perf_window.addItems([label for label, _ in self._perf_windows])
+        self.ui.combo_perf_window.currentIndexChanged.connect(self.refresh_perf_tab)
+        self.perf_timer = QTimer(self)
+        self.perf_timer.timeout.connect(self.refresh_perf_tab)
+        self.perf_timer.start(2000)
+
+        # ========== 多伺服器（設定了 instances 才顯示） ==========
+        self.instance_dashboard = None
+        if len(self.controller.instances) > 1:
+            self.instance_dashboard = InstanceDashboard(self.controller, self.ui.tabWidget)
+            self.ui.tabWidget.insertTab(self.ui.tabWidget.indexOf(self.ui.tab_settings), self.instance_dashboard, "多伺服器")
 
     def setup_ui(self):
         """初始化UI元件、事件繫結"""
@@ -45,6 +122,7 @@ class ZientisLauncherUI(QMainWindow):
         self.ui.btn_start.clicked.connect(self.controller.on_start_server)
         self.ui.btn_stop.clicked.connect(self.controller.on_stop_server)
         self.ui.btn_restart.clicked.connect(self.controller.on_restart_server)
+        self.ui.btn_attach.clicked.connect(self.controller.on_attach_server)
 
         # 選擇路徑
         self.ui.btn_core_path.clicked.connect(self.controller.on_select_core_path)
@@ -65,6 +143,10 @@ class ZientisLauncherUI(QMainWindow):
         if hasattr(self.ui, "btn_plugin_disable"):
             self.ui.btn_plugin_disable.clicked.connect(self.controller.on_plugin_disable)
 
+        # 效能分頁
+        self.ui.btn_boot_report.clicked.connect(self.controller.on_show_boot_report)
+        self.ui.btn_benchmark.clicked.connect(self.controller.on_run_benchmark)
+
         # 備份
         if hasattr(self.ui, "btn_backup"):
             self.ui.btn_backup.clicked.connect(self.controller.on_manual_backup)
@@ -84,25 +166,27 @@ class ZientisLauncherUI(QMainWindow):
         self.ui.edit_args.textChanged.connect(self.controller.on_preview_launch_cmd)
         self.ui.spin_xms.valueChanged.connect(self.controller.on_preview_launch_cmd)
         self.ui.spin_xmx.valueChanged.connect(self.controller.on_preview_launch_cmd)
+        self.ui.edit_java_path.editingFinished.connect(self.controller.on_preview_launch_cmd)
+        self.ui.combo_jvm_profile.currentIndexChanged.connect(self.controller.on_preview_launch_cmd)
+        self.ui.combo_large_pages.currentIndexChanged.connect(self.controller.on_preview_launch_cmd)
 
         # 初始化狀態
         self.controller.on_load_last_config()
         self.controller.reload_plugins_list()
 
-        # 狀態更新計時器
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.controller.on_update_status)
-        self.status_timer.start(1000)
+        # 狀態列由 controller.status_timer 每秒更新一次
 
         # --- StatusBar動態欄 ---
         self.label_time = QLabel("系統時間：")
         self.label_cpu = QLabel("CPU：")
         self.label_ram = QLabel("RAM：")
         self.label_rcon = QLabel("RCON：未連線")
+        self.label_tps = QLabel("TPS：-")
         self.statusBar().addPermanentWidget(self.label_time)
         self.statusBar().addPermanentWidget(self.label_cpu)
         self.statusBar().addPermanentWidget(self.label_ram)
         self.statusBar().addPermanentWidget(self.label_rcon)
+        self.statusBar().addPermanentWidget(self.label_tps)
 
     def setup_shortcuts(self):
         """設定快捷鍵"""
@@ -116,7 +200,7 @@ class ZientisLauncherUI(QMainWindow):
         """自定義美術風格"""
         self.setStyleSheet("""
         QMainWindow {background: #1b1e24;}
-        QLabel, QCheckBox, QLineEdit, QSpinBox, QComboBox, QListWidget, QTextEdit, QProgressBar {
+        QLabel, QCheckBox, QLineEdit, QSpinBox, QComboBox, QListWidget, QListView, QTextEdit, QPlainTextEdit, QProgressBar {
             color: #c0ffe0; font-family: '標楷體'; font-size: 13px;
         }
         QPushButton {
@@ -133,7 +217,7 @@ class ZientisLauncherUI(QMainWindow):
             height: 14px;
         }
         QProgressBar::chunk { background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #38d982, stop:1 #217c4a);}
-        QTextEdit, QLineEdit, QListWidget {background: #242a34; border: 1px solid #38d982; border-radius: 6px;}
+        QTextEdit, QPlainTextEdit, QLineEdit, QListWidget, QListView {background: #242a34; border: 1px solid #38d982; border-radius: 6px;}
         """)
 
     # ============ UI幫助函式區 ============
@@ -148,6 +232,8 @@ class ZientisLauncherUI(QMainWindow):
             self.ui.spin_xms.setValue(cfg.get("xms", 1024))
             self.ui.spin_xmx.setValue(cfg.get("xmx", 2048))
             self.ui.edit_args.setText(cfg.get("args", ""))
+            self.ui.combo_jvm_profile.setCurrentIndex(max(0, self.ui.combo_jvm_profile.findData(cfg.get("jvm_profile", "manual"))))
+            self.ui.combo_large_pages.setCurrentIndex(max(0, self.ui.combo_large_pages.findData(cfg.get("large_pages", "auto"))))
             self.ui.spin_port.setValue(cfg.get("port", 25565))
             self.ui.spin_max_players.setValue(cfg.get("max_players", 20))
             self.ui.edit_world_path.setText(cfg.get("world", ""))
@@ -170,37 +256,135 @@ class ZientisLauncherUI(QMainWindow):
 
     def append_log(self, text, is_error=False):
         """日誌顯示區，支援錯誤高亮"""
-        cursor = self.ui.text_log.textCursor()
-        if is_error:
-            format = QTextCharFormat()
-            format.setForeground(QColor("#ff5555"))
-            cursor.setCharFormat(format)
-        self.ui.text_log.append(text)
+        self.append_log_batch([(text, "ERROR" if is_error else "INFO")])
+
+    def append_log_batch(self, lines):
+        """
+        一次寫入多行日誌（單一編輯區塊，只重新排版一次）
+        lines: List[(text, level)]，level 為 log_parser.LEVELS 的等級名稱
+        """
+        log = self.ui.text_log
+        cap = log.maximumBlockCount()
+        if cap > 0 and len(lines) > cap:
+            lines = lines[-cap:]   # 超過上限的部分寫入後也會被裁掉
+        bar = log.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 4
+        cursor = QTextCursor(log.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        empty = log.document().isEmpty()
+        formats, default = self._log_formats, self._log_default_fmt
+        for text, level in lines:
+            if not empty:
+                cursor.insertBlock()
+            empty = False
+            cursor.insertText(text, formats.get(level, default))
+        cursor.endEditBlock()
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def _on_log_search_changed(self):
+        levels = [None, "INFO", "WARN", "ERROR"]
+        self.controller.on_log_search(
+            self.ui.edit_log_search.text().strip(),
+            levels[self.ui.combo_log_level.currentIndex()],
+            self.ui.check_log_regex.isChecked(),
+            self.ui.check_log_history.isChecked(),
+        )
+
+    def show_log_search_results(self, results, elapsed_ms):
+        """顯示日誌搜尋結果（新到舊）；results 為 None 代表清除搜尋"""
+        view = self.ui.list_log_results
+        view.setUpdatesEnabled(False)
+        view.clear()
+        if results is None:
+            self.ui.lbl_log_search.setText("")
+        else:
+            for seq, level, raw in results:
+                item = QListWidgetItem(raw)
+                fmt = self._log_formats.get(level)
+                if fmt:
+                    item.setForeground(fmt.foreground())
+                view.addItem(item)
+            self.ui.lbl_log_search.setText(f"{len(results)} 筆（{elapsed_ms:.0f} ms）")
+        view.setUpdatesEnabled(True)
+
+    def show_log_search_error(self, err):
+        self.ui.lbl_log_search.setText(f"查詢錯誤：{err}")
+
+    # ========== 效能分頁 ==========
+    LAG_MARKER_COLORS = {"gc": "#ffb86c", "chunk": "#50fa7b", "backup": "#8be9fd", "watchdog": "#ff5555"}
+
+    def refresh_perf_tab(self):
+        """只在效能分頁顯示時重繪圖表與尖峰原因"""
+        if not self.ui.tab_perf.isVisible():
+            return
+        window = self._perf_windows[self.ui.combo_perf_window.currentIndex()][1]
+        since = QDateTime.currentSecsSinceEpoch() - window
+        tracker = self.controller.lag_tracker
+        self.lag_chart.set_window(window)
+        self.lag_chart.set_series("落後", tracker.series("lag", since), "#ff5555", style="bar", unit="ms")
+        self.lag_chart.set_series("GC 暫停", tracker.series("gc", since), "#ffb86c", style="bar", unit="ms")
+        self.lag_chart.set_series("玩家", self.controller.metrics_store.series("players", since), "#8be9fd", axis="right")
+        self.lag_chart.set_markers(tracker.markers(since=since), self.LAG_MARKER_COLORS)
+        self.ui.lbl_lag_summary.setText(tracker.summary(since))
+        store = self.controller.metrics_store
+        self.tick_chart.set_window(window)
+        self.tick_chart.set_series("MSPT", store.series("mspt", since), "#ffb86c", unit="ms")
+        self.tick_chart.set_series("MSPT 最大", store.series("mspt_max", since, field="max"), "#ff5555", unit="ms")
+        self.tick_chart.set_series("TPS", store.series("tps", since), "#50fa7b", axis="right")
+        self._refresh_process_charts(window, since)
+        view = self.ui.list_lag_events
+        view.setUpdatesEnabled(False)
+        view.clear()
+        for spike in tracker.correlate(since=since):
+            when = QDateTime.fromSecsSinceEpoch(int(spike["t"])).toString("MM/dd HH:mm:ss")
+            causes = "、".join(spike["causes"]) or "無明顯原因"
+            players = spike["players"] if spike["players"] is not None else "-"
+            view.addItem(f"{when}  落後 {spike['ms']} ms（{spike['ticks']} ticks），玩家 {players}：{causes}")
+        view.setUpdatesEnabled(True)
+
+    def _refresh_process_charts(self, window, since):
+        sampler = self.controller.process_sampler
+        store = self.controller.metrics_store
+        self.proc_chart.set_window(window)
+        if window <= sampler.interval * sampler.samples.maxlen:
+            series = lambda field, scale=1.0: sampler.series(field, since, scale)
+        else:
+            # 超過取樣器保留的範圍時改用指標資料庫的彙總資料（每分鐘／每小時平均）
+            series = lambda field, scale=1.0: store.series(f"server_{field}", since, scale=scale)
+        self.proc_chart.set_series("CPU", series("cpu"), "#50fa7b", unit="%")
+        self.proc_chart.set_series("主機 CPU", store.series("host_cpu", since), "#6272a4", unit="%")
+        self.proc_chart.set_series("RSS", series("rss_mb"), "#bd93f9", axis="right", unit="MB")
+        self.io_chart.set_window(window)
+        self.io_chart.set_series("讀取", series("read_bps", 1 / 1024), "#8be9fd", unit="KB/s")
+        self.io_chart.set_series("寫入", series("write_bps", 1 / 1024), "#ffb86c", unit="KB/s")
+        self.io_chart.set_series("執行緒", series("threads"), "#f1fa8c", axis="right")
+        s = sampler.latest
+        if s is None:
+            self.lbl_proc_summary.setText("伺服器未執行")
+            return
+        self.lbl_proc_summary.setText(
+            f"CPU {s.cpu}%｜RSS {s.rss_mb:.0f} MB｜執行緒 {s.threads}｜檔案/handle {s.fds}｜"
+            f"讀取 {s.read_bps / 1024:.0f} KB/s｜寫入 {s.write_bps / 1024:.0f} KB/s｜"
+            f"情境切換 {s.ctx}/s｜取樣負擔 {sampler.overhead}%")
 
     # ========== 玩家清單與頭像、右鍵 ==========
-    def show_player_list(self, player_list):
+    def show_player_list(self, player_names, role_lookup=None):
         """
-        顯示玩家名單與職位、頭像，名單自動排序
-        player_list: List[Player] (含 name, role 屬性)
+        同步線上玩家名單（增量更新 model，排序/篩選由 proxy 處理）
+        player_names: List[str]
         """
-        self.ui.list_players.clear()
-        for player in sorted(player_list, key=lambda x: (x.role != "管理員", x.name.lower())):
-            item = QListWidgetItem(player.name)
-            # 下載或取得頭像（快取）
-            head_path = self.get_player_head_icon(player.name)
-            if head_path:
-                icon = QIcon(QPixmap(head_path))
-                item.setIcon(icon)
-            # 標記職位
-            item.setData(Qt.UserRole, player.role)
-            role_text = f" [{player.role}]" if player.role else ""
-            item.setText(f"{player.name}{role_text}")
-            self.ui.list_players.addItem(item)
+        self.player_model.sync_online(player_names, role_lookup)
+
+    def add_known_players(self, players):
+        """加入 usercache 等來源的已知（離線）玩家"""
+        self.player_model.add_known(players)
 
     def get_player_head_icon(self, player_name):
         """
         取得玩家頭像圖片檔案路徑，無則線上下載、快取本地
-        支援 Minecraft UUID/名稱頭像 (mc-heads.net)
+        支援 Minecraft UUID/名稱頭像 (mc-heads.net)，有 UUID 時優先使用
         """
         head_dir = "./.player_heads"
         os.makedirs(head_dir, exist_ok=True)
@@ -208,7 +392,8 @@ class ZientisLauncherUI(QMainWindow):
         if not os.path.isfile(path):
             import requests
             try:
-                url = f"https://mc-heads.net/avatar/{player_name}/32"
+                key = self.controller.uuid_for(player_name) or player_name
+                url = f"https://mc-heads.net/avatar/{key}/32"
                 resp = requests.get(url, timeout=2)
                 if resp.status_code == 200:
                     with open(path, "wb") as f:
@@ -217,38 +402,129 @@ class ZientisLauncherUI(QMainWindow):
                 return None
         return path if os.path.isfile(path) else None
 
+    def selected_player_names(self):
+        return [idx.data(NameRole) for idx in self.ui.list_players.selectionModel().selectedIndexes()]
+
     def show_player_context_menu(self, point):
-        """顯示玩家右鍵功能表（管理指令）"""
-        item = self.ui.list_players.itemAt(point)
-        if not item:
+        """顯示玩家右鍵功能表（支援多選批次管理）"""
+        index = self.ui.list_players.indexAt(point)
+        if not index.isValid():
             return
+        names = self.selected_player_names()
+        if index.data(NameRole) not in names:
+            names = [index.data(NameRole)]
+        roles = {self.controller.role_mgr.get_role(n) for n in names}
+        label = names[0] if len(names) == 1 else f"{len(names)} 名玩家"
         menu = QMenu(self)
-        kick_act = QAction("踢出", self)
-        ban_act = QAction("封禁", self)
-        promote_act = QAction("設為管理員", self)
-        demote_act = QAction("降為玩家", self)
-        role = item.data(Qt.UserRole)
-        # 根據職位自動判斷可用項
-        if role == "管理員":
-            promote_act.setEnabled(False)
-        if role != "管理員":
-            demote_act.setEnabled(False)
-        kick_act.triggered.connect(lambda: self.controller.rcon_mgr.kick_player(item.text().split()[0]))
-        ban_act.triggered.connect(lambda: self.controller.rcon_mgr.ban_player(item.text().split()[0]))
-        promote_act.triggered.connect(lambda: self.controller.role_mgr.set_role(item.text().split()[0], "管理員"))
-        demote_act.triggered.connect(lambda: self.controller.role_mgr.set_role(item.text().split()[0], "玩家"))
-        menu.addAction(kick_act)
-        menu.addAction(ban_act)
+        menu.addSection(label)
+        menu.addAction("踢出", lambda: self._confirm_bulk_action("kick", "踢出", names))
+        menu.addAction("封禁", lambda: self._confirm_bulk_action("ban", "封禁", names))
+        menu.addAction("解除封禁", lambda: self._confirm_bulk_action("pardon", "解除封禁", names, ask_reason=False))
         menu.addSeparator()
-        menu.addAction(promote_act)
-        menu.addAction(demote_act)
+        menu.addAction("加入白名單", lambda: self.controller.on_bulk_player_action("whitelist_add", names))
+        menu.addAction("移出白名單", lambda: self.controller.on_bulk_player_action("whitelist_remove", names))
+        menu.addSeparator()
+        role_menu = menu.addMenu("設定職位")
+        for role in sorted(ROLE_PRIORITY, key=ROLE_PRIORITY.get):
+            act = role_menu.addAction(role, lambda r=role: self.controller.on_bulk_player_action("role", names, role=r))
+            # 全部已是該職位時停用
+            act.setEnabled(roles != {role})
         menu.exec(self.ui.list_players.viewport().mapToGlobal(point))
 
-    def show_player_info_dialog(self, item):
+    def _confirm_bulk_action(self, action, label, names, ask_reason=True):
+        reason = ""
+        if ask_reason:
+            reason, ok = QInputDialog.getText(self, label, f"{label} {len(names)} 名玩家，原因（可留空）：")
+            if not ok:
+                return
+        elif len(names) > 1 and QMessageBox.question(self, label, f"確定要對 {len(names)} 名玩家執行「{label}」？") != QMessageBox.Yes:
+            return
+        self.controller.on_bulk_player_action(action, names, reason.strip())
+
+    def begin_bulk_progress(self, action, total):
+        self.bulk_progress = QProgressDialog(f"執行中：{action}", None, 0, total, self)
+        self.bulk_progress.setWindowModality(Qt.WindowModal)
+        self.bulk_progress.setMinimumDuration(300)
+        self.bulk_progress.setValue(0)
+
+    def update_bulk_progress(self, done, total):
+        if self.bulk_progress:
+            self.bulk_progress.setMaximum(total)
+            self.bulk_progress.setValue(done)
+
+    def show_bulk_report(self, action, results):
+        """批次操作結果報告：摘要 + 逐一玩家明細"""
+        if self.bulk_progress:
+            self.bulk_progress.close()
+            self.bulk_progress = None
+        failed = [(n, msg) for n, ok, msg in results if not ok]
+        box = QMessageBox(self)
+        box.setWindowTitle("批次操作結果")
+        box.setIcon(QMessageBox.Warning if failed else QMessageBox.Information)
+        box.setText(f"{action}：成功 {len(results) - len(failed)} / {len(results)}，失敗 {len(failed)}")
+        box.setDetailedText("\n".join(f"{'✔' if ok else '✘'} {n}：{msg}" for n, ok, msg in results))
+        box.exec()
+
+    def refresh_player_roles(self, role_lookup, names):
+        self.player_model.update_roles(names, role_lookup)
+
+    def show_player_info_dialog(self, index):
         """雙擊顯示玩家詳細資料（可擴充更多資訊）"""
-        name = item.text().split()[0]
-        role = item.data(Qt.UserRole)
-        QMessageBox.information(self, "玩家資訊", f"名稱：{name}\n職位：{role}")
+        name = index.data(NameRole)
+        role = index.data(RoleRole)
+        lines = [f"名稱：{name}", f"職位：{role}", f"UUID：{self.controller.resolve_uuid(name)}"]
+        status = self.controller.player_status_text(name)
+        if status:
+            lines.append(f"狀態：{status}")
+        summary = self.controller.session_store.get_player_summary(name)
+        if summary:
+            fmt = lambda t: QDateTime.fromSecsSinceEpoch(int(t)).toString("yyyy/MM/dd HH:mm")
+            lines.append(f"總遊玩時間：{format_duration(summary['playtime'])}")
+            lines.append(f"遊玩次數：{summary['sessions']}")
+            lines.append(f"首次上線：{fmt(summary['first_seen'])}")
+            if summary["online_since"]:
+                lines.append(f"本次上線：{fmt(summary['online_since'])}")
+            else:
+                lines.append(f"最後上線：{fmt(summary['last_seen'])}")
+            for start, end, _ in reversed(summary["recent"][-5:]):
+                lines.append(f"  {fmt(start)} ～ {fmt(end)}（{format_duration(end - start)}）")
+        last_join = self.controller.history_last_join(name)
+        if last_join:
+            lines.append(f"歷史日誌最後加入：{last_join}")
+        self._player_info_name = name
+        self._player_info_lines = lines
+        stats = self.controller.request_player_stats(name)
+        if self.player_info_box is None:
+            self.player_info_box = QMessageBox(self)
+            self.player_info_box.setWindowTitle("玩家資訊")
+            self.player_info_box.setModal(False)
+        self._render_player_info(stats)
+        self.player_info_box.show()
+
+    def update_player_stats(self, name, stats):
+        """背景載入完成時更新仍開著的玩家資訊視窗"""
+        if self.player_info_box and self.player_info_box.isVisible() and self._player_info_name == name:
+            self._render_player_info(stats)
+
+    def _render_player_info(self, stats):
+        lines = list(self._player_info_lines)
+        if stats is None:
+            lines.append("\n世界資料載入中…")
+        elif stats:
+            lines.append("")
+            if "pos" in stats:
+                x, y, z = stats["pos"]
+                lines.append(f"最後位置：{x}, {y}, {z}（{stats.get('dimension', '')}）")
+            if "health" in stats:
+                lines.append(f"生命值：{stats['health']:.1f}　飢餓值：{stats.get('food', '-')}　等級：{stats.get('xp_level', '-')}")
+            if "play_ticks" in stats:
+                lines.append(f"遊戲內時間：{format_duration(stats['play_ticks'] / 20)}")
+            if "advancements_done" in stats:
+                lines.append(f"已完成進度：{stats['advancements_done']}")
+            if stats.get("top_stats"):
+                lines.append("統計前幾名：")
+                lines.extend(f"  {key}：{value}" for key, value in stats["top_stats"])
+        self.player_info_box.setText("\n".join(lines))
 
     # ========== 熱插拔狀態反映 ==========
     def set_plugman_status(self, enabled: bool):
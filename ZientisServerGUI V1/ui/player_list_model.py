@@ -0,0 +1,168 @@
+# ui/player_list_model.py
+import os
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QObject, QThreadPool, Signal
+)
+from PySide6.QtGui import QIcon, QPixmap, QColor
+
+from model.player import ROLE_PRIORITY
+
+NameRole = Qt.UserRole + 1
+RoleRole = Qt.UserRole
+OnlineRole = Qt.UserRole + 2
+UuidRole = Qt.UserRole + 3
+
+
+class _HeadSignals(QObject):
+    ready = Signal(str)
+
+
+class PlayerListModel(QAbstractListModel):
+    """
+    以 PlayerTable 為資料來源的玩家清單 model。
+    只有可見列會被 view 查詢，頭像在背景下載後才通知重繪。
+    """
+    HEAD_DIR = "./.player_heads"
+
+    def __init__(self, table, head_fetcher=None, status_lookup=None, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.status_lookup = status_lookup   # name -> 白名單/OP/封禁狀態文字
+        self.head_fetcher = head_fetcher     # name -> 本地圖檔路徑（可能需下載）
+        self._icons = {}
+        self._pending = set()
+        self._signals = _HeadSignals()
+        self._signals.ready.connect(self._on_head_ready)
+        self._offline_color = QColor("#7a8a80")
+        # 對外公布的列數；PlayerTable 先 append，通知前仍回報舊列數
+        self._row_count = len(table)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        p = self.table[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{p.name} [{p.role}]" if p.role else p.name
+        if role == Qt.DecorationRole:
+            return self._icon_for(p.name)
+        if role == Qt.ForegroundRole and not p.online:
+            return self._offline_color
+        if role == Qt.ToolTipRole:
+            tip = f"{p.name}\n職位：{p.role}\n{'線上' if p.online else '離線'}"
+            status = self.status_lookup(p.name) if self.status_lookup else ""
+            return f"{tip}\n{status}" if status else tip
+        if role == NameRole:
+            return p.name
+        if role == RoleRole:
+            return p.role
+        if role == OnlineRole:
+            return p.online
+        if role == UuidRole:
+            return p.uuid
+        return None
+
+    # ========== 增量更新 ==========
+    def sync_online(self, online_names, role_lookup=None):
+        """同步線上名單，僅發出插入/變更通知"""
+        self._notify(*self.table.sync_online(online_names, role_lookup))
+
+    def add_known(self, players):
+        """加入已知離線玩家（例如 usercache）"""
+        self._notify(*self.table.load_known(players))
+
+    def _notify(self, added, changed):
+        first = self._row_count
+        if added:
+            self.beginInsertRows(QModelIndex(), first, first + added - 1)
+            self._row_count = len(self.table)
+            self.endInsertRows()
+        for row in changed:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx)
+
+    def update_roles(self, names, role_lookup):
+        """職位變更後更新對應列（proxy 會自動重新排序）；新玩家走插入通知"""
+        added, rows = 0, []
+        for name in names:
+            row, is_new, changed = self.table.upsert(name, role_lookup(name))
+            if is_new:
+                added += 1
+            elif changed:
+                rows.append(row)
+        self._notify(added, rows)
+
+    def refresh_player(self, name):
+        row = self.table.index.get(name)
+        if row is not None:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx)
+
+    # ========== 頭像 ==========
+    def _icon_for(self, name):
+        icon = self._icons.get(name)
+        if icon is not None:
+            return icon
+        path = os.path.join(self.HEAD_DIR, f"{name}.png")
+        if os.path.isfile(path):
+            icon = self._icons[name] = QIcon(QPixmap(path))
+            return icon
+        if self.head_fetcher and name not in self._pending:
+            self._pending.add(name)
+            QThreadPool.globalInstance().start(lambda n=name: self._fetch_head(n))
+        return None
+
+    def _fetch_head(self, name):
+        # 背景執行緒：下載完成後透過 signal 回到 GUI 執行緒
+        try:
+            self.head_fetcher(name)
+        finally:
+            self._signals.ready.emit(name)
+
+    def _on_head_ready(self, name):
+        self._pending.discard(name)
+        path = os.path.join(self.HEAD_DIR, f"{name}.png")
+        if os.path.isfile(path):
+            self._icons[name] = QIcon(QPixmap(path))
+            self.refresh_player(name)
+
+
+class PlayerFilterProxy(QSortFilterProxyModel):
+    """玩家搜尋、職位篩選，依 ROLE_PRIORITY → 線上 → 名稱排序"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text = ""
+        self._role = None
+        self._online_only = False
+        self.setDynamicSortFilter(True)
+
+    def set_search_text(self, text):
+        self._text = text.strip().lower()
+        self.invalidateFilter()
+
+    def set_role_filter(self, role):
+        self._role = role or None
+        self.invalidateFilter()
+
+    def set_online_only(self, online_only):
+        self._online_only = bool(online_only)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        p = self.sourceModel().table[source_row]
+        if self._online_only and not p.online:
+            return False
+        if self._role and p.role != self._role:
+            return False
+        if self._text and self._text not in p.name.lower():
+            return False
+        return True
+
+    def lessThan(self, left, right):
+        table = self.sourceModel().table
+        return table[left.row()].sort_key() < table[right.row()].sort_key()
+
+
+ROLE_FILTER_OPTIONS = ["全部"] + sorted(ROLE_PRIORITY, key=ROLE_PRIORITY.get)
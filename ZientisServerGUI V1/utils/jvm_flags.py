@@ -0,0 +1,268 @@
+import os
+import re
+import shlex
+import platform
+import subprocess
+
+import psutil
+
+# 方案：manual 只用使用者填的參數；auto 依主機與 Java 版本挑 G1 或 ZGC
+PROFILES = ("manual", "auto", "g1", "zgc")
+PROFILE_TEXT = {"manual": "手動", "auto": "自動建議", "g1": "G1GC（Aikar）", "zgc": "ZGC"}
+LARGE_PAGE_MODES = ("auto", "on", "off")
+LARGE_PAGE_TEXT = {"auto": "自動偵測", "on": "強制開啟", "off": "關閉"}
+
+_VERSION_RE = re.compile(r'version "(\d+)(?:\.(\d+))?[^"]*"')
+# 放在 -jar 之前的 JVM 參數；其他字詞視為伺服器參數（放在核心 jar 之後）
+_JVM_ARG_RE = re.compile(r"^(?:-X|-D|-javaagent:|-agentlib:|-agentpath:|-ea\b|-da\b|-server$|-verbose|"
+                         r"--add-opens|--add-exports|--add-modules|--enable-preview|--enable-native-access|"
+                         r"-cp$|-classpath$|--class-path)")
+# 值放在下一個字詞的 JVM 參數（如 --add-opens java.base/java.lang=ALL-UNNAMED），值要跟著放在 -jar 之前
+_JVM_VALUE_ARGS = ("--add-opens", "--add-exports", "--add-modules", "--add-reads",
+                   "--enable-native-access", "-cp", "-classpath", "--class-path")
+_GC_FLAGS = ("UseG1GC", "UseZGC", "UseShenandoahGC", "UseParallelGC", "UseSerialGC", "UseConcMarkSweepGC")
+# 需要 -XX:+UnlockExperimentalVMOptions 才能使用的選項
+_EXPERIMENTAL = ("G1NewSizePercent", "G1MaxNewSizePercent", "G1MixedGCLiveThresholdPercent")
+
+_java_cache = {}
+
+
+# ========== 主機與 Java ==========
+def host_info():
+    """總記憶體、邏輯核心數與大分頁支援（Linux 讀 /proc 與 /sys）"""
+    info = {
+        "ram_mb": psutil.virtual_memory().total // (1024 * 1024),
+        "cores": os.cpu_count() or 1,
+        "os": platform.system(),
+        "hugepages": 0,          # 預先配置的 HugePages 數
+        "thp": None,             # 透明大分頁模式：always / madvise / never
+    }
+    if info["os"] == "Linux":
+        try:
+            with open("/proc/meminfo", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("HugePages_Total:"):
+                        info["hugepages"] = int(line.split()[1])
+        except (OSError, ValueError):
+            pass
+        try:
+            with open("/sys/kernel/mm/transparent_hugepage/enabled", encoding="ascii") as f:
+                m = re.search(r"\[(\w+)\]", f.read())
+                info["thp"] = m.group(1) if m else None
+        except OSError:
+            pass
+    return info
+
+
+def java_version(java_path, timeout=5):
+    """執行 java -version 取得主版本（8、17、21…），失敗回傳 None；依路徑與修改時間快取"""
+    java_path = java_path or "java"
+    try:
+        key = (java_path, os.path.getmtime(java_path))
+    except OSError:
+        key = (java_path, None)
+    if key in _java_cache:
+        return _java_cache[key]
+    try:
+        out = subprocess.run([java_path, "-version"], capture_output=True, text=True, timeout=timeout)
+        m = _VERSION_RE.search(out.stderr + out.stdout)
+        major = None
+        if m:
+            major = int(m.group(1))
+            if major == 1 and m.group(2):      # 1.8.0_xxx
+                major = int(m.group(2))
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"[DEBUG] java -version 失敗: {e}")
+        major = None
+    _java_cache[key] = major
+    return major
+
+
+def cached_java_version(java_path):
+    """只查快取，不執行程序（供即時預覽使用）；未查過回傳 False"""
+    java_path = java_path or "java"
+    try:
+        key = (java_path, os.path.getmtime(java_path))
+    except OSError:
+        key = (java_path, None)
+    return _java_cache.get(key, False)
+
+
+def suggest_heap_mb(host):
+    """建議的堆積大小：保留約 15%（至少 1.5 GB）給系統與 JVM 堆外記憶體"""
+    reserve = max(1536, host["ram_mb"] * 15 // 100)
+    return max(1024, (host["ram_mb"] - reserve) // 512 * 512)
+
+
+# ========== 產生參數 ==========
+def choose_gc(profile, java_major, heap_mb, cores):
+    if profile in ("g1", "zgc"):
+        return "zgc" if profile == "zgc" and (java_major or 0) >= 15 else "g1"
+    # 自動：Java 21+ 的分代 ZGC 在大堆積、多核心時暫停時間更短；其餘用 G1
+    if (java_major or 0) >= 21 and heap_mb >= 12 * 1024 and cores >= 8:
+        return "zgc"
+    return "g1"
+
+
+def gc_fallback_warning(profile, java_major):
+    """ZGC 方案因 Java 版本未知或低於 15 而改用 G1 時回傳說明，否則 None"""
+    if profile != "zgc" or (java_major or 0) >= 15:
+        return None
+    if not java_major:
+        return "無法確認 Java 版本，ZGC 方案改用 G1（ZGC 需要 Java 15 以上）"
+    return f"Java {java_major} 沒有正式版 ZGC，ZGC 方案改用 G1（需要 Java 15 以上）"
+
+
+def g1_flags(heap_mb):
+    """Aikar 的 G1 參數；12 GB 以上改用較大的新生代與區塊"""
+    big = heap_mb >= 12 * 1024
+    return [
+        "-XX:+UseG1GC",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:MaxGCPauseMillis=200",
+        "-XX:+UnlockExperimentalVMOptions",
+        "-XX:+DisableExplicitGC",
+        f"-XX:G1NewSizePercent={40 if big else 30}",
+        f"-XX:G1MaxNewSizePercent={50 if big else 40}",
+        f"-XX:G1HeapRegionSize={'16M' if big else '8M'}",
+        f"-XX:G1ReservePercent={15 if big else 20}",
+        "-XX:G1HeapWastePercent=5",
+        "-XX:G1MixedGCCountTarget=4",
+        f"-XX:InitiatingHeapOccupancyPercent={20 if big else 15}",
+        "-XX:G1MixedGCLiveThresholdPercent=90",
+        "-XX:G1RSetUpdatingPauseTimePercent=5",
+        "-XX:SurvivorRatio=32",
+        "-XX:+PerfDisableSharedMem",
+        "-XX:MaxTenuringThreshold=1",
+        "-Dusing.aikars.flags=https://mcflags.emc.gs",
+        "-Daikars.new.flags=true",
+    ]
+
+
+def zgc_flags(java_major):
+    flags = ["-XX:+UseZGC"]
+    if java_major in (21, 22):
+        flags.append("-XX:+ZGenerational")     # 23 起預設分代，24 移除此選項
+    return flags + ["-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"]
+
+
+def large_page_flags(mode, host):
+    if mode == "off":
+        return []
+    if host["os"] == "Linux":
+        if host["hugepages"] > 0:
+            return ["-XX:+UseLargePages"]
+        if host["thp"] in ("always", "madvise"):
+            return ["-XX:+UseTransparentHugePages"]
+        return ["-XX:+UseLargePages"] if mode == "on" else []
+    # Windows 需要「鎖定記憶體分頁」權限，macOS 不支援，只有使用者明確開啟才加
+    return ["-XX:+UseLargePages"] if mode == "on" else []
+
+
+def generate_flags(profile, heap_mb, java_major, host, large_pages="auto", pretouch=True):
+    """依方案產生 GC 相關 JVM 參數（不含 -Xms/-Xmx），manual 回傳空 list"""
+    if profile == "manual":
+        return []
+    gc = choose_gc(profile, java_major, heap_mb, host["cores"])
+    flags = zgc_flags(java_major) if gc == "zgc" else g1_flags(heap_mb)
+    if pretouch:
+        flags.append("-XX:+AlwaysPreTouch")
+    return flags + large_page_flags(large_pages, host)
+
+
+def split_args(text):
+    """使用者參數分成 (JVM 參數, 伺服器參數)"""
+    try:
+        tokens = shlex.split(text or "", posix=platform.system() != "Windows")
+    except ValueError:
+        tokens = (text or "").split()
+    jvm, server = [], []
+    takes_value = False
+    for tok in tokens:
+        if takes_value or _JVM_ARG_RE.match(tok):
+            jvm.append(tok)
+            takes_value = not takes_value and tok in _JVM_VALUE_ARGS
+        else:
+            server.append(tok)
+    return jvm, server
+
+
+# ========== 檢查衝突 ==========
+def _xx(flag):
+    """-XX:+Name / -XX:-Name / -XX:Name=value → (Name, 值)"""
+    if not flag.startswith("-XX:"):
+        return None, None
+    body = flag[4:]
+    if body[:1] in "+-":
+        return body[1:], body[0] == "+"
+    name, _, value = body.partition("=")
+    return name, value
+
+
+def _size_mb(text):
+    m = re.fullmatch(r"(\d+)([kKmMgG]?)", text)
+    if not m:
+        return None
+    n = int(m.group(1))
+    unit = m.group(2).lower()
+    return n // 1024 if unit == "k" else n * 1024 if unit == "g" else n if unit == "m" else n // (1024 * 1024)
+
+
+def validate(flags, java_major=None, host=None):
+    """
+    檢查完整的 JVM 參數（含 -Xms/-Xmx），回傳 [(等級, 訊息)]，等級為 "error" 或 "warn"。
+    同一選項出現多次時 JVM 以最後一個為準，這裡也以最後一個判斷。
+    """
+    problems = []
+    options = {}
+    unlocked_at = None
+    xms = xmx = None
+    for i, flag in enumerate(flags):
+        if flag.startswith("-Xms"):
+            xms = _size_mb(flag[4:])
+            continue
+        if flag.startswith("-Xmx"):
+            if xmx is not None:
+                problems.append(("warn", f"-Xmx 重複設定，以最後的 {flag} 為準"))
+            xmx = _size_mb(flag[4:])
+            continue
+        name, value = _xx(flag)
+        if name is None:
+            continue
+        if name == "UnlockExperimentalVMOptions" and value is True and unlocked_at is None:
+            unlocked_at = i
+        if name in _EXPERIMENTAL and (unlocked_at is None or unlocked_at > i):
+            problems.append(("error", f"{name} 需要先加上 -XX:+UnlockExperimentalVMOptions"))
+        if name in options and options[name] != value:
+            problems.append(("warn", f"{name} 設定了不同的值，以最後一個為準"))
+        options[name] = value
+
+    gcs = [gc for gc in _GC_FLAGS if options.get(gc) is True]
+    if len(gcs) > 1:
+        problems.append(("error", f"同時指定多個 GC：{'、'.join(gcs)}"))
+    gc = gcs[-1] if gcs else None
+    if gc != "UseG1GC" and gc is not None:
+        g1_only = sorted(n for n in options if n.startswith("G1"))
+        if g1_only:
+            problems.append(("warn", f"{gc} 不會使用 G1 專用參數：{'、'.join(g1_only[:3])}…"))
+    if java_major:
+        if gc == "UseZGC" and java_major < 11:
+            problems.append(("error", f"Java {java_major} 不支援 ZGC（需要 11 以上，建議 21 以上）"))
+        elif gc == "UseZGC" and java_major < 15 and options.get("UnlockExperimentalVMOptions") is not True:
+            problems.append(("error", f"Java {java_major} 的 ZGC 仍為實驗功能，需要 -XX:+UnlockExperimentalVMOptions"))
+        if "ZGenerational" in options:
+            if java_major < 21:
+                problems.append(("error", f"Java {java_major} 沒有分代 ZGC（-XX:+ZGenerational 需要 21 以上）"))
+            elif java_major >= 24:
+                problems.append(("error", "Java 24 起已移除 -XX:+ZGenerational，ZGC 預設即為分代"))
+        if gc == "UseConcMarkSweepGC" and java_major >= 14:
+            problems.append(("error", f"Java {java_major} 已移除 CMS（UseConcMarkSweepGC）"))
+    if options.get("UseLargePages") is True and options.get("UseTransparentHugePages") is True:
+        problems.append(("warn", "UseLargePages 與 UseTransparentHugePages 擇一即可"))
+    if xms is not None and xmx is not None and xms > xmx:
+        problems.append(("error", f"Xms（{xms} MB）大於 Xmx（{xmx} MB），JVM 無法啟動"))
+    if options.get("AlwaysPreTouch") is True and xms is not None and xmx is not None and xms < xmx:
+        problems.append(("warn", "AlwaysPreTouch 只預先配置 Xms 的大小，建議 Xms 與 Xmx 相同"))
+    if host and xmx and xmx > host["ram_mb"] * 0.9:
+        problems.append(("warn", f"Xmx {xmx} MB 接近或超過主機記憶體 {host['ram_mb']} MB，可能使用到置換空間"))
+    return problems
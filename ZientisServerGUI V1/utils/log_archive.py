@@ -0,0 +1,171 @@
+import os
+import gzip
+import time
+import queue
+import shutil
+import logging
+import threading
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:   # 未安裝時改用 gzip
+    zstandard = None
+
+ROTATE_RETRY_SECONDS = 60   # 輪替改名失敗後，隔這麼久才再試
+
+
+class ArchiveWriter(threading.Thread):
+    """
+    背景寫入日誌封存檔，依大小或時間輪替並壓縮（zstd，無則 gzip）。
+    生產端只做非阻塞的 put；佇列滿時丟棄並計數，之後在檔案中註記，
+    磁碟再慢也不會拖慢伺服器輸出讀取或 GUI。
+    """
+    def __init__(self, directory, name, max_bytes=20 * 1024 * 1024, rotate_seconds=24 * 3600,
+                 keep=50, queue_batches=2000):
+        super().__init__(daemon=True, name=f"ArchiveWriter-{name}")
+        self.directory = directory
+        self.name = name
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.keep = keep
+        self._queue = queue.Queue(maxsize=queue_batches)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._file = None
+        self._opened_at = 0
+        self._rotate_retry_at = 0
+        self._compress_threads = []
+
+    @property
+    def current_path(self):
+        return os.path.join(self.directory, f"{self.name}.log")
+
+    # ========== 生產端（任何執行緒） ==========
+    def write(self, line):
+        self.write_many([line])
+
+    def write_many(self, lines):
+        if not lines:
+            return
+        try:
+            self._queue.put_nowait(lines)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += len(lines)
+
+    def stop(self, timeout=5):
+        if not self.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:   # 寫入執行緒卡住，不讓關閉流程跟著卡住
+            print("[DEBUG] 日誌封存佇列已滿，略過等待寫入結束")
+            return
+        self.join(timeout)
+
+    # ========== 寫入執行緒 ==========
+    def run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._open()
+        while True:
+            batch = self._queue.get()
+            stop = batch is None
+            lines = [] if stop else list(batch)
+            # 一次取出目前所有的批次，合併成一次寫入
+            while not stop:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    stop = True
+                else:
+                    lines.extend(more)
+            self._write_lines(lines)
+            if stop:
+                break
+        self._file.close()
+        for t in self._compress_threads:
+            t.join()
+
+    def _write_lines(self, lines):
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            lines.insert(0, f"[Archive] 寫入過慢，略過 {dropped} 行")
+        if not lines:
+            return
+        try:
+            if self._file.closed:
+                self._open()
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            now = time.time()
+            if now >= self._rotate_retry_at and (
+                    self._file.tell() >= self.max_bytes or now - self._opened_at >= self.rotate_seconds):
+                self._rotate()
+        except OSError as e:
+            print(f"[DEBUG] 日誌封存寫入失敗: {e}")
+
+    def _open(self):
+        self._file = open(self.current_path, "a", encoding="utf-8", buffering=1024 * 1024)
+        self._opened_at = time.time()
+
+    def _rotate(self):
+        self._file.close()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = os.path.join(self.directory, f"{self.name}-{stamp}.log")
+        try:
+            os.replace(self.current_path, rotated)
+        except OSError as e:
+            # 改名失敗（例如 Windows 上檔案被其他程式開著）：繼續寫入目前的檔案，稍後再試，不要每次寫入都重試
+            self._rotate_retry_at = time.time() + ROTATE_RETRY_SECONDS
+            opened_at = self._opened_at
+            self._open()
+            self._opened_at = opened_at     # 仍是同一個檔案，時間輪替照原本的起點計算
+            print(f"[DEBUG] 日誌封存輪替失敗，{ROTATE_RETRY_SECONDS} 秒後再試: {e}")
+            return
+        self._open()
+        # 壓縮放到另一條執行緒，寫入不必等待
+        t = threading.Thread(target=self._compress, args=(rotated,), daemon=True)
+        t.start()
+        self._compress_threads = [x for x in self._compress_threads if x.is_alive()] + [t]
+
+    def _compress(self, path):
+        try:
+            if zstandard is not None:
+                target = path + ".zst"
+                with open(path, "rb") as src, open(target, "wb") as dst:
+                    zstandard.ZstdCompressor(level=6).copy_stream(src, dst)
+            else:
+                target = path + ".gz"
+                with open(path, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.remove(path)
+            self._cleanup()
+        except OSError as e:
+            print(f"[DEBUG] 日誌封存壓縮失敗: {e}")
+
+    def _cleanup(self):
+        """只保留最新的 keep 份封存檔"""
+        prefix = f"{self.name}-"
+        archives = sorted(
+            f for f in os.listdir(self.directory)
+            if f.startswith(prefix) and (f.endswith(".gz") or f.endswith(".zst"))
+        )
+        for old in archives[:-self.keep] if self.keep else []:
+            os.remove(os.path.join(self.directory, old))
+
+
+class ArchiveLogHandler(logging.Handler):
+    """把啟動器的 logging 事件轉送到 ArchiveWriter"""
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    def emit(self, record):
+        try:
+            self.writer.write(self.format(record))
+        except Exception:
+            self.handleError(record)
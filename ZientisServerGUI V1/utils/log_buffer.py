@@ -0,0 +1,39 @@
+import threading
+from collections import deque
+
+
+class LogBuffer:
+    """
+    執行緒安全的日誌暫存區：讀取執行緒 push，GUI 以固定頻率 drain 一整批。
+    容量有上限，GUI 卡住時只保留最新的行，並記錄被丟棄的數量。
+    """
+    def __init__(self, capacity=20000):
+        self._lines = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def push(self, item):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self.dropped += 1
+            self._lines.append(item)
+
+    def push_many(self, items):
+        with self._lock:
+            overflow = len(self._lines) + len(items) - self._lines.maxlen
+            if overflow > 0:
+                self.dropped += overflow
+            self._lines.extend(items)
+
+    def drain(self):
+        """取出目前所有暫存的行，回傳 (lines, 本次之前被丟棄的行數)"""
+        with self._lock:
+            if not self._lines:
+                return [], 0
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self.dropped = self.dropped, 0
+        return lines, dropped
+
+    def __len__(self):
+        return len(self._lines)
@@ -0,0 +1,89 @@
+import re
+import time
+from collections import namedtuple
+
+# 正規化後的等級與排序（數字越大越嚴重）
+LEVELS = {"TRACE": 0, "DEBUG": 1, "INFO": 2, "WARN": 3, "ERROR": 4, "FATAL": 5}
+_LEVEL_ALIASES = {"WARNING": "WARN", "SEVERE": "ERROR", "FINE": "DEBUG", "FINER": "TRACE", "FINEST": "TRACE"}
+
+# arrived：讀取執行緒收到這一行的時間（time.time()），主控台時間戳只到秒；未知時為 None
+LogRecord = namedtuple("LogRecord", "time thread level logger message raw arrived", defaults=(None,))
+
+# 一條正規式涵蓋以下格式：
+#   Paper/Spigot : [12:34:56 INFO]: [Plugin] msg
+#   原版/Spigot  : [12:34:56] [Server thread/INFO]: msg
+#   Forge        : [12:34:56] [Server thread/INFO] [minecraft/DedicatedServer]: msg
+#                  [18Jan2024 12:34:56.789] [Server thread/INFO] [net.minecraft.server.Main/]: msg
+#   Fabric       : [12:34:56] [Server thread/INFO] (Minecraft) msg
+_LINE_RE = re.compile(
+    r"\[(?P<time>(?:\d{2}[A-Za-z]{3}\d{4} )?\d{1,2}:\d{2}:\d{2}(?:\.\d+)?)(?: (?P<lvl>[A-Z]+))?\]"
+    r"(?: \[(?P<thread>[^\]]*?)/(?P<lvl2>[A-Z]+)\])?"
+    r"(?: \[(?P<logger>[^\]]*)\]| \((?P<logger2>[^)]*)\))?"
+    r":? ?(?P<msg>.*)"
+)
+# Paper 把插件名稱放在訊息開頭：[PluginName] msg
+_PLUGIN_PREFIX_RE = re.compile(r"\[([A-Za-z0-9_\-. ]{1,40})\] ")
+# 例外堆疊的延續行
+_CONTINUATION_RE = re.compile(r"\s+at |\s*\.\.\. \d+ more|Caused by: |\s+Suppressed: |[a-z][\w$]*(?:\.[\w$]+)+(?:Exception|Error)\b")
+
+
+class LogParser:
+    """
+    將伺服器輸出的每一行解析一次成 LogRecord。
+    例外堆疊等沒有標頭的延續行沿用上一筆的等級。
+    """
+    def __init__(self):
+        self._last_level = "INFO"
+        self._last_time = None
+        self._last_thread = None
+
+    def parse(self, line, arrived=None):
+        m = _LINE_RE.match(line)
+        if m is None:
+            if _CONTINUATION_RE.match(line):
+                return LogRecord(self._last_time, self._last_thread, self._last_level, None, line, line, arrived)
+            return LogRecord(None, None, "INFO", None, line, line, arrived)
+        lvl = m.group("lvl") or m.group("lvl2") or "INFO"
+        lvl = _LEVEL_ALIASES.get(lvl, lvl)
+        msg = m.group("msg")
+        logger = m.group("logger") or m.group("logger2")
+        if logger:
+            logger = logger.rstrip("/")
+        if logger is None:
+            p = _PLUGIN_PREFIX_RE.match(msg)
+            if p:
+                logger = p.group(1)
+        self._last_level = lvl
+        self._last_time = m.group("time")
+        self._last_thread = m.group("thread")
+        return LogRecord(self._last_time, self._last_thread, lvl, logger, msg, line, arrived)
+
+
+def is_warning(record):
+    return LEVELS.get(record.level, 2) >= LEVELS["WARN"]
+
+
+def benchmark(n=200000):
+    """量測解析速度（行/秒），可用 python -m utils.log_parser 執行"""
+    samples = [
+        "[12:34:56 INFO]: Done (12.345s)! For help, type \"help\"",
+        "[12:34:56 WARN]: [Essentials] Can't find permission handler",
+        "[12:34:56] [Server thread/INFO]: Steve joined the game",
+        "[12:34:56] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 5023ms or 100 ticks behind",
+        "[18Jan2024 12:34:56.789] [Server thread/ERROR] [net.minecraft.server.MinecraftServer/]: Encountered an unexpected exception",
+        "\tat net.minecraft.server.MinecraftServer.tick(MinecraftServer.java:123)",
+        "[12:34:56] [Server thread/INFO] (Minecraft) Preparing spawn area: 42%",
+        "plain launcher banner line",
+    ]
+    lines = (samples * (n // len(samples) + 1))[:n]
+    parser = LogParser()
+    parse = parser.parse
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    elapsed = time.perf_counter() - start
+    return n / elapsed
+
+
+if __name__ == "__main__":
+    print(f"{benchmark():,.0f} lines/s")
@@ -0,0 +1,116 @@
+import os
+import platform
+
+from utils.stream_lines import READ_BLOCK
+
+
+def _identity(st):
+    return (st.st_dev, st.st_ino)
+
+
+class LogTailer:
+    """
+    追蹤 logs/latest.log 這類會被輪替的日誌檔，只讀取新增的位元組。
+    以 (裝置, inode) 判斷檔案是否被換掉（伺服器重啟時 latest.log 會被改名壓縮），
+    檔案變短則視為被截斷，從頭讀起；不會重讀已讀過的內容。
+    Windows 上開著的檔案無法被改名，會擋住伺服器輪替 latest.log，
+    因此每次讀完就關檔、下次從記下的位置重新開啟（keep_open=False）。
+    """
+    def __init__(self, path, backlog_bytes=64 * 1024, block_size=READ_BLOCK, keep_open=None):
+        self.path = path
+        self.backlog_bytes = backlog_bytes
+        self.block_size = block_size
+        self.keep_open = platform.system() != "Windows" if keep_open is None else keep_open
+        self._file = None
+        self._id = None
+        self.offset = 0
+        self.rotations = 0
+
+    def open(self):
+        """開啟檔案並定位到結尾前 backlog_bytes 的下一個換行處，回傳是否成功"""
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return False
+        st = os.fstat(f.fileno())
+        start = max(0, st.st_size - self.backlog_bytes)
+        if start:
+            f.seek(start - 1)
+            # 從完整的一行開始，而不是從某行中間
+            head = f.read(min(self.backlog_bytes, 64 * 1024))
+            nl = head.find(b"\n")
+            start = start + nl if nl >= 0 else st.st_size
+        f.seek(start)
+        self._file, self._id, self.offset = f, _identity(st), start
+        return True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read(self):
+        """
+        讀取目前所有新資料，回傳位元組 list（可能為空）。
+        檔案被輪替時先讀完舊檔剩下的部分，再從新檔開頭繼續。
+        """
+        if self._file is None and not (self.open() if self._id is None else self._resume()):
+            return []
+        try:
+            return self._read_new()
+        finally:
+            if not self.keep_open:
+                self.close()
+
+    def _read_new(self):
+        chunks = self._drain()
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return chunks          # 輪替中，新檔還沒建立
+        if _identity(st) != self._id:
+            self._reopen_new()
+            chunks += self._drain()
+        elif st.st_size < self.offset:
+            print(f"[DEBUG] {self.path} 被截斷，從頭讀取")
+            self._file.seek(0)
+            self.offset = 0
+            chunks += self._drain()
+        return chunks
+
+    def _drain(self):
+        chunks = []
+        while True:
+            data = self._file.read(self.block_size)
+            if not data:
+                return chunks
+            self.offset += len(data)
+            chunks.append(data)
+
+    def _resume(self):
+        """關檔後重新開啟：同一個檔案從上次的位置繼續，已被換掉（舊檔剩下的部分已讀不到）或截斷則從頭讀"""
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return False
+        st = os.fstat(f.fileno())
+        if _identity(st) != self._id:
+            self._id, self.offset = _identity(st), 0
+            self.rotations += 1
+            print(f"[DEBUG] {self.path} 已輪替，改讀新檔")
+        elif st.st_size < self.offset:
+            print(f"[DEBUG] {self.path} 被截斷，從頭讀取")
+            self.offset = 0
+        f.seek(self.offset)
+        self._file = f
+        return True
+
+    def _reopen_new(self):
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return
+        self._file.close()
+        self._file, self._id, self.offset = f, _identity(os.fstat(f.fileno())), 0
+        self.rotations += 1
+        print(f"[DEBUG] {self.path} 已輪替，改讀新檔")
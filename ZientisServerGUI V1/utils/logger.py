@@ -1,11 +1,20 @@
 import logging
 
-def setup_logger(log_file: str = "server_launcher.log"):
-    logging.basicConfig(
-        filename=log_file,
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+def setup_logger(log_file: str = "server_launcher.log", archive=None):
+    """
+    設定啟動器 logging；提供 archive (ArchiveWriter) 時改寫入輪替封存檔。
+    """
+    if archive is None:
+        logging.basicConfig(filename=log_file, level=logging.INFO, format=LOG_FORMAT)
+        return
+    from utils.log_archive import ArchiveLogHandler
+    handler = ArchiveLogHandler(archive)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(handler)
 
 def log_info(msg: str):
     logging.info(msg)
@@ -0,0 +1,113 @@
+import time
+import threading
+from collections import deque, namedtuple
+
+import psutil
+
+# cpu：佔用一個核心的百分比（多核心時可超過 100）；read/write：每秒位元組；ctx：每秒情境切換
+Sample = namedtuple("Sample", "t cpu rss_mb threads fds read_bps write_bps ctx")
+FIELDS = Sample._fields[1:]
+
+
+class ProcessSampler:
+    """
+    在背景執行緒定期取樣單一程序（伺服器 JVM）的 CPU、RSS、執行緒、檔案描述子／handle、
+    I/O 與情境切換，存在固定長度的環狀緩衝區，供狀態列與圖表讀取。
+    每次取樣用 oneshot() 一次讀完 /proc，速率由前後兩次累計值相減，不另外等待；
+    overhead 記錄取樣執行緒自己的 CPU 使用率。
+    """
+    def __init__(self, interval=1.0, history=21600):
+        self.interval = interval
+        self.samples = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.pid = None
+        self.overhead = 0.0            # 取樣本身的 CPU 百分比
+        self._proc = None
+        self._prev = None              # (wall, cpu 秒, 讀, 寫, 切換)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="ProcessSampler")
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def set_pid(self, pid):
+        """切換取樣對象；None 代表伺服器未執行（保留歷史，暫停取樣）"""
+        if pid != self.pid:
+            with self.lock:
+                self.pid = pid
+                self._proc = None
+                self._prev = None
+
+    # ========== 取樣 ==========
+    def _loop(self):
+        spent = 0.0
+        window_start = time.monotonic()
+        while not self._stop.wait(self.interval):
+            c0 = time.thread_time()
+            self.sample()
+            spent += time.thread_time() - c0
+            elapsed = time.monotonic() - window_start
+            if elapsed >= 30:
+                self.overhead = round(spent / elapsed * 100, 3)
+                spent, window_start = 0.0, time.monotonic()
+
+    def sample(self):
+        """取樣一次，回傳 Sample；程序不存在或第一次取樣（沒有前值可算速率）時回傳 None"""
+        with self.lock:
+            if self.pid is None:
+                return None
+            try:
+                if self._proc is None:
+                    self._proc = psutil.Process(self.pid)
+                p = self._proc
+                with p.oneshot():
+                    cpu = p.cpu_times()
+                    rss = p.memory_info().rss
+                    threads = p.num_threads()
+                    fds = p.num_handles() if hasattr(p, "num_handles") else p.num_fds()
+                    io = p.io_counters() if hasattr(p, "io_counters") else None
+                    ctx = p.num_ctx_switches()
+            except psutil.Error:
+                self.pid = None
+                self._proc = None
+                return None
+            now = time.time()
+            current = (now, cpu.user + cpu.system, io.read_bytes if io else 0, io.write_bytes if io else 0,
+                       ctx.voluntary + ctx.involuntary)
+            prev, self._prev = self._prev, current
+            if prev is None or now <= prev[0]:
+                return None
+            dt = now - prev[0]
+            sample = Sample(
+                now,
+                round((current[1] - prev[1]) / dt * 100, 1),
+                round(rss / 1024 / 1024, 1),
+                threads,
+                fds,
+                int((current[2] - prev[2]) / dt),
+                int((current[3] - prev[3]) / dt),
+                int((current[4] - prev[4]) / dt),
+            )
+            self.samples.append(sample)
+            return sample
+
+    # ========== 查詢 ==========
+    @property
+    def latest(self):
+        """最近一次取樣；伺服器未執行時回傳 None"""
+        if self.pid is None or not self.samples:
+            return None
+        return self.samples[-1]
+
+    def series(self, field, since=None, scale=1.0):
+        """[(t, 值)]，供 TimeSeriesChart 使用"""
+        i = FIELDS.index(field) + 1
+        return [(s.t, s[i] * scale) for s in list(self.samples) if since is None or s.t >= since]
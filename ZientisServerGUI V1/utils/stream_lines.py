@@ -0,0 +1,70 @@
+import codecs
+import locale
+
+READ_BLOCK = 64 * 1024
+
+
+def console_encoding(name="auto"):
+    """設定值 "auto" 代表先試 UTF-8，遇到無效位元組再改用系統語系編碼"""
+    return "auto" if not name or name == "auto" else codecs.lookup(name).name
+
+
+def encode_command(text, encoding="auto"):
+    """把要送進伺服器 stdin 的指令編碼成位元組"""
+    if encoding == "auto":
+        encoding = "utf-8"
+    return (text + "\n").encode(encoding, errors="replace")
+
+
+class LineSplitter:
+    """
+    將大塊位元組逐步解碼並切成完整的行，不完整的尾段保留到下一塊。
+    auto 模式下先以 UTF-8 嚴格解碼，遇到無效位元組就永久改用系統語系編碼；
+    指定編碼時以 replace 容錯，不會因為單一錯字元中斷讀取。
+    """
+    def __init__(self, encoding="auto"):
+        self.auto = encoding == "auto"
+        self.encoding = "utf-8" if self.auto else encoding
+        self._decoder = self._make_decoder("strict" if self.auto else "replace")
+        self._pending = ""
+
+    def _make_decoder(self, errors):
+        return codecs.getincrementaldecoder(self.encoding)(errors=errors)
+
+    def _decode(self, data, final=False):
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError:
+            if not self.auto:
+                raise
+            # 不是 UTF-8：之後都用語系編碼（例如 Windows 的 cp950）
+            buffered, _ = self._decoder.getstate()
+            self.auto = False
+            self.encoding = locale.getpreferredencoding(False) or "utf-8"
+            self._decoder = self._make_decoder("replace")
+            print(f"[DEBUG] 伺服器輸出不是 UTF-8，改用 {self.encoding} 解碼")
+            return self._decoder.decode(buffered + data, final)
+
+    def feed(self, data):
+        """加入一塊位元組，回傳其中所有完整的行（不含換行字元）"""
+        text = self._pending + self._decode(data)
+        if "\r" in text:
+            # 區塊剛好切在 \r\n 中間時先留著，等下一塊再判斷
+            if text.endswith("\r"):
+                self._pending = "\r"
+                text = text[:-1]
+            else:
+                self._pending = ""
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+            lines = text.split("\n")
+            self._pending = lines.pop() + self._pending
+        else:
+            lines = text.split("\n")
+            self._pending = lines.pop()
+        return lines
+
+    def flush(self):
+        """串流結束時取出最後不完整的一行"""
+        rest = (self._pending + self._decode(b"", final=True)).rstrip("\r")
+        self._pending = ""
+        return [rest] if rest else []